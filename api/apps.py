@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        # Register the cache invalidation signals
+        from api.coordinates import signals  # noqa: F401
+        from api.transports import signals as transport_signals  # noqa: F401
@@ -0,0 +1,89 @@
+import threading
+from django.db import transaction
+from api.coordinates.models import Coordinates
+from api.spatial import GridIndex
+
+class SectorCache:
+    """
+    Process-wide lookup table of the known postcode sectors.
+    Built once from Coordinates on first use, cleared by the Coordinates
+    signals (see api/coordinates/signals.py) when sectors change.
+    Also holds the spatial index of the sector centres.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._names = None
+        self._index = None
+
+    def names(self):
+        """Returns the frozenset of every sector name (e.g. 'RG1 1')."""
+        names = self._names
+        if names is None:
+            with self._lock:
+                if self._names is None:
+                    self._names = frozenset(Coordinates.objects.values_list('name', flat=True))
+                names = self._names
+        return names
+
+    def index(self):
+        """
+        Returns the GridIndex of every sector centre (keys are sector names),
+        for nearest / k-nearest / radius queries.
+        """
+        index = self._index
+        if index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = GridIndex(Coordinates.objects.values_list('name', 'latitude', 'longitude'))
+                index = self._index
+        return index
+
+    def nearest_sector(self, lat, lon):
+        """Name of the sector whose centre is closest to the point, or None."""
+        result = self.index().nearest(lat, lon)
+        return result[0] if result else None
+
+    def clear(self):
+        """Drops the table and the index, the next lookup rebuilds them."""
+        with self._lock:
+            self._names = None
+            self._index = None
+
+    def clear_on_commit(self):
+        """
+        clear() now and again once the current transaction commits:
+        a lookup from another thread before the commit rebuilds the
+        table from the old rows.
+        """
+        self.clear()
+        transaction.on_commit(self.clear)
+
+    def resolve(self, postcode):
+        """
+        Returns the sector name of a full postcode (e.g. 'RG1 1AA' -> 'RG1 1'),
+        or None if the postcode is invalid or its sector isn't imported.
+        """
+        return self.resolve_many([postcode]).get(postcode)
+
+    def resolve_many(self, postcodes):
+        """
+        Resolves a whole list of postcodes in one call.
+        Returns {postcode: sector name or None}.
+        """
+        from api.utils import extract_sector_from_postcode
+
+        sectors = {pc: extract_sector_from_postcode(pc) for pc in set(postcodes)}
+        names = self.names()
+
+        # Sectors written without signals (bulk_create, another process)
+        # are missing from the table: one query tells us to rebuild it.
+        missing = {s for s in sectors.values() if s and s not in names}
+        if missing and Coordinates.objects.filter(name__in=missing).exists():
+            self.clear()
+            names = self.names()
+
+        return {pc: (sector if sector in names else None) for pc, sector in sectors.items()}
+
+
+# Shared by the model save() hooks, importers and serializers
+sector_cache = SectorCache()
@@ -0,0 +1,30 @@
+import django_filters
+from .models import Coordinates
+
+class CoordinatesFilter(django_filters.FilterSet):
+    """
+    Filters and orders the sectors by their metrics, read from the joined
+    SectorSummary (sectors without a summary yet have no metrics to match).
+    """
+    min_price = django_filters.NumberFilter(field_name='summary__average_price', lookup_expr='gte')
+    max_price = django_filters.NumberFilter(field_name='summary__average_price', lookup_expr='lte')
+    max_crimes = django_filters.NumberFilter(field_name='summary__total_crimes', lookup_expr='lte')
+    max_crime_rate = django_filters.NumberFilter(field_name='summary__crime_rate', lookup_expr='lte')
+    min_bus_stops = django_filters.NumberFilter(field_name='summary__bus_stop_count', lookup_expr='gte')
+
+    # ?ordering=average_price / ?ordering=-total_bus_stops (names of the output fields)
+    ordering = django_filters.OrderingFilter(
+        fields=(
+            ('name', 'name'),
+            ('summary__average_price', 'average_price'),
+            ('summary__median_price', 'median_price'),
+            ('summary__sale_count', 'sale_count'),
+            ('summary__total_crimes', 'total_crimes'),
+            ('summary__crime_rate', 'crime_rate'),
+            ('summary__bus_stop_count', 'total_bus_stops'),
+        )
+    )
+
+    class Meta:
+        model = Coordinates
+        fields = ['min_price', 'max_price', 'max_crimes', 'max_crime_rate', 'min_bus_stops']
@@ -1,5 +1,13 @@
-from api.utils import read_csv_generator
+from django.db import transaction
+from api.utils import read_csv_generator, delete_in_batches
+from api.metrics import metrics
 from api.coordinates.models import Coordinates
+from api.coordinates.cache import sector_cache
+
+# Columns compared on re-import to find changed sectors
+COORDINATE_FIELDS = ('latitude', 'longitude', 'population', 'households')
+# Columns read by parse_coordinate_row
+COORDINATE_COLUMNS = ['Postcode', 'Latitude', 'Longitude', 'Population', 'Households', 'Nearby Sectors']
 
 def parse_coordinate_row(row):
     """
@@ -48,9 +56,120 @@ def link_all_neighbors(neighbor_map):
         except Coordinates.DoesNotExist:
             continue
 
-def run_coordinate_import(filename='reading_postcode_sectors.csv'):
+# ==========================================
+# Bulk (set-based) Path
+# ==========================================
+
+def read_coordinate_file(filename, row_filter=None):
+    """
+    Parses the whole file in memory.
+    Returns ({name: data}, neighbor_map) - one entry per sector in the file.
+    row_filter (e.g. RowChangeTracker.filter) can drop unchanged rows.
+    """
+    records = {}
+    neighbor_map = {}
+
+    rows = read_csv_generator(filename, columns=COORDINATE_COLUMNS)
+    if row_filter:
+        rows = row_filter(rows)
+
+    parse = metrics.stats('parse')
+    for row in parse.track(rows):
+        data = parse_coordinate_row(row)
+        name = data.pop('name')
+        if not name:
+            parse.skipped += 1
+            continue
+        neighbor_map[name] = data.pop('raw_neighbors')
+        records[name] = data
+
+    return records, neighbor_map
+
+def bulk_upsert_coordinates(records):
+    """
+    Upserts only the sectors that are new or changed since the last import.
+    Returns (number of rows written, names of every sector now in the table).
+    """
+    existing = {
+        name: values
+        for name, *values in Coordinates.objects.values_list('name', *COORDINATE_FIELDS)
+    }
+
+    changed = [
+        Coordinates(name=name, **data)
+        for name, data in records.items()
+        if existing.get(name) != [data[field] for field in COORDINATE_FIELDS]
+    ]
+    Coordinates.objects.bulk_create(
+        changed,
+        update_conflicts=True,
+        unique_fields=['name'],
+        update_fields=list(COORDINATE_FIELDS),
+    )
+
+    # bulk_create sends no post_save signal, so refresh the sector table by hand
+    if changed:
+        sector_cache.clear_on_commit()
+
+    return len(changed), existing.keys() | records.keys()
+
+def bulk_link_neighbors(neighbor_map, known, batch_size=900):
+    """
+    Syncs the nearby_sectors through table with the map in two statements:
+    insert the new (sector, neighbor) pairs, delete the stale ones.
+    Only the sectors listed in the map are touched (their links are read
+    batch by batch), and only links between known sectors are kept.
+    Returns (links added, links removed).
+    """
+    Link = Coordinates.nearby_sectors.through
+
+    wanted = {
+        (name, neighbor)
+        for name, neighbors in neighbor_map.items()
+        for neighbor in neighbors
+        if name in known and neighbor in known
+    }
+
+    current = {}
+    names = list(neighbor_map)
+    for i in range(0, len(names), batch_size):
+        links = Link.objects.filter(from_coordinates_id__in=names[i:i + batch_size])
+        for pk, from_id, to_id in links.values_list('id', 'from_coordinates_id', 'to_coordinates_id'):
+            current[(from_id, to_id)] = pk
+
+    stale_ids = [pk for pair, pk in current.items() if pair not in wanted]
+    new_links = [
+        Link(from_coordinates_id=from_id, to_coordinates_id=to_id)
+        for from_id, to_id in wanted - current.keys()
+    ]
+
+    delete_in_batches(Link.objects.all(), 'id', stale_ids)
+    Link.objects.bulk_create(new_links)
+    return len(new_links), len(stale_ids)
+
+def run_coordinate_import(filename='reading_postcode_sectors.csv', bulk=True, row_filter=None):
     """
     Master function to coordinate the process.
+    bulk=False falls back to the row-by-row path (loop_csv + link_all_neighbors).
     """
-    neighbor_map = loop_csv(filename)
-    link_all_neighbors(neighbor_map)
\ No newline at end of file
+    if not bulk:
+        neighbor_map = loop_csv(filename)
+        link_all_neighbors(neighbor_map)
+        return
+
+    records, neighbor_map = read_coordinate_file(filename, row_filter)
+    with transaction.atomic():
+        with metrics.phase('write') as write:
+            # The names come from the upsert, not the shared sector table:
+            # rebuilt inside this transaction, it would cache uncommitted sectors
+            written, known = bulk_upsert_coordinates(records)
+            write.written += written
+            write.skipped += len(records) - written
+        with metrics.phase('link') as link:
+            added, removed = bulk_link_neighbors(neighbor_map, known)
+            link.written += added + removed
+
+    print(
+        f"Import completed. {len(records)} sectors read, {written} written; "
+        f"neighbour links +{added} / -{removed}"
+    )
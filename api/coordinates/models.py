@@ -1,4 +1,5 @@
 from django.db import models
+from django.core.exceptions import ObjectDoesNotExist
 from django.core.validators import RegexValidator
 from django.db.models import Avg
 
@@ -63,5 +64,55 @@ class Coordinates(models.Model):
         # Assumes related_name='schools' on School model
         return list(self.schools.values_list('name', flat=True))
 
+    # --- Materialized summary ---
+    @property
+    def sector_summary(self):
+        """
+        The stored SectorSummary of this sector (select_related('summary')
+        loads it with the sector), or an empty one before the first refresh.
+        """
+        try:
+            return self.summary
+        except ObjectDoesNotExist:
+            return SectorSummary(sector_id=self.name)
+
+    def __str__(self):
+        return self.name
+
+
+class SectorSummary(models.Model):
+    """
+    Read model of the per-sector metrics shown by the API, stored so that
+    requests don't aggregate. Rebuilt set-wise by
+    api.coordinates.summary.refresh_sector_summaries after the imports and
+    after house sale writes.
+    """
+    sector = models.OneToOneField(
+        Coordinates,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='summary'
+    )
+
+    # --- house prices ---
+    sale_count = models.IntegerField(default=0)
+    average_price = models.IntegerField(default=0)
+    median_price = models.IntegerField(default=0)
+
+    # --- transport ---
+    bus_stop_count = models.IntegerField(default=0)
+    route_count = models.IntegerField(default=0)
+
+    # --- schools ---
+    school_count = models.IntegerField(default=0)
+    school_names = models.JSONField(default=list)
+
+    # --- crime ---
+    total_crimes = models.IntegerField(default=0)
+    # Crimes per 1,000 households
+    crime_rate = models.FloatField(default=0.0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return f"Summary of {self.sector_id}"
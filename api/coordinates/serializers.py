@@ -1,5 +1,4 @@
 from rest_framework import serializers
-from django.db.models import Sum
 from .models import Coordinates
 from api.crimes.serializers import SectorCrimeStatSerializer
 from drf_spectacular.utils import extend_schema_field
@@ -7,13 +6,18 @@ from api.transports.serializers import TransportStopSerializer
 
 class CoordinatesSerializer(serializers.ModelSerializer):
     crime_stats = SectorCrimeStatSerializer(many=True, read_only=True)
-    total_crimes = serializers.SerializerMethodField()
-    crime_rate = serializers.SerializerMethodField()
 
-    average_price = serializers.IntegerField(source='area_average_price', read_only=True) 
-    total_bus_stops = serializers.IntegerField(source='bus_stop_count', read_only=True)   
+    # Per-sector metrics, read from the materialized SectorSummary
+    total_crimes = serializers.IntegerField(source='sector_summary.total_crimes', read_only=True)
+    crime_rate = serializers.FloatField(source='sector_summary.crime_rate', read_only=True)
+    average_price = serializers.IntegerField(source='sector_summary.average_price', read_only=True)
+    median_price = serializers.IntegerField(source='sector_summary.median_price', read_only=True)
+    sale_count = serializers.IntegerField(source='sector_summary.sale_count', read_only=True)
+    total_bus_stops = serializers.IntegerField(source='sector_summary.bus_stop_count', read_only=True)
     nearby_bus_stops = serializers.SerializerMethodField() 
-    school_names = serializers.SerializerMethodField()     
+    school_names = serializers.ListField(
+        child=serializers.CharField(), source='sector_summary.school_names', read_only=True
+    )
 
     class Meta:
         model = Coordinates
@@ -28,6 +32,8 @@ class CoordinatesSerializer(serializers.ModelSerializer):
             'crime_stats', 
             'nearby_sectors',
             'average_price',     
+            'median_price',
+            'sale_count',
             'total_bus_stops',   
             'nearby_bus_stops',  
             'school_names',      
@@ -43,62 +49,39 @@ class CoordinatesSerializer(serializers.ModelSerializer):
 
     @extend_schema_field(TransportStopSerializer(many=True))
     def get_nearby_bus_stops(self, obj):
-        # Uses the helper method from your Model
-        return TransportStopSerializer(obj.get_stops_with_routes(), many=True).data
-
-    @extend_schema_field(serializers.ListField(child=serializers.CharField()))
-    def get_school_names(self, obj):
-        # Uses the helper method from your Model
-        return obj.get_school_names()
-
-    def get_total_crimes(self, obj):
-        """
-        Finds the total_crimes row and returns its count directly.
-        """
-        total_stat = obj.crime_stats.filter(category__name='total_crimes').first()
-        
-        if total_stat:
-            return total_stat.count
-        return 0
-
-    def get_crime_rate(self, obj):
-        """
-        Returns crimes per 100 households.
-        Formula: (Total Crimes / Total Households) * 100 
-        """
-        # Get the values safely (default to 0 if missing)
-        crimes = self.get_total_crimes(obj)
-        houses = getattr(obj, 'households', 0) 
-
-        # Avoid division by zero
-        if houses == 0:
-            return 0.0
-
-        # Calculate and round
-        rate = (crimes / houses) * 100
-        return round(rate, 2)
+        # .all() keeps the view's prefetch of the stops and their routes
+        return TransportStopSerializer(obj.transport_stops.all(), many=True).data
 
 
 class SectorSummarySerializer(serializers.ModelSerializer):
     """
     Lightweight summary of a neighborhood.
     Used for embedding in other APIs (Houses, Schools, etc).
+    Every value comes from the materialized SectorSummary.
     """
-    crime_rate = serializers.FloatField(source='current_crime_rate', read_only=True)
-    bus_stop_count = serializers.IntegerField(source='bus_stop_count', read_only=True)
-    average_price = serializers.IntegerField(source='area_average_price', read_only=True)
-    school_names = serializers.SerializerMethodField()
+    crime_rate = serializers.FloatField(source='sector_summary.crime_rate', read_only=True)
+    total_crimes = serializers.IntegerField(source='sector_summary.total_crimes', read_only=True)
+    bus_stop_count = serializers.IntegerField(source='sector_summary.bus_stop_count', read_only=True)
+    route_count = serializers.IntegerField(source='sector_summary.route_count', read_only=True)
+    average_price = serializers.IntegerField(source='sector_summary.average_price', read_only=True)
+    median_price = serializers.IntegerField(source='sector_summary.median_price', read_only=True)
+    sale_count = serializers.IntegerField(source='sector_summary.sale_count', read_only=True)
+    school_count = serializers.IntegerField(source='sector_summary.school_count', read_only=True)
+    school_names = serializers.ListField(
+        child=serializers.CharField(), source='sector_summary.school_names', read_only=True
+    )
 
     class Meta:
         model = Coordinates
         fields = [
             'name',         
             'crime_rate', 
+            'total_crimes',
             'bus_stop_count', 
+            'route_count',
             'average_price', 
+            'median_price',
+            'sale_count',
+            'school_count',
             'school_names'
         ]
-
-    @extend_schema_field(serializers.ListField(child=serializers.CharField()))
-    def get_school_names(self, obj):
-        return obj.get_school_names()
\ No newline at end of file
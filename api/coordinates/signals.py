@@ -0,0 +1,14 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from api.coordinates.models import Coordinates
+from api.coordinates.cache import sector_cache
+
+@receiver(post_save, sender=Coordinates)
+def clear_sector_cache_on_save(sender, instance, **kwargs):
+    """ A new or moved sector invalidates the lookup table and the spatial index. """
+    sector_cache.clear_on_commit()
+
+@receiver(post_delete, sender=Coordinates)
+def clear_sector_cache_on_delete(sender, instance, **kwargs):
+    """ A removed sector invalidates the lookup table. """
+    sector_cache.clear_on_commit()
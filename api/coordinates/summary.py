@@ -0,0 +1,111 @@
+from itertools import groupby
+from django.db import transaction
+from django.db.models import Count
+from api.coordinates.models import Coordinates, SectorSummary
+from api.houses.models import HouseSaleRecord
+from api.schools.models import School
+from api.transports.models import TransportStop
+from api.metrics import metrics
+
+SUMMARY_FIELDS = [
+    'sale_count', 'average_price', 'median_price',
+    'bus_stop_count', 'route_count',
+    'school_count', 'school_names',
+    'total_crimes', 'crime_rate',
+    'updated_at',
+]
+SUMMARY_BATCH_SIZE = 1000
+
+def _in_sectors(queryset, field, names):
+    """ Restricts a metric query to the refreshed sectors (all of them when names is None). """
+    if names is None:
+        return queryset
+    return queryset.filter(**{f'{field}__in': names})
+
+def _sale_prices(names):
+    """
+    {sector: (sale count, average price, median price)} from one query
+    sorted by sector and price (SQLite has no median aggregate).
+    """
+    rows = (
+        _in_sectors(HouseSaleRecord.objects.filter(address__postcode_sector__isnull=False),
+                    'address__postcode_sector', names)
+        .order_by('address__postcode_sector', 'price_paid')
+        .values_list('address__postcode_sector', 'price_paid')
+    )
+    prices = {}
+    for sector, group in groupby(rows.iterator(chunk_size=5000), key=lambda row: row[0]):
+        values = [int(price) for _, price in group]
+        middle = len(values) // 2
+        median = values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2
+        prices[sector] = (len(values), int(sum(values) / len(values)), int(median))
+    return prices
+
+def _bus_stops(names):
+    """ {sector: (stop count, distinct route count)} """
+    rows = (
+        _in_sectors(TransportStop.objects.filter(nearest_sector__isnull=False), 'nearest_sector', names)
+        .values('nearest_sector')
+        .annotate(stops=Count('pk', distinct=True), routes=Count('routes', distinct=True))
+        .values_list('nearest_sector', 'stops', 'routes')
+    )
+    return {sector: (stops, routes) for sector, stops, routes in rows}
+
+def _school_names(names):
+    """ {sector: [school name, ...]} sorted by name """
+    school_names = {}
+    rows = _in_sectors(School.objects, 'postcode_sector', names).order_by('name').values_list('postcode_sector', 'name')
+    for sector, name in rows:
+        school_names.setdefault(sector, []).append(name)
+    return school_names
+
+def refresh_sector_summaries(sector_names=None):
+    """
+    Rebuilds the SectorSummary rows of the given sectors (every sector when None)
+    with one grouped query per metric and a bulk upsert; summaries of deleted
+    sectors go with them (cascade).
+    Returns the number of summaries written.
+    """
+    names = None if sector_names is None else sorted({name for name in sector_names if name})
+    if names == []:
+        return 0
+
+    with metrics.phase('aggregate') as aggregate:
+        # Coordinates.total_crimes is filled by every crime import (CSV and street files)
+        sectors = _in_sectors(Coordinates.objects, 'name', names).values_list('name', 'households', 'total_crimes')
+        prices = _sale_prices(names)
+        stops = _bus_stops(names)
+        school_names = _school_names(names)
+
+        summaries = []
+        for name, household_count, crimes in sectors:
+            sale_count, average_price, median_price = prices.get(name, (0, 0, 0))
+            stop_count, route_count = stops.get(name, (0, 0))
+            schools = school_names.get(name, [])
+            summaries.append(SectorSummary(
+                sector_id=name,
+                sale_count=sale_count,
+                average_price=average_price,
+                median_price=median_price,
+                bus_stop_count=stop_count,
+                route_count=route_count,
+                school_count=len(schools),
+                school_names=schools,
+                total_crimes=crimes,
+                # Crimes per 1,000 households
+                crime_rate=round((crimes / household_count) * 1000, 2) if household_count > 0 else 0.0,
+            ))
+        aggregate.read += len(summaries)
+
+    with metrics.phase('write') as write, transaction.atomic():
+        SectorSummary.objects.bulk_create(
+            summaries,
+            batch_size=SUMMARY_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['sector'],
+            update_fields=SUMMARY_FIELDS,
+        )
+        write.written += len(summaries)
+
+    print(f"Sector summaries refreshed: {len(summaries)}")
+    return len(summaries)
@@ -0,0 +1,68 @@
+from django.test import TestCase
+from django.core.exceptions import ValidationError
+from api.coordinates.models import Coordinates
+from api.coordinates.cache import sector_cache
+from api.houses.models import HouseAddress
+
+class SectorCacheTest(TestCase):
+    def setUp(self):
+        Coordinates.objects.create(name="RG1 1", latitude=51.4569, longitude=-0.973118)
+        Coordinates.objects.create(name="RG2 2", latitude=51.4294, longitude=-0.9579)
+
+    def test_resolve_many_in_one_call(self):
+        """ Valid, unknown and malformed postcodes resolve in a single call """
+        sector_cache.names()  # warm up
+
+        with self.assertNumQueries(0):
+            result = sector_cache.resolve_many(['RG1 1AA', 'rg2 2bb', 'NOT A CODE'])
+
+        self.assertEqual(result, {'RG1 1AA': 'RG1 1', 'rg2 2bb': 'RG2 2', 'NOT A CODE': None})
+
+    def test_unknown_sector_returns_none(self):
+        self.assertIsNone(sector_cache.resolve('ZZ99 9ZZ'))
+
+    def test_cleared_when_sectors_added_or_deleted(self):
+        """ post_save / post_delete signals keep the table in sync """
+        self.assertIsNone(sector_cache.resolve('RG30 4ET'))
+
+        Coordinates.objects.create(name="RG30 4")
+        self.assertEqual(sector_cache.resolve('RG30 4ET'), 'RG30 4')
+
+        Coordinates.objects.filter(name="RG30 4").delete()
+        self.assertIsNone(sector_cache.resolve('RG30 4ET'))
+
+    def test_cleared_again_on_commit(self):
+        """ A table rebuilt before the commit (e.g. by another thread) is dropped once it lands """
+        with self.captureOnCommitCallbacks(execute=True):
+            Coordinates.objects.create(name="RG30 4")
+            sector_cache.names()
+            self.assertIsNotNone(sector_cache._names)
+        self.assertIsNone(sector_cache._names)
+
+    def test_picks_up_sectors_created_without_signals(self):
+        """ bulk_create sends no signals, a miss re-checks the database """
+        sector_cache.names()  # warm up
+        Coordinates.objects.bulk_create([Coordinates(name="RG4 7")])
+
+        self.assertEqual(sector_cache.resolve('RG4 7SD'), 'RG4 7')
+
+    def test_nearest_sector_uses_spatial_index(self):
+        self.assertEqual(sector_cache.nearest_sector(51.455, -0.97), "RG1 1")
+
+        # Moving a sector rebuilds the index
+        Coordinates.objects.filter(name="RG2 2").update(latitude=51.455, longitude=-0.97)
+        Coordinates.objects.get(name="RG2 2").save()
+        self.assertEqual(sector_cache.nearest_sector(51.455, -0.97), "RG2 2")
+
+    def test_save_hook_runs_no_sector_query(self):
+        """ HouseAddress.save only runs its INSERT """
+        sector_cache.names()  # warm up
+
+        with self.assertNumQueries(1):
+            address = HouseAddress.objects.create(paon="10", street="Station Rd", postcode="RG1 1AF")
+
+        self.assertEqual(address.postcode_sector_id, "RG1 1")
+
+    def test_save_hook_still_rejects_unknown_sector(self):
+        with self.assertRaises(ValidationError):
+            HouseAddress.objects.create(paon="99", street="Nowhere St", postcode="ZZ99 9ZZ")
@@ -3,7 +3,8 @@ import csv
 
 from django.test import TestCase
 from api.coordinates.models import Coordinates
-from api.coordinates.importer import parse_coordinate_row, loop_csv
+from unittest.mock import patch
+from api.coordinates.importer import parse_coordinate_row, loop_csv, run_coordinate_import
 from django.conf import settings
 
 
@@ -73,4 +74,55 @@ class ImporterSaveTest(TestCase):
         self.assertEqual(returned_map['RG1 1'], ['RG1 2', 'RG1 3'])
         
         # RG1 2 should not be in the map because its raw_neighbors was empty
-        self.assertNotIn('RG1 2', returned_map)
\ No newline at end of file
+        self.assertNotIn('RG1 2', returned_map)
+
+class BulkImportTest(TestCase):
+    def setUp(self):
+        self.filename = "test_bulk_sectors.csv"
+        self.data_path = os.path.join(settings.BASE_DIR, 'data', self.filename)
+        os.makedirs(os.path.dirname(self.data_path), exist_ok=True)
+        self.write_csv([
+            ['RG1 1', '51.1', '-0.1', '100', '50', 'RG1 2, RG1 3'],
+            ['RG1 2', '51.2', '-0.2', '200', '80', 'RG1 1'],
+            ['RG1 3', '51.3', '-0.3', '300', '90', ''],
+        ])
+
+    def tearDown(self):
+        if os.path.exists(self.data_path):
+            os.remove(self.data_path)
+
+    def write_csv(self, rows):
+        with open(self.data_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Postcode', 'Latitude', 'Longitude', 'Population', 'Households', 'Nearby Sectors'])
+            writer.writerows(rows)
+
+    @patch('builtins.print')
+    def test_bulk_import_saves_sectors_and_links(self, mock_print):
+        run_coordinate_import(self.filename)
+
+        self.assertEqual(Coordinates.objects.count(), 3)
+        rg1 = Coordinates.objects.get(name="RG1 1")
+        self.assertEqual(rg1.households, 50)
+        self.assertEqual(set(rg1.nearby_sectors.values_list('name', flat=True)), {'RG1 2', 'RG1 3'})
+        self.assertEqual(list(Coordinates.objects.get(name="RG1 2").nearby_sectors.all()), [rg1])
+
+    @patch('builtins.print')
+    def test_reimport_only_writes_changes(self, mock_print):
+        run_coordinate_import(self.filename)
+
+        # Unchanged file: two reads inside the savepoint, no writes
+        with self.assertNumQueries(4):
+            run_coordinate_import(self.filename)
+
+        # Changed population and a dropped neighbour
+        self.write_csv([
+            ['RG1 1', '51.1', '-0.1', '150', '50', 'RG1 2'],
+            ['RG1 2', '51.2', '-0.2', '200', '80', 'RG1 1'],
+            ['RG1 3', '51.3', '-0.3', '300', '90', ''],
+        ])
+        run_coordinate_import(self.filename)
+
+        rg1 = Coordinates.objects.get(name="RG1 1")
+        self.assertEqual(rg1.population, 150)
+        self.assertEqual(list(rg1.nearby_sectors.values_list('name', flat=True)), ['RG1 2'])
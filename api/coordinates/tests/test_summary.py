@@ -0,0 +1,67 @@
+from django.test import TestCase
+from api.coordinates.models import Coordinates, SectorSummary
+from api.coordinates.serializers import SectorSummarySerializer
+from api.coordinates.summary import refresh_sector_summaries
+from api.houses.models import HouseSaleRecord, HouseAddress, HouseFeatures
+from api.schools.models import School
+from api.transports.models import BusRoute, TransportStop
+
+
+class SectorSummaryTest(TestCase):
+    def setUp(self):
+        self.rg1 = Coordinates.objects.create(name="RG1 1", households=200, total_crimes=50)
+        self.rg2 = Coordinates.objects.create(name="RG2 2")
+        features = HouseFeatures.objects.create(type_code='T', tenure_code='F')
+        address = HouseAddress.objects.create(paon='1', street='HIGH ST', postcode='RG1 1AA')
+        for i, price in enumerate([100000, 300000, 200000, 250000]):
+            HouseSaleRecord.objects.create(
+                unique_id=f'{{{i}}}', price_paid=price, deed_date='2024-01-15', address=address, features=features,
+            )
+
+        routes = [BusRoute.objects.create(name='17'), BusRoute.objects.create(name='21')]
+        for i in range(2):
+            stop = TransportStop.objects.create(
+                stop_id=f'S{i}', name=f'Stop {i}', latitude=51.45, longitude=-0.97, nearest_sector=self.rg1)
+            stop.routes.add(*routes)
+
+        School.objects.create(name='Kendrick School', urn='2', postcode='RG1 1AB')
+        School.objects.create(name='Abbey School', urn='1', postcode='RG1 1AA')
+
+    def test_refresh_builds_every_metric(self):
+        self.assertEqual(refresh_sector_summaries(), 2)
+
+        summary = SectorSummary.objects.get(sector=self.rg1)
+        self.assertEqual(summary.sale_count, 4)
+        self.assertEqual(summary.average_price, 212500)
+        self.assertEqual(summary.median_price, 225000)
+        self.assertEqual(summary.bus_stop_count, 2)
+        self.assertEqual(summary.route_count, 2)
+        self.assertEqual(summary.school_count, 2)
+        self.assertEqual(summary.school_names, ['Abbey School', 'Kendrick School'])
+        self.assertEqual(summary.total_crimes, 50)
+        self.assertEqual(summary.crime_rate, 250.0)
+
+        empty = SectorSummary.objects.get(sector=self.rg2)
+        self.assertEqual((empty.sale_count, empty.bus_stop_count, empty.crime_rate), (0, 0, 0.0))
+
+    def test_refresh_of_some_sectors_leaves_the_others(self):
+        refresh_sector_summaries()
+        HouseSaleRecord.objects.filter(unique_id='{0}').delete()
+
+        # Sectors (with their crime totals), one query per other metric, the upsert and its savepoint
+        with self.assertNumQueries(7):
+            self.assertEqual(refresh_sector_summaries(['RG1 1']), 1)
+        self.assertEqual(SectorSummary.objects.get(sector=self.rg1).median_price, 250000)
+        self.assertEqual(SectorSummary.objects.count(), 2)
+        self.assertEqual(refresh_sector_summaries([None]), 0)
+
+    def test_serializer_reads_the_summary(self):
+        # Before the first refresh the metrics are empty
+        self.assertEqual(SectorSummarySerializer(self.rg1).data['sale_count'], 0)
+
+        refresh_sector_summaries()
+        sector = Coordinates.objects.select_related('summary').get(name='RG1 1')
+        with self.assertNumQueries(0):
+            data = SectorSummarySerializer(sector).data
+        self.assertEqual(data['average_price'], 212500)
+        self.assertEqual(data['school_names'], ['Abbey School', 'Kendrick School'])
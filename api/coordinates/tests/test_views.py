@@ -0,0 +1,72 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from api.coordinates.models import Coordinates
+from api.coordinates.summary import refresh_sector_summaries
+from api.crimes.models import CrimeCategory, SectorCrimeStat
+from api.houses.models import HouseSaleRecord, HouseAddress, HouseFeatures
+from api.transports.models import BusRoute, TransportStop
+
+
+class CoordinatesViewTest(APITestCase):
+    def setUp(self):
+        features = HouseFeatures.objects.create(type_code='T', tenure_code='F')
+        total = CrimeCategory.objects.create(name='total_crimes')
+        burglary = CrimeCategory.objects.create(name='Burglary')
+        route = BusRoute.objects.create(name='17')
+
+        # RG1 1: cheap with many crimes, RG2 2: dear and quiet, RG3 3: nothing yet
+        for name, price, crimes, stops in [("RG1 1", 150000, 90, 3), ("RG2 2", 400000, 10, 1), ("RG3 3", None, 0, 0)]:
+            sector = Coordinates.objects.create(name=name, households=100, total_crimes=crimes)
+            SectorCrimeStat.objects.create(sector=sector, category=total, count=crimes)
+            SectorCrimeStat.objects.create(sector=sector, category=burglary, count=crimes // 2)
+            if price:
+                address = HouseAddress.objects.create(paon='1', street='HIGH ST', postcode=f'{name}AA')
+                HouseSaleRecord.objects.create(
+                    unique_id=f'{{{name}}}', price_paid=price, deed_date='2024-01-15',
+                    address=address, features=features,
+                )
+            for i in range(stops):
+                stop = TransportStop.objects.create(
+                    stop_id=f'{name}-{i}', name=f'Stop {i}', latitude=51.45, longitude=-0.97, nearest_sector=sector)
+                stop.routes.add(route)
+        refresh_sector_summaries()
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.data
+
+    def names(self, **params):
+        _, data = self.get(reverse('coordinates-list'), **params)
+        return [row['name'] for row in data['results']]
+
+    def test_list_reads_metrics_from_the_summary(self):
+        queries, data = self.get(reverse('coordinates-list'))
+
+        # count + page (with the summary joined in) + neighbours
+        self.assertEqual(queries, 3)
+        rg1 = data['results'][0]
+        self.assertEqual((rg1['average_price'], rg1['total_crimes'], rg1['total_bus_stops']), (150000, 90, 3))
+        self.assertNotIn('crime_stats', rg1)
+
+    def test_list_orders_and_filters_by_metrics(self):
+        self.assertEqual(self.names(ordering='-average_price'), ["RG2 2", "RG1 1", "RG3 3"])
+        self.assertEqual(self.names(ordering='total_bus_stops'), ["RG3 3", "RG2 2", "RG1 1"])
+        self.assertEqual(self.names(min_price=200000), ["RG2 2"])
+        self.assertEqual(self.names(max_crimes=50, min_bus_stops=1), ["RG2 2"])
+        self.assertEqual(self.names(search='RG1', max_crime_rate=1000), ["RG1 1"])
+
+    def test_detail_uses_the_prefetch(self):
+        queries, data = self.get(reverse('coordinates-detail', args=["RG1 1"]))
+
+        # sector + nearby sectors + crime stats + stops + their routes
+        self.assertEqual(queries, 5)
+        self.assertEqual(len(data['nearby_bus_stops']), 3)
+        self.assertEqual(data['nearby_bus_stops'][0]['routes'], ['17'])
+        self.assertEqual(
+            sorted((stat['category'], stat['count']) for stat in data['crime_stats']),
+            [('Burglary', 45), ('total_crimes', 90)],
+        )
@@ -1,4 +1,8 @@
+from django.db.models import Prefetch
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets, filters
+from api.crimes.models import SectorCrimeStat
+from .filters import CoordinatesFilter
 from .models import Coordinates
 from .serializers import CoordinatesSerializer
 
@@ -14,25 +18,28 @@ class CoordinatesViewSet(viewsets.ReadOnlyModelViewSet):
 
     # 3. Search Capability
     # Allows searching by name: /api/postcode-sectors/?search=RG1
-    filter_backends = [filters.SearchFilter]
+    # Filtering / ordering by the sector metrics: ?min_price=200000&ordering=-crime_rate
+    filter_backends = [filters.SearchFilter, DjangoFilterBackend]
     search_fields = ['name']
+    filterset_class = CoordinatesFilter
 
     def get_queryset(self):
         """
-        Performance Optimization:
-        Pre-fetch all related data in a single batch query to prevent 
-        N+1 issues when the Serializer accesses properties.
+        Performance Optimization, per action:
+        - list: totals and prices come from the joined SectorSummary row;
+          the heavy lists aren't shown, so only the neighbour ids are prefetched
+        - detail: also pre-fetches the lists in a fixed number of batch
+          queries, to prevent N+1 issues when the Serializer accesses them
         """
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().select_related('summary').prefetch_related('nearby_sectors')
+        if self.action == 'list':
+            return queryset
 
         return queryset.prefetch_related(
-            # 1. For Crime Stats
-            'crime_stats',
+            # 1. For Crime Stats (with their category names)
+            Prefetch('crime_stats', queryset=SectorCrimeStat.objects.select_related('category')),
 
             # 2. For Bus Stops AND their Routes (Deep Prefetch)
             'transport_stops', 
             'transport_stops__routes', 
-
-            # 3. For School Names
-            'schools' 
-        )
\ No newline at end of file
+        )
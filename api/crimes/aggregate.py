@@ -0,0 +1,172 @@
+"""
+Streaming aggregation of the police.uk monthly street files
+(crime_data/2024-01/2024-01-thames-valley-street.csv, ...) into
+crime counts per postcode sector and category.
+
+- each file is streamed, only Longitude / Latitude / Crime type are read
+- every crime goes to the nearest sector centre (api.spatial.GridIndex)
+- the counts of each file are cached as JSON next to the data, keyed on
+  the file's size / mtime and on the sectors; adding a month only reads
+  that month's file
+- crime_dir can also be a police.uk download .zip, read member by member
+
+No database access here, so scripts can use it without Django settings.
+"""
+import os
+import csv
+import json
+import hashlib
+from datetime import date
+from api.utils import read_csv_columns, clean_decimal, list_sources, source_signature
+
+STREET_FILE_PATTERN = os.path.join('*', '*-street.csv')
+STREET_COLUMNS = ['Longitude', 'Latitude', 'Crime type']
+# Crimes further than this (in degrees) outside the sectors' bounding box are dropped
+AREA_MARGIN_DEG = 0.05
+CACHE_FOLDER = '.cache'
+# Bump when the cached counts change meaning
+CACHE_VERSION = 1
+
+TOTAL_COLUMN = 'total_crimes'
+
+
+def street_files(crime_dir):
+    """ Every monthly *-street.csv under crime_dir (a folder or a .zip), oldest month first. """
+    return list_sources(crime_dir, STREET_FILE_PATTERN)
+
+def default_cache_dir(crime_dir):
+    """ crime_data/.cache, or .cache next to a crime_data .zip """
+    if os.path.isdir(crime_dir):
+        return os.path.join(crime_dir, CACHE_FOLDER)
+    return os.path.join(os.path.dirname(crime_dir), CACHE_FOLDER)
+
+def file_month(path):
+    """ '.../2024-01/2024-01-thames-valley-street.csv' -> date(2024, 1, 1), None if unnamed. """
+    try:
+        year, month = os.path.basename(path)[:7].split('-')
+        return date(int(year), int(month), 1)
+    except ValueError:
+        return None
+
+def sectors_signature(sector_index):
+    """ Changes whenever a sector is added, removed or moved. """
+    digest = hashlib.blake2b(digest_size=16)
+    for key, lat, lon in sorted(sector_index.points()):
+        digest.update(f"{key}|{lat!r}|{lon!r}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class CrimeAggregator:
+    """
+    Counts the crimes of street files per (sector, category).
+
+    Usage:
+        aggregator = CrimeAggregator(sector_cache.index(), cache_dir)
+        counts = aggregator.aggregate(street_files(crime_dir))
+        -> {'RG1 1': {'Burglary': 38, ...}, ...}
+    """
+    def __init__(self, sector_index, cache_dir=None):
+        self.index = sector_index
+        self.cache_dir = cache_dir
+        self.signature = sectors_signature(sector_index)
+        self.files_read = 0
+        self.files_cached = 0
+
+        points = sector_index.points()
+        if points:
+            lats = [lat for _, lat, _ in points]
+            lons = [lon for _, _, lon in points]
+            self.bounds = (
+                min(lats) - AREA_MARGIN_DEG, max(lats) + AREA_MARGIN_DEG,
+                min(lons) - AREA_MARGIN_DEG, max(lons) + AREA_MARGIN_DEG,
+            )
+        else:
+            self.bounds = None
+
+    # ===== One File =====
+    def count_file(self, path):
+        """ {sector: {category: count}} of one street file, without the cache. """
+        counts = {}
+        if self.bounds is None:
+            return counts
+        min_lat, max_lat, min_lon, max_lon = self.bounds
+
+        # Locations are snapped to a limited set of points: look each one up once
+        nearest = {}
+        for lon_str, lat_str, category in read_csv_columns(os.path.abspath(path), STREET_COLUMNS, strict=False):
+            location = (lat_str, lon_str)
+            sector = nearest.get(location, False)
+            if sector is False:
+                lat = clean_decimal(lat_str)
+                lon = clean_decimal(lon_str)
+                sector = None
+                if lat is not None and lon is not None and min_lat <= lat <= max_lat and min_lon <= lon <= max_lon:
+                    result = self.index.nearest(lat, lon)
+                    sector = result[0] if result else None
+                nearest[location] = sector
+
+            if sector is None or not category:
+                continue
+            sector_counts = counts.setdefault(sector, {})
+            sector_counts[category] = sector_counts.get(category, 0) + 1
+        return counts
+
+    def _cache_path(self, path):
+        name = os.path.splitext(os.path.basename(path))[0]
+        return os.path.join(self.cache_dir, f"{name}.json")
+
+    def _cache_key(self, path):
+        return {
+            'version': CACHE_VERSION,
+            **source_signature(path),
+            'sectors': self.signature,
+        }
+
+    def file_counts(self, path):
+        """ count_file, served from the per-file cache when still valid. """
+        if not self.cache_dir:
+            self.files_read += 1
+            return self.count_file(path)
+
+        key = self._cache_key(path)
+        cache_path = self._cache_path(path)
+        try:
+            with open(cache_path, encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('key') == key:
+                self.files_cached += 1
+                return cached['counts']
+        except (OSError, ValueError):
+            pass
+
+        counts = self.count_file(path)
+        self.files_read += 1
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump({'key': key, 'counts': counts}, f)
+        return counts
+
+    # ===== Every File =====
+    def aggregate(self, paths):
+        """ Sums file_counts over the files: {sector: {category: count}}. """
+        totals = {}
+        for path in paths:
+            for sector, categories in self.file_counts(path).items():
+                sector_totals = totals.setdefault(sector, {})
+                for category, count in categories.items():
+                    sector_totals[category] = sector_totals.get(category, 0) + count
+        return totals
+
+
+def write_stats_csv(counts, path):
+    """
+    Writes the counts in the detailed_crime_stats.csv layout:
+    postcode_sector, one column per category (sorted), total_crimes.
+    """
+    categories = sorted({category for sector_counts in counts.values() for category in sector_counts})
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['postcode_sector', *categories, TOTAL_COLUMN])
+        for sector in sorted(counts):
+            row = [counts[sector].get(category, 0) for category in categories]
+            writer.writerow([sector, *row, sum(row)])
@@ -1,31 +1,183 @@
-from api.utils import read_csv_generator
+from django.db import transaction
+from api.utils import read_csv_generator, clean_int, delete_in_batches
+from api.metrics import metrics
 from api.coordinates.models import Coordinates
-from .models import CrimeCategory, SectorCrimeStat
+from api.coordinates.cache import sector_cache
+from .models import CrimeCategory, SectorCrimeStat, MonthlyCrimeCount
+from .aggregate import CrimeAggregator, street_files, file_month, default_cache_dir
 
-def run_crime_import(filename):
+# Pre-calculated column holding the sum of every category
+TOTAL_CATEGORY = 'total_crimes'
+
+def pivot_crime_rows(filename, row_filter=None):
     """
-    Imports normalized crime data from the aggregated CSV.
+    Pivots the wide CSV (one column per category) into
+    (sector, category, count) tuples.
+    Sectors that haven't been imported yet are skipped.
     """
-    for row in read_csv_generator(filename):
+    known_sectors = sector_cache.names()
+
+    rows = read_csv_generator(filename)
+    if row_filter:
+        rows = row_filter(rows)
+
+    parse = metrics.stats('parse')
+    for row in parse.track(rows):
         # Extract sector and remove non-normalized fields
         sector_name = row.pop('postcode_sector', None)
-        
-        try:
-            sector_obj = Coordinates.objects.get(name=sector_name)
-            
-            for category_name, count_str in row.items():
-                if not count_str or not count_str.strip():
-                    continue
-                
-                # Dynamic normalisation: Get or create the category record
-                category_obj, _ = CrimeCategory.objects.get_or_create(name=category_name)
-                
-                # Update or create the link between this sector and this crime type
-                SectorCrimeStat.objects.update_or_create(
-                    sector=sector_obj,
-                    category=category_obj,
-                    defaults={'count': int(count_str)}
-                )
-        except Coordinates.DoesNotExist:
-            # Skip if the postcode sector hasn't been imported yet
-            continue
\ No newline at end of file
+        if sector_name not in known_sectors:
+            parse.skipped += 1
+            continue
+
+        for category_name, count_str in row.items():
+            count = clean_int(count_str)
+            if count is None:
+                continue
+            yield sector_name, category_name, count
+
+def sector_totals(stats):
+    """
+    Returns {sector: total crimes}.
+    Uses the pre-calculated total column when the file has one,
+    otherwise sums the categories.
+    """
+    summed = {}
+    given = {}
+    for sector_name, category_name, count in stats:
+        if category_name == TOTAL_CATEGORY:
+            given[sector_name] = count
+        else:
+            summed[sector_name] = summed.get(sector_name, 0) + count
+    return {**summed, **given}
+
+def run_crime_import(filename, row_filter=None):
+    """
+    Imports normalized crime data from the aggregated CSV.
+    Categories and sectors are loaded once, the whole file is upserted
+    in bulk on (sector, category) and Coordinates.total_crimes is filled.
+    row_filter (e.g. RowChangeTracker.filter) can drop unchanged rows.
+    """
+    stats = list(pivot_crime_rows(filename, row_filter))
+    _write_crime_stats(stats, sector_totals(stats))
+
+def run_street_crime_import(crime_dir, cache_dir=None):
+    """
+    Imports the crime counts straight from the monthly street files
+    (crime_dir/2024-01/2024-01-thames-valley-street.csv, ...), without
+    the detailed_crime_stats.csv step. crime_dir may be the downloaded .zip.
+    Crimes go to the nearest imported sector; each month's counts are
+    cached (see api.crimes.aggregate), so only new or changed months are read.
+    Sectors without any crime are cleared.
+    """
+    sector_index = sector_cache.index()
+    if not len(sector_index):
+        print("Warning: No sectors found. Crimes cannot be assigned to neighborhoods.")
+        return
+
+    if cache_dir is None:
+        cache_dir = default_cache_dir(crime_dir)
+
+    with metrics.phase('parse'):
+        aggregator = CrimeAggregator(sector_index, cache_dir)
+        counts = aggregator.aggregate(street_files(crime_dir))
+
+    stats = [
+        (sector_name, category_name, count)
+        for sector_name, categories in counts.items()
+        for category_name, count in categories.items()
+    ]
+    totals = sector_totals(stats)
+    # Same layout as the aggregated CSV: the sum is also a TOTAL_CATEGORY row
+    stats += [(sector_name, TOTAL_CATEGORY, total) for sector_name, total in totals.items()]
+    _write_crime_stats(stats, totals)
+
+    # The counts are complete: drop categories a sector no longer has, and sectors without crimes
+    stale_ids = [
+        pk for pk, sector_name, category_name
+        in SectorCrimeStat.objects.values_list('id', 'sector_id', 'category_id')
+        if sector_name in counts and category_name != TOTAL_CATEGORY and category_name not in counts[sector_name]
+    ]
+    delete_in_batches(SectorCrimeStat.objects.all(), 'id', stale_ids)
+    clear_sector_crimes(sector_cache.names() - counts.keys())
+
+    print(
+        f"Crime import completed. {aggregator.files_read} monthly files read, "
+        f"{aggregator.files_cached} from cache; {len(counts)} sectors"
+    )
+
+def run_monthly_crime_import(crime_dir, cache_dir=None):
+    """
+    Appends the months of the street files that aren't in MonthlyCrimeCount
+    yet (one row per sector, month and category). Months already imported
+    are left as they are, so a new month only reads and writes that month.
+    Shares the per-file cache of run_street_crime_import.
+    """
+    sector_index = sector_cache.index()
+    if not len(sector_index):
+        print("Warning: No sectors found. Crimes cannot be assigned to neighborhoods.")
+        return
+
+    if cache_dir is None:
+        cache_dir = default_cache_dir(crime_dir)
+
+    imported = set(MonthlyCrimeCount.objects.dates('month', 'month'))
+    new_files = {}
+    for path in street_files(crime_dir):
+        month = file_month(path)
+        if month is not None and month not in imported:
+            new_files.setdefault(month, []).append(path)
+
+    aggregator = CrimeAggregator(sector_index, cache_dir)
+    for month, paths in sorted(new_files.items()):
+        with metrics.phase('parse'):
+            counts = aggregator.aggregate(paths)
+
+        with transaction.atomic(), metrics.phase('write') as write:
+            categories = {category for sector_counts in counts.values() for category in sector_counts}
+            existing_categories = set(CrimeCategory.objects.values_list('name', flat=True))
+            CrimeCategory.objects.bulk_create([CrimeCategory(name=name) for name in categories - existing_categories])
+
+            rows = [
+                MonthlyCrimeCount(sector_id=sector_name, month=month, category_id=category_name, count=count)
+                for sector_name, sector_counts in counts.items()
+                for category_name, count in sector_counts.items()
+            ]
+            MonthlyCrimeCount.objects.bulk_create(rows, batch_size=500)
+            write.written += len(rows)
+
+    print(
+        f"Monthly crime import completed. {len(new_files)} new months "
+        f"({', '.join(f'{month:%Y-%m}' for month in sorted(new_files)) or 'none'}), "
+        f"{len(imported)} already imported"
+    )
+
+def _write_crime_stats(stats, totals):
+    """ Upserts (sector, category, count) tuples and the sectors' total_crimes. """
+    with transaction.atomic(), metrics.phase('write') as write:
+        # Dynamic normalisation: create the categories we haven't seen yet
+        existing_categories = set(CrimeCategory.objects.values_list('name', flat=True))
+        new_categories = {category for _, category, _ in stats} - existing_categories
+        CrimeCategory.objects.bulk_create([CrimeCategory(name=name) for name in new_categories])
+
+        # Update or create the link between each sector and crime type
+        SectorCrimeStat.objects.bulk_create(
+            [
+                SectorCrimeStat(sector_id=sector_name, category_id=category_name, count=count)
+                for sector_name, category_name, count in stats
+            ],
+            update_conflicts=True,
+            unique_fields=['sector', 'category'],
+            update_fields=['count'],
+        )
+
+        Coordinates.objects.bulk_update(
+            [Coordinates(name=name, total_crimes=total) for name, total in totals.items()],
+            ['total_crimes'],
+        )
+        write.written += len(stats)
+
+def clear_sector_crimes(sector_names):
+    """ Sectors that disappeared from the aggregated file have no crimes. """
+    with transaction.atomic():
+        delete_in_batches(SectorCrimeStat.objects.all(), 'sector_id', sector_names)
+        Coordinates.objects.filter(name__in=list(sector_names)).update(total_crimes=0)
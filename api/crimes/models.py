@@ -30,4 +30,34 @@ class SectorCrimeStat(models.Model):
         unique_together = ('sector', 'category')
 
     def __str__(self):
-        return f"{self.sector_id} - {self.category_id}: {self.count}"
\ No newline at end of file
+        return f"{self.sector_id} - {self.category_id}: {self.count}"
+
+class MonthlyCrimeCount(models.Model):
+    """
+    Crimes of one category in one sector during one month.
+    Row example: RG1 1 | 2024-01-01 | Burglary | 3
+    Month is the first day of the month.
+    """
+    sector = models.ForeignKey(
+        Coordinates,
+        on_delete=models.CASCADE,
+        related_name='monthly_crimes'
+    )
+    month = models.DateField()
+    category = models.ForeignKey(
+        CrimeCategory,
+        on_delete=models.CASCADE
+    )
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        # Also the index of a sector's series: (sector, month range) scans
+        constraints = [
+            models.UniqueConstraint(fields=['sector', 'month', 'category'], name='unique_sector_month_category'),
+        ]
+        indexes = [
+            models.Index(fields=['month'], name='monthly_crime_month_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.sector_id} {self.month:%Y-%m} - {self.category_id}: {self.count}"
@@ -10,4 +10,19 @@ class SectorCrimeStatSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = SectorCrimeStat
-        fields = ['category', 'count']
\ No newline at end of file
+        fields = ['category', 'count']
+
+class MonthlyCrimePointSerializer(serializers.Serializer):
+    month = serializers.CharField()
+    count = serializers.IntegerField()
+    rolling_total = serializers.IntegerField()
+
+class MonthlyCrimeSeriesSerializer(serializers.Serializer):
+    """
+    Output: { "sector": "RG1 1", "category": null, "window": 3,
+              "series": [{"month": "2024-01", "count": 180, "rolling_total": 180}, ...] }
+    """
+    sector = serializers.CharField()
+    category = serializers.CharField(allow_null=True)
+    window = serializers.IntegerField()
+    series = MonthlyCrimePointSerializer(many=True)
@@ -0,0 +1,89 @@
+import os
+import csv
+import zipfile
+import tempfile
+from django.test import SimpleTestCase
+from api.spatial import GridIndex
+from api.crimes.aggregate import CrimeAggregator, street_files, write_stats_csv
+
+HEADER = ['Crime ID', 'Month', 'Longitude', 'Latitude', 'Location', 'Crime type']
+
+class CrimeAggregatorTest(SimpleTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.crime_dir = os.path.join(self.tmp_dir.name, 'crime_data')
+        self.cache_dir = os.path.join(self.crime_dir, '.cache')
+        self.index = GridIndex([('RG1 1', 51.4569, -0.973118), ('RG30 4', 51.4478, -1.0412)])
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_month(self, month, rows):
+        folder = os.path.join(self.crime_dir, month)
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f'{month}-thames-valley-street.csv')
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(HEADER)
+            writer.writerows(['', month, lon, lat, 'On or near X', category] for lat, lon, category in rows)
+        return path
+
+    def test_counts_by_nearest_sector(self):
+        self.write_month('2024-01', [
+            ('51.4570', '-0.9730', 'Burglary'),
+            ('51.4570', '-0.9730', 'Burglary'),
+            ('51.4480', '-1.0410', 'Drugs'),
+            ('', '', 'Drugs'),                 # no location
+            ('51.7520', '-1.2577', 'Drugs'),   # Oxford, outside the area
+        ])
+
+        counts = CrimeAggregator(self.index).aggregate(street_files(self.crime_dir))
+
+        self.assertEqual(counts, {'RG1 1': {'Burglary': 2}, 'RG30 4': {'Drugs': 1}})
+
+    def test_new_month_only_reads_that_file(self):
+        self.write_month('2024-01', [('51.4570', '-0.9730', 'Burglary')])
+        CrimeAggregator(self.index, self.cache_dir).aggregate(street_files(self.crime_dir))
+
+        self.write_month('2024-02', [('51.4570', '-0.9730', 'Burglary'), ('51.4570', '-0.9730', 'Drugs')])
+        aggregator = CrimeAggregator(self.index, self.cache_dir)
+        counts = aggregator.aggregate(street_files(self.crime_dir))
+
+        self.assertEqual((aggregator.files_read, aggregator.files_cached), (1, 1))
+        self.assertEqual(counts, {'RG1 1': {'Burglary': 2, 'Drugs': 1}})
+
+    def test_cache_invalidated_by_sector_changes(self):
+        self.write_month('2024-01', [('51.4480', '-1.0410', 'Drugs')])
+        CrimeAggregator(self.index, self.cache_dir).aggregate(street_files(self.crime_dir))
+
+        # RG30 4 renamed
+        aggregator = CrimeAggregator(GridIndex([('RG1 1', 51.4569, -0.973118), ('RG31 5', 51.4478, -1.0412)]), self.cache_dir)
+        counts = aggregator.aggregate(street_files(self.crime_dir))
+
+        self.assertEqual(aggregator.files_read, 1)
+        self.assertEqual(counts, {'RG31 5': {'Drugs': 1}})
+
+    def test_write_stats_csv(self):
+        path = os.path.join(self.tmp_dir.name, 'stats.csv')
+        write_stats_csv({'RG30 4': {'Drugs': 1}, 'RG1 1': {'Burglary': 2}}, path)
+
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows, [
+            ['postcode_sector', 'Burglary', 'Drugs', 'total_crimes'],
+            ['RG1 1', '2', '0', '2'],
+            ['RG30 4', '0', '1', '1'],
+        ])
+
+    def test_police_download_zip(self):
+        """ the .zip as downloaded from police.uk, cached per member """
+        path = self.write_month('2024-01', [('51.4570', '-0.9730', 'Burglary')])
+        archive = os.path.join(self.tmp_dir.name, 'police.zip')
+        with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as f:
+            f.write(path, '2024-01/2024-01-thames-valley-street.csv')
+
+        aggregator = CrimeAggregator(self.index, self.cache_dir)
+        self.assertEqual(aggregator.aggregate(street_files(archive)), {'RG1 1': {'Burglary': 1}})
+        aggregator = CrimeAggregator(self.index, self.cache_dir)
+        aggregator.aggregate(street_files(archive))
+        self.assertEqual(aggregator.files_cached, 1)
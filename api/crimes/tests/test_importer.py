@@ -1,10 +1,13 @@
 import os
 import csv
+import tempfile
+from unittest.mock import patch
 from django.test import TestCase
 from django.conf import settings
-from api.coordinates.models import Coordinates
-from api.crimes.models import SectorCrimeStat, CrimeCategory
-from api.crimes.importer import run_crime_import
+from api.coordinates.models import Coordinates, SectorSummary
+from api.coordinates.summary import refresh_sector_summaries
+from api.crimes.models import SectorCrimeStat, CrimeCategory, MonthlyCrimeCount
+from api.crimes.importer import run_crime_import, run_street_crime_import, run_monthly_crime_import
 
 class CrimeImporterTest(TestCase):
     def setUp(self):
@@ -36,4 +39,98 @@ class CrimeImporterTest(TestCase):
 
         # Check stats linked correctly
         stat = SectorCrimeStat.objects.get(sector_id="RG1 1", category_id="Burglary")
-        self.assertEqual(stat.count, 38)
\ No newline at end of file
+        self.assertEqual(stat.count, 38)
+
+    def test_run_crime_import_fills_total_crimes(self):
+        """Coordinates.total_crimes comes from the pre-calculated column."""
+        run_crime_import(self.filename)
+
+        self.assertEqual(Coordinates.objects.get(name="RG1 1").total_crimes, 67)
+
+    def test_run_crime_import_updates_existing(self):
+        """Re-running the import updates the counts, doesn't duplicate."""
+        run_crime_import(self.filename)
+
+        with open(self.data_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['postcode_sector', 'Burglary', 'Drugs', 'total_crimes'])
+            writer.writerow(['RG1 1', '40', '29', '69'])
+            writer.writerow(['ZZ9 9', '1', '1', '2'])  # Unknown sector: skipped
+        run_crime_import(self.filename)
+
+        self.assertEqual(SectorCrimeStat.objects.count(), 3)
+        self.assertEqual(SectorCrimeStat.objects.get(sector_id="RG1 1", category_id="Burglary").count, 40)
+        self.assertEqual(Coordinates.objects.get(name="RG1 1").total_crimes, 69)
+
+
+class StreetCrimeImportTest(TestCase):
+    def setUp(self):
+        Coordinates.objects.create(name="RG1 1", latitude=51.4569, longitude=-0.973118, households=500)
+        Coordinates.objects.create(name="RG30 4", latitude=51.4478, longitude=-1.0412)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.crime_dir = self.tmp_dir.name
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_month(self, month, rows):
+        folder = os.path.join(self.crime_dir, month)
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f'{month}-thames-valley-street.csv'), 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Month', 'Longitude', 'Latitude', 'Crime type'])
+            writer.writerows([month, lon, lat, category] for lat, lon, category in rows)
+
+    @patch('builtins.print')
+    def test_import_from_street_files(self, mock_print):
+        self.write_month('2024-01', [('51.4570', '-0.9730', 'Burglary'), ('51.4480', '-1.0410', 'Drugs')])
+        self.write_month('2024-02', [('51.4570', '-0.9730', 'Burglary')])
+
+        run_street_crime_import(self.crime_dir)
+
+        self.assertEqual(SectorCrimeStat.objects.get(sector_id="RG1 1", category_id="Burglary").count, 2)
+        # The total row the serializers and the sector summary read
+        self.assertEqual(SectorCrimeStat.objects.get(sector_id="RG30 4", category_id="total_crimes").count, 1)
+        self.assertEqual(Coordinates.objects.get(name="RG1 1").total_crimes, 2)
+        self.assertEqual(Coordinates.objects.get(name="RG30 4").total_crimes, 1)
+
+    @patch('builtins.print')
+    def test_reimport_clears_stale_counts(self, mock_print):
+        self.write_month('2024-01', [('51.4570', '-0.9730', 'Burglary'), ('51.4480', '-1.0410', 'Drugs')])
+        run_street_crime_import(self.crime_dir)
+
+        # The month is republished: RG30 4 has no crime left, RG1 1 only drugs
+        self.write_month('2024-01', [('51.4570', '-0.9730', 'Drugs'), ('51.4570', '-0.9730', 'Drugs')])
+        run_street_crime_import(self.crime_dir)
+
+        self.assertEqual(
+            sorted(SectorCrimeStat.objects.values_list('sector_id', 'category_id', 'count')),
+            [('RG1 1', 'Drugs', 2), ('RG1 1', 'total_crimes', 2)],
+        )
+        self.assertEqual(Coordinates.objects.get(name="RG30 4").total_crimes, 0)
+
+    @patch('builtins.print')
+    def test_sector_summary_follows_street_import(self, mock_print):
+        self.write_month('2024-01', [('51.4570', '-0.9730', 'Burglary'), ('51.4570', '-0.9730', 'Drugs')])
+        run_street_crime_import(self.crime_dir)
+        refresh_sector_summaries()
+
+        summary = SectorSummary.objects.get(sector_id="RG1 1")
+        self.assertEqual((summary.total_crimes, summary.crime_rate), (2, 4.0))
+        self.assertEqual(SectorSummary.objects.get(sector_id="RG30 4").total_crimes, 0)
+
+    @patch('builtins.print')
+    def test_monthly_import_appends_new_months_only(self, mock_print):
+        self.write_month('2024-01', [('51.4570', '-0.9730', 'Burglary'), ('51.4570', '-0.9730', 'Burglary')])
+        run_monthly_crime_import(self.crime_dir)
+
+        # 2024-01 is republished with another count, 2024-02 is new
+        self.write_month('2024-01', [('51.4570', '-0.9730', 'Burglary')])
+        self.write_month('2024-02', [('51.4480', '-1.0410', 'Drugs')])
+        run_monthly_crime_import(self.crime_dir)
+
+        rows = MonthlyCrimeCount.objects.order_by('month').values_list('sector_id', 'month', 'category_id', 'count')
+        self.assertEqual([(s, m.strftime('%Y-%m'), c, n) for s, m, c, n in rows], [
+            ('RG1 1', '2024-01', 'Burglary', 2),
+            ('RG30 4', '2024-02', 'Drugs', 1),
+        ])
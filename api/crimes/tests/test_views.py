@@ -0,0 +1,42 @@
+from datetime import date
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from api.coordinates.models import Coordinates
+from api.crimes.models import CrimeCategory, MonthlyCrimeCount
+
+class CrimeSeriesViewTest(APITestCase):
+    def setUp(self):
+        sector = Coordinates.objects.create(name="RG1 1")
+        burglary = CrimeCategory.objects.create(name="Burglary")
+        drugs = CrimeCategory.objects.create(name="Drugs")
+        # No row for March
+        for month, category, count in [
+            (date(2024, 1, 1), burglary, 3),
+            (date(2024, 1, 1), drugs, 2),
+            (date(2024, 2, 1), burglary, 4),
+            (date(2024, 4, 1), burglary, 1),
+        ]:
+            MonthlyCrimeCount.objects.create(sector=sector, month=month, category=category, count=count)
+        self.url = reverse('crime-series')
+
+    def test_monthly_series_with_rolling_total(self):
+        response = self.client.get(self.url, {'sector': 'RG1 1', 'window': 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['series'], [
+            {'month': '2024-01', 'count': 5, 'rolling_total': 5},
+            {'month': '2024-02', 'count': 4, 'rolling_total': 9},
+            {'month': '2024-04', 'count': 1, 'rolling_total': 1},  # March counts as 0
+        ])
+
+    def test_category_filter(self):
+        response = self.client.get(self.url, {'sector': 'RG1 1', 'category': 'Drugs'})
+
+        self.assertEqual(response.data['category'], 'Drugs')
+        self.assertEqual(response.data['series'], [{'month': '2024-01', 'count': 2, 'rolling_total': 2}])
+
+    def test_errors(self):
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'sector': 'RG1 1', 'window': 'x'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'sector': 'ZZ9 9'}).status_code, status.HTTP_404_NOT_FOUND)
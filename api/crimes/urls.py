@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import CrimeSeriesView
+
+urlpatterns = [
+    path('series/', CrimeSeriesView.as_view(), name='crime-series'),
+]
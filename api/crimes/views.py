@@ -0,0 +1,72 @@
+from django.db.models import Sum
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
+from api.coordinates.models import Coordinates
+from .models import MonthlyCrimeCount
+from .serializers import MonthlyCrimeSeriesSerializer
+
+DEFAULT_WINDOW = 3
+MAX_WINDOW = 24
+
+def _month_number(month):
+    """ Months since year 0, so consecutive months differ by 1. """
+    return month.year * 12 + month.month - 1
+
+def rolling_series(monthly_totals, window):
+    """
+    [(month, count)] sorted by month -> [{'month', 'count', 'rolling_total'}].
+    rolling_total sums the last `window` calendar months up to this one
+    (months without a row count as 0).
+    """
+    series = []
+    for i, (month, count) in enumerate(monthly_totals):
+        first = _month_number(month) - window + 1
+        rolling = sum(c for m, c in monthly_totals[max(0, i - window + 1):i + 1] if _month_number(m) >= first)
+        series.append({'month': month.strftime('%Y-%m'), 'count': count, 'rolling_total': rolling})
+    return series
+
+class CrimeSeriesView(APIView):
+    """
+    Monthly crime counts of one sector, read from the pre-aggregated
+    MonthlyCrimeCount rows (one index range scan, no crime points).
+    """
+    serializer_class = None
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name='sector', description='Postcode sector (e.g. RG1 1)', required=True, type=OpenApiTypes.STR),
+            OpenApiParameter(name='category', description='Only this crime type (e.g. Burglary)', required=False, type=OpenApiTypes.STR),
+            OpenApiParameter(name='window', description=f'Months of the rolling total (default {DEFAULT_WINDOW})', required=False, type=OpenApiTypes.INT),
+        ],
+        responses={200: MonthlyCrimeSeriesSerializer}
+    )
+    def get(self, request):
+        sector = request.query_params.get('sector')
+        category = request.query_params.get('category')
+        try:
+            window = int(request.query_params.get('window', DEFAULT_WINDOW))
+        except (TypeError, ValueError):
+            return Response({"error": "'window' must be a number of months"}, status=400)
+        if not 1 <= window <= MAX_WINDOW:
+            return Response({"error": f"'window' must be between 1 and {MAX_WINDOW}"}, status=400)
+
+        if not sector:
+            return Response({"error": "Please provide the 'sector' query parameter"}, status=400)
+        if not Coordinates.objects.filter(name=sector).exists():
+            return Response({"error": f"Unknown sector: {sector}"}, status=404)
+
+        rows = MonthlyCrimeCount.objects.filter(sector_id=sector)
+        if category:
+            rows = rows.filter(category_id=category)
+        monthly_totals = list(
+            rows.values('month').annotate(total=Sum('count')).order_by('month').values_list('month', 'total')
+        )
+
+        serializer = MonthlyCrimeSeriesSerializer({
+            'sector': sector,
+            'category': category,
+            'window': window,
+            'series': rolling_series(monthly_totals, window),
+        })
+        return Response(serializer.data)
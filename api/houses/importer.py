@@ -1,6 +1,26 @@
+import time
+import logging
 from datetime import datetime
+from django.db import transaction
+from api.coordinates.cache import sector_cache
 from api.houses.models import HouseSaleRecord, HouseFeatures, HouseAddress
-from api.utils import read_csv_generator
+from api.utils import read_csv_generator, read_csv_columns, delete_in_batches, open_source, resolve_csv_path
+from api.pipeline import parse_rows
+from api.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Rows written per transaction by the bulk load path
+BULK_CHUNK_SIZE = 2000
+# Price Paid columns read by the bulk path (town / district / county / URI are not stored)
+SALE_COLUMNS = ['unique_id', 'price_paid', 'deed_date', 'postcode', 'property_type', 'new_build',
+                'estate_type', 'saon', 'paon', 'street', 'locality', 'transaction_category']
+# Our exports use m/d/Y, Land Registry's own files 'YYYY-MM-DD 00:00'
+SALE_DATE_FORMATS = ('%m/%d/%Y', '%Y-%m-%d %H:%M', '%Y-%m-%d')
+
+def _clean_unique_id(value):
+    """ Land Registry's raw files write the id as '{GUID}': stored without the braces. """
+    return (value or '').strip().strip('{}')
 
 def get_or_create_address(row):
     """
@@ -68,4 +88,351 @@ def import_house_sales(file_path):
         if sales_created % 200 == 0:
             print(f"Processed {sales_created} records...")
 
-    print(f"Import completed. Total records processed: {sales_created}")
\ No newline at end of file
+    print(f"Import completed. Total records processed: {sales_created}")
+
+
+# ==========================================
+# Bulk Load Path
+# ==========================================
+
+def _parse_sale_row(row):
+    """
+    Parses the deed date of a CSV row.
+    Returns None if the row can't be imported (bad date / no id).
+    """
+    if not row.get('unique_id'):
+        return None
+    for date_format in SALE_DATE_FORMATS:
+        try:
+            return datetime.strptime(row['deed_date'], date_format).date()
+        except (ValueError, TypeError, KeyError):
+            continue
+    return None
+
+def _address_key(row):
+    """ Natural key used to dedupe addresses in memory. """
+    return (row['saon'], row['paon'], row['street'], row['locality'], row['postcode'])
+
+def _features_key(row):
+    """ Natural key used to dedupe feature combos in memory. """
+    return (row['property_type'], row['estate_type'], row['new_build'] == 'Y', row['transaction_category'])
+
+def _load_features_cache():
+    """
+    Maps every existing feature combo to its id (first one wins, as get_or_create would).
+    """
+    cache = {}
+    for pk, type_code, tenure_code, is_new_build, category in HouseFeatures.objects.order_by('id').values_list(
+        'id', 'type_code', 'tenure_code', 'is_new_build', 'transaction_category'
+    ):
+        cache.setdefault((type_code, tenure_code, is_new_build, category), pk)
+    return cache
+
+def _resolve_features(rows, features_cache):
+    """
+    Creates any feature combos of the chunk that are not in the cache yet.
+    """
+    missing = {_features_key(row) for row in rows} - features_cache.keys()
+    if not missing:
+        return
+
+    created = HouseFeatures.objects.bulk_create([
+        HouseFeatures(type_code=t, tenure_code=te, is_new_build=nb, transaction_category=c)
+        for t, te, nb, c in missing
+    ])
+    for obj in created:
+        features_cache[(obj.type_code, obj.tenure_code, obj.is_new_build, obj.transaction_category)] = obj.pk
+
+def _resolve_addresses(rows):
+    """
+    Returns {address_key: address_id} for every row of the chunk.
+    Existing addresses are looked up with one query (by postcode),
+    the rest are created with bulk_create.
+    Rows whose sector can't be resolved are left out of the map.
+    """
+    keys = {_address_key(row) for row in rows}
+    postcodes = {key[4] for key in keys}
+
+    address_ids = {}
+    for pk, *key in HouseAddress.objects.filter(postcode__in=postcodes).order_by('id').values_list(
+        'id', 'saon', 'paon', 'street', 'locality', 'postcode'
+    ):
+        address_ids.setdefault(tuple(key), pk)
+
+    # All new postcodes resolved to their sector in one call
+    new_keys = keys - address_ids.keys()
+    sectors = sector_cache.resolve_many(key[4] for key in new_keys)
+
+    new_addresses = []
+    for saon, paon, street, locality, postcode in new_keys:
+        sector_name = sectors[postcode]
+        if sector_name is None:
+            continue
+        new_addresses.append(HouseAddress(
+            saon=saon, paon=paon, street=street, locality=locality,
+            postcode=postcode, postcode_sector_id=sector_name
+        ))
+
+    # bulk_create skips HouseAddress.save(), so the sector is assigned above
+    for obj in HouseAddress.objects.bulk_create(new_addresses):
+        address_ids[(obj.saon, obj.paon, obj.street, obj.locality, obj.postcode)] = obj.pk
+    return address_ids
+
+SALE_UPDATE_FIELDS = ['price_paid', 'deed_date', 'address', 'features']
+
+def _write_sale_chunk(chunk, features_cache, update_existing=False):
+    """
+    Writes one chunk of {unique_id: (row, deed_date)} in a single transaction.
+    With update_existing, sales already in the database are overwritten
+    instead of skipped. Sales whose postcode has no imported sector are
+    rejected (and logged), as HouseAddress.save() would.
+    Returns (written, skipped, rejected).
+    """
+    # One set-based check for sales that are already in the database
+    existing_ids = set()
+    if not update_existing:
+        existing_ids = set(
+            HouseSaleRecord.objects.filter(unique_id__in=chunk.keys()).values_list('unique_id', flat=True)
+        )
+    pending = [(row, deed_date) for uid, (row, deed_date) in chunk.items() if uid not in existing_ids]
+    if not pending:
+        return 0, len(chunk), 0
+
+    with transaction.atomic():
+        address_ids = _resolve_addresses([row for row, _ in pending])
+        rejected = [row for row, _ in pending if _address_key(row) not in address_ids]
+        if rejected:
+            examples = ', '.join(f"{row['unique_id']} ({row['postcode']})" for row in rejected[:5])
+            logger.warning(f"Rejected {len(rejected)} sales with an invalid postcode or unknown sector: {examples}")
+        pending = [(row, deed_date) for row, deed_date in pending if _address_key(row) in address_ids]
+        _resolve_features([row for row, _ in pending], features_cache)
+
+        sales = []
+        for row, deed_date in pending:
+            sales.append(HouseSaleRecord(
+                unique_id=row['unique_id'],
+                price_paid=row['price_paid'],
+                deed_date=deed_date,
+                address_id=address_ids[_address_key(row)],
+                features_id=features_cache[_features_key(row)],
+            ))
+        if update_existing:
+            HouseSaleRecord.objects.bulk_create(
+                sales,
+                update_conflicts=True,
+                unique_fields=['unique_id'],
+                update_fields=SALE_UPDATE_FIELDS,
+            )
+        else:
+            HouseSaleRecord.objects.bulk_create(sales)
+
+    return len(sales), len(chunk) - len(sales) - len(rejected), len(rejected)
+
+def bulk_import_house_sales(file_path, chunk_size=BULK_CHUNK_SIZE, row_filter=None, update_existing=False,
+                            workers=None, checkpoint=None):
+    """
+    Batched version of import_house_sales for large files.
+    - Rows are parsed by `workers` processes (see api.pipeline.parse_rows)
+    - Dedupes addresses and feature combos in memory
+    - Skips unique_ids that already exist (or updates them with update_existing)
+    - An id repeated in the file is handled the same way: the first row
+      wins, or the last one with update_existing (whichever chunk it's in)
+    - Counts and logs the sales rejected for an unknown postcode sector
+    - Writes each chunk with bulk_create inside one transaction
+    row_filter (e.g. RowChangeTracker.filter) can drop unchanged rows.
+    checkpoint (api.imports.incremental.Checkpoint) skips the rows committed
+    by a failed run and records the offset with every chunk.
+    Returns the number of sale records written.
+    """
+    start = time.perf_counter()
+    features_cache = _load_features_cache()
+
+    created = 0
+    skipped = 0
+    rejected = 0
+    chunk = {}
+
+    parse = metrics.stats('parse')
+
+    def flush():
+        nonlocal created, skipped, rejected
+        with transaction.atomic(), metrics.phase('write') as write:
+            chunk_created, chunk_skipped, chunk_rejected = _write_sale_chunk(chunk, features_cache, update_existing)
+            if checkpoint:
+                checkpoint.commit()
+            write.written += chunk_created
+            write.skipped += chunk_skipped + chunk_rejected
+        created += chunk_created
+        skipped += chunk_skipped
+        rejected += chunk_rejected
+        chunk.clear()
+        logger.info(f"Processed {created + skipped + rejected} records...")
+
+    rows = parse_rows(file_path, SALE_COLUMNS, _parse_sale_row, row_filter=row_filter, workers=workers)
+    if checkpoint:
+        rows = checkpoint.skip(rows)
+    for row, deed_date in parse.track(rows):
+        if deed_date is None:
+            skipped += 1
+            parse.skipped += 1
+            continue
+        row['unique_id'] = _clean_unique_id(row['unique_id'])
+
+        # Duplicate ids inside the chunk follow the rule of the ones in the
+        # database (an earlier chunk): kept, or overwritten with update_existing
+        if row['unique_id'] in chunk:
+            skipped += 1
+            parse.skipped += 1
+            if not update_existing:
+                continue
+        chunk[row['unique_id']] = (row, deed_date)
+
+        if len(chunk) >= chunk_size:
+            flush()
+
+    if chunk:
+        flush()
+
+    elapsed = time.perf_counter() - start
+    rate = (created + skipped + rejected) / elapsed if elapsed > 0 else 0
+    print(
+        f"Import completed. Total records created: {created}, skipped: {skipped}, "
+        f"rejected (unknown postcode sector): {rejected} in {elapsed:.1f}s ({rate:.0f} rows/sec)"
+    )
+    return created
+
+def _sale_address_ids(unique_ids, batch_size=900):
+    """ Addresses currently used by the given sales. """
+    unique_ids = list(unique_ids)
+    address_ids = set()
+    for i in range(0, len(unique_ids), batch_size):
+        address_ids.update(
+            HouseSaleRecord.objects.filter(unique_id__in=unique_ids[i:i + batch_size])
+            .values_list('address_id', flat=True)
+        )
+    return address_ids
+
+def _delete_orphan_addresses(address_ids):
+    """ Deletes those of the given addresses that have no sale left. """
+    return delete_in_batches(HouseAddress.objects.filter(sales__isnull=True), 'id', address_ids)
+
+def delete_house_sales(unique_ids):
+    """
+    Removes sales that disappeared from the source file,
+    and the addresses left without any sale.
+    Returns (sales deleted, addresses deleted).
+    """
+    unique_ids = [_clean_unique_id(unique_id) for unique_id in unique_ids]
+    with transaction.atomic():
+        address_ids = _sale_address_ids(unique_ids)
+        deleted = delete_in_batches(HouseSaleRecord.objects.all(), 'unique_id', unique_ids)
+        return deleted, _delete_orphan_addresses(address_ids)
+
+
+# ==========================================
+# Monthly Change Files (A / C / D)
+# ==========================================
+
+# Land Registry's monthly update files: no header, official column order (PAON before SAON)
+PPD_COLUMNS = ['unique_id', 'price_paid', 'deed_date', 'postcode', 'property_type', 'new_build',
+               'estate_type', 'paon', 'saon', 'street', 'locality', 'town', 'district', 'county',
+               'transaction_category', 'record_status']
+DELTA_ADD = 'A'
+DELTA_CHANGE = 'C'
+DELTA_DELETE = 'D'
+
+def read_delta_rows(file_path):
+    """
+    Yields the rows of a change file as dicts of SALE_COLUMNS + record_status.
+    Accepts the raw headerless Land Registry file, or a file with our
+    own header plus a record_status column.
+    """
+    full_path = resolve_csv_path(file_path, "")
+    with open_source(full_path) as f:
+        has_header = f.readline().lower().startswith('unique_id')
+
+    columns = SALE_COLUMNS + ['record_status']
+    for values in read_csv_columns(full_path, columns, folder="", fieldnames=None if has_header else PPD_COLUMNS):
+        yield dict(zip(columns, values))
+
+def _apply_delta_chunk(chunk, features_cache):
+    """
+    Applies one chunk of {unique_id: (status, row, deed_date)} in a single transaction:
+    A / C rows are upserted, D rows deleted, then the addresses that lost
+    their last sale (deleted, or moved by a change) are removed.
+    Returns (upserted, deleted, orphans removed, skipped).
+    """
+    upserts = {uid: (row, deed_date) for uid, (status, row, deed_date) in chunk.items() if status != DELTA_DELETE}
+    deletes = [uid for uid, (status, _, _) in chunk.items() if status == DELTA_DELETE]
+
+    with transaction.atomic():
+        # Addresses of the touched sales before the change
+        candidates = _sale_address_ids(chunk.keys())
+
+        upserted, skipped = 0, 0
+        if upserts:
+            # Rejected sales (unknown postcode sector) are logged there and count as skipped
+            upserted, skipped, rejected = _write_sale_chunk(upserts, features_cache, update_existing=True)
+            skipped += rejected
+        deleted = delete_in_batches(HouseSaleRecord.objects.all(), 'unique_id', deletes)
+        orphans = _delete_orphan_addresses(candidates)
+
+    return upserted, deleted, orphans, skipped
+
+def apply_house_sales_delta(file_path, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Applies a Land Registry monthly change file on top of the current data:
+    - A (add) / C (change): upserted on unique_id
+    - D (delete): removed
+    - addresses left without any sale are cleaned up
+    Each chunk is applied with set-based statements in one transaction.
+    A unique_id repeated in the file: the last record wins.
+    Returns a dict of counts.
+    """
+    start = time.perf_counter()
+    features_cache = _load_features_cache()
+
+    totals = {'upserted': 0, 'deleted': 0, 'orphan_addresses': 0, 'skipped': 0}
+    chunk = {}
+
+    parse = metrics.stats('parse')
+
+    def flush():
+        with metrics.phase('write') as write:
+            upserted, deleted, orphans, skipped = _apply_delta_chunk(chunk, features_cache)
+            write.written += upserted + deleted
+            write.skipped += skipped
+        totals['upserted'] += upserted
+        totals['deleted'] += deleted
+        totals['orphan_addresses'] += orphans
+        totals['skipped'] += skipped
+        chunk.clear()
+        logger.info(f"Processed {sum(totals.values())} records...")
+
+    for row in parse.track(read_delta_rows(file_path)):
+        row['unique_id'] = _clean_unique_id(row['unique_id'])
+        status = row['record_status'].upper()
+        deed_date = None
+        if status in (DELTA_ADD, DELTA_CHANGE):
+            deed_date = _parse_sale_row(row)
+
+        if not row['unique_id'] or status not in (DELTA_ADD, DELTA_CHANGE, DELTA_DELETE) \
+                or (status != DELTA_DELETE and deed_date is None):
+            totals['skipped'] += 1
+            parse.skipped += 1
+            continue
+        chunk[row['unique_id']] = (status, row, deed_date)
+
+        if len(chunk) >= chunk_size:
+            flush()
+
+    if chunk:
+        flush()
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"Delta applied: {totals['upserted']} upserted, {totals['deleted']} deleted, "
+        f"{totals['orphan_addresses']} orphan addresses removed, {totals['skipped']} skipped "
+        f"in {elapsed:.1f}s"
+    )
+    return totals
@@ -43,7 +43,7 @@ class HouseAddress(models.Model):
     paon = models.CharField(max_length=255, verbose_name="Primary Address") # e.g. 17 - 19 / COX HOLLOW etc
     street = models.CharField(max_length=255) # e.g. VALPY STREET / SOUTHCOTE ROAD etc
     locality = models.CharField(max_length=255, blank=True, null=True) # e.g. WHITLEY WOOD /TILEHURST etc
-    postcode = models.CharField(max_length=20) # e.g. RG1 1AR/RG30 2LA etc
+    postcode = models.CharField(max_length=20, db_index=True) # e.g. RG1 1AR/RG30 2LA etc
     
     # LINK to postcode_sector Coordinate (use postcode is too large)
     postcode_sector = models.ForeignKey(
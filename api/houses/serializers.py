@@ -1,5 +1,7 @@
+from django.db import models
 from rest_framework import serializers
 from api.houses.models import HouseSaleRecord, HouseAddress, HouseFeatures
+from api.coordinates.models import SectorSummary
 from api.crimes.serializers import SectorCrimeStatSerializer
 from api.schools.serializers import SchoolSerializer
 from drf_spectacular.utils import extend_schema_field
@@ -21,6 +23,60 @@ class HouseFeaturesSerializer(serializers.ModelSerializer):
         model = HouseFeatures
         fields = '__all__'
 
+class SectorMetrics:
+    """
+    The heavy per-sector lists of the detail view (crime stats, schools with
+    their results, bus stops with their routes), loaded for every sector of
+    a page in one batch: a fixed number of queries, whatever the page size.
+    Rows of the same sector share them.
+    The summaries (totals, counts, names) come from SectorSummary instead.
+    """
+    def __init__(self, sector_ids):
+        from api.crimes.models import SectorCrimeStat
+        from api.schools.models import School
+        from api.transports.models import TransportStop
+
+        self.sectors = set(sector_ids)
+        sector_ids = {sector_id for sector_id in self.sectors if sector_id}
+        self.crime_stats = {}
+        self.schools = {}
+        self.bus_stops = {}
+        if not sector_ids:
+            return
+
+        for stat in SectorCrimeStat.objects.filter(sector__in=sector_ids).select_related('category'):
+            self.crime_stats.setdefault(stat.sector_id, []).append(stat)
+
+        stops = TransportStop.objects.filter(nearest_sector__in=sector_ids).prefetch_related('routes')
+        for stop in stops:
+            self.bus_stops.setdefault(stop.nearest_sector_id, []).append(stop)
+
+        schools = School.objects.filter(postcode_sector__in=sector_ids).prefetch_related(
+            'ks2_results', 'ks4_results', 'ks5_results'
+        )
+        for school in schools:
+            self.schools.setdefault(school.postcode_sector_id, []).append(school)
+
+
+class HouseSaleListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        """ Loads the detail lists of the whole page (when shown) before the rows are serialized. """
+        items = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        if not self.child.is_list_view():
+            self.child.sector_metrics = SectorMetrics(sale_sector_id(item) for item in items)
+        return super().to_representation(items)
+
+
+def sale_sector_id(sale):
+    address = sale.address
+    return address.postcode_sector_id if address else None
+
+def sale_summary(sale):
+    """ The SectorSummary of the sale's sector (empty without a sector). """
+    sector = sale.address.postcode_sector if sale.address else None
+    return sector.sector_summary if sector else SectorSummary()
+
+
 class HouseSaleSerializer(serializers.ModelSerializer):
     # Use the nested serializers for the ForeignKey fields
     address = HouseAddressSerializer()
@@ -31,7 +87,7 @@ class HouseSaleSerializer(serializers.ModelSerializer):
     nearby_schools = serializers.SerializerMethodField()
     nearby_bus_stops = serializers.SerializerMethodField()
     
-    # Lightweight Summaries (List View & Detail View)
+    # Lightweight Summaries (List View & Detail View), from SectorSummary
     total_crimes = serializers.SerializerMethodField()
     crime_rate = serializers.SerializerMethodField()
     total_bus_stops = serializers.SerializerMethodField()
@@ -39,6 +95,7 @@ class HouseSaleSerializer(serializers.ModelSerializer):
     class Meta:
         model = HouseSaleRecord
         fields = '__all__'
+        list_serializer_class = HouseSaleListSerializer
 
     def __init__(self, *args, **kwargs):
         """
@@ -46,144 +103,69 @@ class HouseSaleSerializer(serializers.ModelSerializer):
         only want the heavy crime stats when viewing a SINGLE house
         """
         super().__init__(*args, **kwargs)
-        
+        # Detail lists, shared by the rows of a page (see SectorMetrics)
+        self.sector_metrics = None
+
+        if self.is_list_view():
+            # LIST VIEW: Remove heavy lists, keep summaries
+            self.fields.pop('area_crime_stats', None)
+            # self.fields.pop('nearby_schools', None)
+            # We also remove bus stop count from list to keep it fast
+            self.fields.pop('nearby_bus_stops', None)
+
+    def is_list_view(self):
         # Get the current view action (e.g., 'list', 'retrieve', 'create')
         view = self.context.get('view')
-        if view and hasattr(view, 'action'):        
-            if view.action == 'list':
-                # LIST VIEW: Remove heavy lists, keep summaries
-                self.fields.pop('area_crime_stats', None)
-                # self.fields.pop('nearby_schools', None)
-                # We also remove bus stop count from list to keep it fast
-                self.fields.pop('nearby_bus_stops', None)
-
-    @extend_schema_field(SchoolSerializer(many=True))
+        return bool(view and getattr(view, 'action', None) == 'list')
+
+    def metrics(self, obj):
+        """ The SectorMetrics holding obj's sector, loaded on its own for a single sale. """
+        sector_id = sale_sector_id(obj)
+        if self.sector_metrics is None or sector_id not in self.sector_metrics.sectors:
+            self.sector_metrics = SectorMetrics([sector_id])
+        return self.sector_metrics
+
+    @extend_schema_field(SectorCrimeStatSerializer(many=True))
     def get_area_crime_stats(self, obj):
-        try:
-            # Get the sector from the house address
-            sector = obj.address.postcode_sector
-            
-            if sector:
-                # Import the model here to be safe from circular import errors
-                from api.crimes.models import SectorCrimeStat
-                
-                # Find all stats for this sector (e.g. Burglary: 5, Anti-social: 10)
-                stats = SectorCrimeStat.objects.filter(sector=sector)                
-                # Serialize the list of stats
-                return SectorCrimeStatSerializer(stats, many=True).data
-                
-        except AttributeError:
-            return []
-        return []
+        stats = self.metrics(obj).crime_stats.get(sale_sector_id(obj), [])
+        return SectorCrimeStatSerializer(stats, many=True).data
     
     @extend_schema_field(dict)
     def get_nearby_schools(self, obj):
-        try:
-            sector = obj.address.postcode_sector
-            if not sector:
-                return []
-
-            # Determine if we are in List or Detail view
-            view = self.context.get('view')
-            is_list_view = view and view.action == 'list'
-
-            # Define the base query (Lazy - doesn't run yet)
-            from api.schools.models import School
-            schools_qs = School.objects.filter(postcode_sector=sector)
-
-            if is_list_view:
-                # OPTIMIZATION: Only fetch the 'name' column. 
-                # Returns: ["Reading School", "Kendrick School"]
-                return list(schools_qs.values_list('name', flat=True))
-            
-            else:
-                # DETAIL VIEW: Use the full serializer
-                # Returns: [{ "name": "Reading School", "urn": "123", ... }]
-                return SchoolSerializer(schools_qs, many=True).data
-
-        except AttributeError:
-            pass
-        return []    
+        if self.is_list_view():
+            # Only the names: ["Reading School", "Kendrick School"]
+            return sale_summary(obj).school_names
+        # DETAIL VIEW: Use the full serializer
+        return SchoolSerializer(self.metrics(obj).schools.get(sale_sector_id(obj), []), many=True).data
     
     @extend_schema_field(int)
     def get_total_bus_stops(self, obj):
         """Count of bus stops in this sector"""
-        try:
-            sector = obj.address.postcode_sector
-            if sector:
-                from api.transports.models import TransportStop
-                return TransportStop.objects.filter(nearest_sector=sector).count()
-        except (AttributeError, ImportError):
-            pass
-        return 0
+        return sale_summary(obj).bus_stop_count
 
     @extend_schema_field(list)
     def get_nearby_bus_stops(self, obj):
-        try:
-            sector = obj.address.postcode_sector
-            if not sector:
-                return []
-
-            from api.transports.models import TransportStop
-            # Use prefetch_related to load routes efficiently
-            stops = TransportStop.objects.filter(
-                nearest_sector=sector
-            ).prefetch_related('routes')
-
-            data = []
-            for stop in stops:
-                data.append({
-                    "stop_name": stop.name,
-                    "stop_id": stop.stop_id,
-                    "routes": [r.name for r in stop.routes.all()]
-                })
-            return data
-
-        except (AttributeError, ImportError):
-            pass
-        return []
+        return [
+            {
+                "stop_name": stop.name,
+                "stop_id": stop.stop_id,
+                "routes": [r.name for r in stop.routes.all()]
+            }
+            for stop in self.metrics(obj).bus_stops.get(sale_sector_id(obj), [])
+        ]
 
     @extend_schema_field(int)
     def get_total_crimes(self, obj):
         """
-        Finds the specific row where category='total_crimes' and returns its count.
+        The count of the sector's 'total_crimes' row
         (precalculated from the csv)
         """
-        try:
-            sector = obj.address.postcode_sector
-            if sector:
-                from api.crimes.models import SectorCrimeStat
-                
-                # FIX: Don't use Sum(). Just find the specific "total_crimes" row.
-                stat = SectorCrimeStat.objects.filter(
-                    sector=sector, 
-                    category__name='total_crimes'
-                ).first()
-                
-                return stat.count if stat else 0
-                
-        except (AttributeError, ImportError):
-            pass
-        return 0    
+        return sale_summary(obj).total_crimes
     
     @extend_schema_field(float)
     def get_crime_rate(self, obj):
         """Crimes per 1,000 households"""
-        try:
-            sector = obj.address.postcode_sector
-            if sector:
-                # 1. Get Crime Count
-                total_crimes = self.get_total_crimes(obj)
-                
-                # 2. Get House Count (Assuming 'households' exists on Coordinates model)
-                # If your Coordinate model doesn't have households, default to 1 to avoid ZeroDivision
-                house_count = getattr(sector, 'households', 0)
-                
-                if house_count > 0:
-                    return round((total_crimes / house_count) * 1000, 2)
-        except AttributeError:
-            pass
-        return 0.0
+        return sale_summary(obj).crime_rate
 
     def update(self, instance, validated_data):
         """
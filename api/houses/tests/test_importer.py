@@ -1,6 +1,12 @@
+import os
+import csv
+import tempfile
 from django.test import TestCase
+from django.conf import settings
 from unittest.mock import patch, MagicMock, mock_open
-from api.houses.importer import import_house_sales
+from api.coordinates.models import Coordinates
+from api.houses.models import HouseSaleRecord, HouseAddress, HouseFeatures
+from api.houses.importer import import_house_sales, bulk_import_house_sales, apply_house_sales_delta
 
 class HouseImporterTestCase(TestCase):
     @patch('builtins.print') 
@@ -56,4 +62,140 @@ class HouseImporterTestCase(TestCase):
         self.assertEqual(row_data_2['unique_id'], '402A3A66-AF1F-A7DF-E063-4804A8C0B80D')
         self.assertEqual(row_data_2['price_paid'], '1265000')
         self.assertEqual(row_data_2['property_type'], 'O')
-        self.assertEqual(row_data_2['transaction_category'], 'B')
\ No newline at end of file
+        self.assertEqual(row_data_2['transaction_category'], 'B')
+
+class BulkHouseImporterTest(TestCase):
+    HEADERS = ['unique_id', 'price_paid', 'deed_date', 'postcode', 'property_type', 'new_build',
+               'estate_type', 'saon', 'paon', 'street', 'locality', 'transaction_category']
+
+    def setUp(self):
+        Coordinates.objects.create(name="RG1 1")
+
+        self.filename = "test_bulk_house_sales.csv"
+        self.data_path = os.path.join(settings.BASE_DIR, 'data', self.filename)
+        os.makedirs(os.path.dirname(self.data_path), exist_ok=True)
+
+        with open(self.data_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.HEADERS)
+            # Two sales of the same flat -> one address, one feature combo
+            writer.writerow(['SALE-1', '135740', '7/18/2024', 'RG1 1EQ', 'F', 'N', 'L', 'FLAT 29', 'ICON HOUSE', 'MERCHANTS PLACE', '', 'A'])
+            writer.writerow(['SALE-2', '150000', '8/01/2024', 'RG1 1EQ', 'F', 'N', 'L', 'FLAT 29', 'ICON HOUSE', 'MERCHANTS PLACE', '', 'A'])
+            # Duplicate id in the file: first one wins (the last one with update_existing)
+            writer.writerow(['SALE-1', '999999', '7/18/2024', 'RG1 1EQ', 'F', 'N', 'L', 'FLAT 29', 'ICON HOUSE', 'MERCHANTS PLACE', '', 'A'])
+            # Bad date and unknown sector are skipped
+            writer.writerow(['SALE-3', '200000', 'not-a-date', 'RG1 1AA', 'D', 'N', 'F', '', '1', 'HIGH STREET', '', 'A'])
+            writer.writerow(['SALE-4', '300000', '1/02/2024', 'ZZ99 9ZZ', 'D', 'N', 'F', '', '2', 'NOWHERE', '', 'A'])
+            writer.writerow(['SALE-5', '450000', '3/22/2024', 'RG1 1AF', 'D', 'Y', 'F', '', '21', 'VALPY STREET', '', 'B'])
+
+    def tearDown(self):
+        if os.path.exists(self.data_path):
+            os.remove(self.data_path)
+
+    @patch('builtins.print')
+    def test_bulk_import_dedupes_and_links(self, mock_print):
+        created = bulk_import_house_sales(self.filename, chunk_size=2)
+
+        self.assertEqual(created, 3)
+        self.assertEqual(HouseSaleRecord.objects.count(), 3)
+        self.assertEqual(HouseAddress.objects.count(), 2)
+        self.assertEqual(HouseFeatures.objects.count(), 2)
+
+        sale = HouseSaleRecord.objects.get(unique_id='SALE-1')
+        self.assertEqual(sale.price_paid, 135740)
+        # bulk_create skips save(), the sector must still be linked
+        self.assertEqual(sale.address.postcode_sector_id, 'RG1 1')
+        self.assertTrue(HouseSaleRecord.objects.get(unique_id='SALE-5').features.is_new_build)
+
+    @patch('builtins.print')
+    def test_bulk_import_update_existing_keeps_the_last_duplicate(self, mock_print):
+        # Within one chunk or across chunks, like an id already in the database
+        for chunk_size in (10, 2):
+            bulk_import_house_sales(self.filename, chunk_size=chunk_size, update_existing=True)
+            self.assertEqual(HouseSaleRecord.objects.get(unique_id='SALE-1').price_paid, 999999)
+            HouseSaleRecord.objects.all().delete()
+
+    def test_bulk_import_counts_and_logs_rejected_sales(self):
+        with patch('builtins.print') as mock_print, self.assertLogs('api.houses.importer', 'WARNING') as logs:
+            bulk_import_house_sales(self.filename)
+
+        self.assertIn('SALE-4 (ZZ99 9ZZ)', logs.output[0])
+        self.assertIn('rejected (unknown postcode sector): 1', mock_print.call_args[0][0])
+
+    @patch('builtins.print')
+    def test_bulk_import_skips_existing_ids(self, mock_print):
+        bulk_import_house_sales(self.filename)
+
+        # Re-running the same file creates nothing new
+        created = bulk_import_house_sales(self.filename)
+
+        self.assertEqual(created, 0)
+        self.assertEqual(HouseSaleRecord.objects.count(), 3)
+        self.assertEqual(HouseAddress.objects.count(), 2)
+
+class HouseDeltaTest(TestCase):
+    """ Land Registry monthly change files (raw headerless layout) """
+    def setUp(self):
+        Coordinates.objects.create(name="RG1 1")
+        self.tmp = tempfile.NamedTemporaryFile('w', suffix='.csv', newline='', delete=False)
+        self.tmp.close()
+
+    def tearDown(self):
+        os.remove(self.tmp.name)
+
+    def apply(self, rows):
+        # Official order: ..., paon, saon, street, ..., category, record status
+        with open(self.tmp.name, 'w', newline='') as f:
+            writer = csv.writer(f)
+            for uid, price, postcode, paon, status in rows:
+                writer.writerow([uid, price, '2024-07-18 00:00', postcode, 'T', 'N', 'F', paon, '', 'HIGH STREET',
+                                 '', 'READING', 'READING', 'READING', 'A', status])
+        with patch('builtins.print'):
+            return apply_house_sales_delta(self.tmp.name)
+
+    def test_add_change_delete(self):
+        self.apply([
+            ('SALE-1', '100000', 'RG1 1AA', '1', 'A'),
+            ('SALE-2', '200000', 'RG1 1AA', '2', 'A'),
+        ])
+        self.assertEqual(HouseSaleRecord.objects.count(), 2)
+
+        totals = self.apply([
+            # Price and address corrected: the old address is left without sales
+            ('SALE-1', '110000', 'RG1 1AA', '1A', 'C'),
+            ('SALE-2', '', '', '', 'D'),
+            ('SALE-3', '300000', 'RG1 1AB', '3', 'A'),
+            ('SALE-4', '400000', 'RG1 1AB', '4', 'X'),
+        ])
+
+        self.assertEqual(totals, {'upserted': 2, 'deleted': 1, 'orphan_addresses': 2, 'skipped': 1})
+        sale = HouseSaleRecord.objects.get(unique_id='SALE-1')
+        self.assertEqual(sale.price_paid, 110000)
+        self.assertEqual(sale.address.paon, '1A')
+        self.assertFalse(HouseSaleRecord.objects.filter(unique_id='SALE-2').exists())
+        self.assertEqual(set(HouseAddress.objects.values_list('paon', flat=True)), {'1A', '3'})
+
+    def test_shared_address_is_kept(self):
+        self.apply([
+            ('SALE-1', '100000', 'RG1 1AA', '1', 'A'),
+            ('SALE-2', '120000', 'RG1 1AA', '1', 'A'),
+        ])
+        totals = self.apply([('SALE-1', '', '', '', 'D')])
+
+        self.assertEqual(totals['orphan_addresses'], 0)
+        self.assertEqual(HouseAddress.objects.count(), 1)
+
+    def test_braced_ids_match_the_bulk_import(self):
+        # The bulk import stores ids without the braces of the raw files
+        self.apply([('SALE-1', '100000', 'RG1 1AA', '1', 'A')])
+
+        totals = self.apply([
+            ('{SALE-1}', '110000', 'RG1 1AA', '1', 'C'),
+            ('{SALE-2}', '200000', 'RG1 1AA', '2', 'A'),
+        ])
+        self.assertEqual(totals['upserted'], 2)
+        self.assertEqual(set(HouseSaleRecord.objects.values_list('unique_id', flat=True)), {'SALE-1', 'SALE-2'})
+        self.assertEqual(HouseSaleRecord.objects.get(unique_id='SALE-1').price_paid, 110000)
+
+        self.apply([('{SALE-2}', '', '', '', 'D')])
+        self.assertFalse(HouseSaleRecord.objects.filter(unique_id='SALE-2').exists())
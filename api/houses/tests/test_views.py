@@ -0,0 +1,96 @@
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from api.coordinates.models import Coordinates, SectorSummary
+from api.coordinates.summary import refresh_sector_summaries
+from api.crimes.models import CrimeCategory, SectorCrimeStat
+from api.houses.models import HouseSaleRecord, HouseAddress, HouseFeatures
+from api.schools.models import School
+from api.transports.models import BusRoute, TransportStop
+
+
+class HouseSaleViewQueryTest(APITestCase):
+    """ The list and detail run a fixed number of queries, whatever the page size. """
+    def setUp(self):
+        self.sectors = [
+            Coordinates.objects.create(name="RG1 1", households=100, total_crimes=40),
+            Coordinates.objects.create(name="RG2 2", households=0, total_crimes=7),
+        ]
+        total = CrimeCategory.objects.create(name='total_crimes')
+        burglary = CrimeCategory.objects.create(name='Burglary')
+        SectorCrimeStat.objects.create(sector=self.sectors[0], category=total, count=40)
+        SectorCrimeStat.objects.create(sector=self.sectors[0], category=burglary, count=12)
+        SectorCrimeStat.objects.create(sector=self.sectors[1], category=total, count=7)
+
+        route = BusRoute.objects.create(name='17')
+        for i, sector in enumerate([self.sectors[0], self.sectors[0], self.sectors[1]]):
+            stop = TransportStop.objects.create(
+                stop_id=f'S{i}', name=f'Stop {i}', latitude=51.45, longitude=-0.97, nearest_sector=sector)
+            stop.routes.add(route)
+
+        School.objects.create(name='Reading School', urn='1', postcode='RG1 1AA')
+        self.features = HouseFeatures.objects.create(type_code='T', tenure_code='F')
+
+    def add_sales(self, count):
+        for i in range(count):
+            postcode = 'RG1 1AA' if i % 2 else 'RG2 2BB'
+            address = HouseAddress.objects.create(paon=str(i), street='HIGH ST', postcode=postcode)
+            HouseSaleRecord.objects.create(
+                unique_id=f'{{{HouseSaleRecord.objects.count()}}}', price_paid=100000 + i,
+                deed_date='2024-01-15', address=address, features=self.features,
+            )
+        refresh_sector_summaries()
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.data
+
+    def test_list_queries_do_not_grow_with_page_size(self):
+        self.add_sales(2)
+        small, _ = self.count_queries(reverse('house-sale-list'))
+        self.add_sales(20)
+        large, data = self.count_queries(reverse('house-sale-list'))
+
+        # count + page (summaries are joined in)
+        self.assertEqual(small, 2)
+        self.assertEqual(large, small)
+
+        rows = {row['address']['postcode']: row for row in data['results']}
+        self.assertEqual(rows['RG1 1AA']['total_crimes'], 40)
+        self.assertEqual(rows['RG1 1AA']['crime_rate'], 400.0)
+        self.assertEqual(rows['RG1 1AA']['total_bus_stops'], 2)
+        self.assertEqual(rows['RG1 1AA']['nearby_schools'], ['Reading School'])
+        self.assertEqual(rows['RG2 2BB']['total_crimes'], 7)
+        self.assertEqual(rows['RG2 2BB']['crime_rate'], 0.0)
+        self.assertEqual(rows['RG2 2BB']['nearby_schools'], [])
+
+    def test_detail_queries_are_fixed(self):
+        self.add_sales(2)
+        sale = HouseSaleRecord.objects.get(address__postcode='RG1 1AA')
+        queries, data = self.count_queries(reverse('house-sale-detail', args=[sale.unique_id]))
+
+        # sale + crime stats + stops + their routes + schools + their KS2 / KS4 / KS5 results
+        self.assertEqual(queries, 8)
+        self.assertEqual(data['total_crimes'], 40)
+        self.assertEqual(data['total_bus_stops'], 2)
+        self.assertEqual(
+            sorted((stat['category'], stat['count']) for stat in data['area_crime_stats']),
+            [('Burglary', 12), ('total_crimes', 40)],
+        )
+        self.assertEqual([stop['routes'] for stop in data['nearby_bus_stops']], [['17'], ['17']])
+        self.assertEqual(data['nearby_schools'][0]['name'], 'Reading School')
+
+    def test_writes_refresh_the_sector_summary(self):
+        self.add_sales(2)
+        sale = HouseSaleRecord.objects.get(address__postcode='RG1 1AA')
+        response = self.client.patch(
+            reverse('house-sale-detail', args=[sale.unique_id]), {'price_paid': 500000}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(SectorSummary.objects.get(sector='RG1 1').average_price, 500000)
+
+        self.client.delete(reverse('house-sale-detail', args=[sale.unique_id]))
+        self.assertEqual(SectorSummary.objects.get(sector='RG1 1').sale_count, 0)
@@ -1,13 +1,36 @@
 from rest_framework import viewsets
 from django_filters.rest_framework import DjangoFilterBackend
+from api.coordinates.summary import refresh_sector_summaries
 from api.houses.models import HouseSaleRecord
-from api.houses.serializers import HouseSaleSerializer
+from api.houses.serializers import HouseSaleSerializer, sale_sector_id
 
-from api.houses.filters import HouseSaleFilter 
+from api.houses.filters import HouseSaleFilter
 
 class HouseSaleViewSet(viewsets.ModelViewSet):
-    queryset = HouseSaleRecord.objects.all().order_by('-deed_date')
+    # Address, sector, its summary and features come with the sale in one join;
+    # the detail lists are batched by the serializer (see SectorMetrics)
+    queryset = HouseSaleRecord.objects.select_related(
+        'address', 'address__postcode_sector', 'address__postcode_sector__summary', 'features'
+    ).order_by('-deed_date')
     serializer_class = HouseSaleSerializer
-    
+
     filter_backends = [DjangoFilterBackend]
-    filterset_class = HouseSaleFilter
\ No newline at end of file
+    filterset_class = HouseSaleFilter
+
+    # --- Writes keep the sector summaries (prices, sale counts) up to date ---
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        refresh_sector_summaries([sale_sector_id(serializer.instance)])
+        serializer.instance = self.get_queryset().get(pk=serializer.instance.pk)
+
+    def perform_update(self, serializer):
+        old_sector = sale_sector_id(serializer.instance)
+        super().perform_update(serializer)
+        refresh_sector_summaries([old_sector, sale_sector_id(serializer.instance)])
+        # Reload so the response shows the refreshed summary
+        serializer.instance = self.get_queryset().get(pk=serializer.instance.pk)
+
+    def perform_destroy(self, instance):
+        sector = sale_sector_id(instance)
+        super().perform_destroy(instance)
+        refresh_sector_summaries([sector])
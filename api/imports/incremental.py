@@ -0,0 +1,268 @@
+import os
+import json
+import hashlib
+from django.db import transaction
+from django.db.models import F
+from api.imports.models import SourceFile, RowFingerprint, ImportCheckpoint
+from api.scheduler import SKIPPED
+from api.utils import delete_in_batches, split_archive_path, source_signature
+from api.metrics import metrics
+
+# ===== File Manifest =====
+def file_fingerprint(path, block_size=1024 * 1024):
+    """
+    Returns {'size', 'mtime', 'sha256'} of a file, hashing it in 1 MB blocks.
+    For a zip member ('feed.zip!stops.txt') the whole archive is fingerprinted.
+    """
+    path = split_archive_path(path)[0]
+    stat = os.stat(path)
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime, 'sha256': digest.hexdigest()}
+
+def file_unchanged(source, path):
+    """
+    True if the file matches the manifest of the last successful import.
+    Same size + mtime is trusted without hashing; otherwise the content hash decides
+    (so a plain 'touch' doesn't trigger a re-import).
+    """
+    entry = SourceFile.objects.filter(source=source).first()
+    if entry is None:
+        return False
+
+    stat = os.stat(split_archive_path(path)[0])
+    if entry.size == stat.st_size and entry.mtime == stat.st_mtime:
+        return True
+    return entry.size == stat.st_size and entry.sha256 == file_fingerprint(path)['sha256']
+
+def record_file(source, path):
+    """ Stores the manifest entry after a successful import. """
+    SourceFile.objects.update_or_create(source=source, defaults={'path': path, **file_fingerprint(path)})
+
+
+# ===== Row Hashes =====
+# Keys per stored-hash lookup, under SQLite's parameter limit (see api.utils.delete_in_batches)
+LOOKUP_BATCH_SIZE = 900
+
+def row_digest(row):
+    """ Content hash of a CSV row (dict or tuple of strings). """
+    values = row.values() if isinstance(row, dict) else row
+    return hashlib.blake2b('\x1f'.join(v or '' for v in values).encode('utf-8'), digest_size=16).hexdigest()
+
+class RowChangeTracker:
+    """
+    Filters a row stream down to the rows that are new or changed since the
+    last import of the same source, and finds the keys that disappeared.
+
+    Usage:
+        tracker = RowChangeTracker('houses', key_func=lambda row: row['unique_id'])
+        bulk_import_house_sales(path, row_filter=tracker.filter)
+        delete_house_sales(tracker.deleted_keys())
+        tracker.save()   # only once the import succeeded
+
+    The stored hashes are looked up batch by batch (key__in), and the new ones
+    are written as each batch goes through, into RowFingerprint.pending:
+    save() promotes them in one UPDATE. Memory stays flat on the 30M-row
+    files except for the set of keys seen, which finds the deleted ones.
+
+    With keep_unchanged=True every row is passed through (forced full import)
+    while hashes and deleted keys are still tracked.
+    """
+    def __init__(self, source, key_func, keep_unchanged=False, batch_size=LOOKUP_BATCH_SIZE):
+        self.source = source
+        self.key_func = key_func
+        self.keep_unchanged = keep_unchanged
+        self.batch_size = batch_size
+        self.changed_count = 0
+        self._seen = set()
+        self._deleted = None
+
+        # Hashes of a failed run are not trusted: its rows are compared again
+        self._fingerprints().exclude(pending='').update(pending='')
+
+    def _fingerprints(self):
+        return RowFingerprint.objects.filter(source=self.source)
+
+    def filter(self, rows):
+        """ Generator yielding only the new / changed rows. """
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                yield from self._filter_batch(batch)
+                batch = []
+        yield from self._filter_batch(batch)
+
+    def _filter_batch(self, rows):
+        keyed = [(self.key_func(row), row) for row in rows]
+        keys = [key for key, _ in keyed if key]
+        known = dict(self._fingerprints().filter(key__in=keys).values_list('key', 'digest')) if keys else {}
+
+        passed = []
+        changed = {}
+        for key, row in keyed:
+            if not key:
+                passed.append(row)
+                continue
+            self._seen.add(key)
+
+            digest = row_digest(row)
+            if known.get(key) != digest:
+                changed[key] = digest
+                passed.append(row)
+            elif self.keep_unchanged:
+                passed.append(row)
+
+        if changed:
+            # New keys get an empty digest: until save() they still count as changed
+            RowFingerprint.objects.bulk_create(
+                [RowFingerprint(source=self.source, key=key, digest='', pending=digest) for key, digest in changed.items()],
+                update_conflicts=True,
+                unique_fields=['source', 'key'],
+                update_fields=['pending'],
+            )
+            self.changed_count += len(changed)
+        return passed
+
+    def deleted_keys(self):
+        """ Keys imported last time but missing from this file. """
+        if self._deleted is None:
+            keys = self._fingerprints().values_list('key', flat=True)
+            self._deleted = [key for key in keys.iterator(chunk_size=10000) if key not in self._seen]
+        return self._deleted
+
+    def save(self):
+        """ Promotes the new hashes and forgets the deleted keys. """
+        deleted = self.deleted_keys()
+        with transaction.atomic():
+            self._fingerprints().exclude(pending='').update(digest=F('pending'), pending='')
+            delete_in_batches(self._fingerprints(), 'key', deleted)
+        self._deleted = None
+
+
+# ===== Checkpoints =====
+class Checkpoint:
+    """
+    Resume point of a chunked import. The importer passes its row stream
+    through skip() and calls commit() inside each chunk's transaction, so
+    the offset is committed together with the rows it covers.
+    After a crash, Checkpoint(..., resume=True) on the same file skips the
+    rows that were already committed.
+
+    Usage:
+        checkpoint = Checkpoint('houses', path, resume=True)
+        for row in checkpoint.skip(rows):
+            ...
+            with transaction.atomic():
+                write(chunk)
+                checkpoint.commit()
+        checkpoint.clear()   # once the whole file is in
+
+    variant tells apart streams of the same file that differ (e.g. a forced
+    full import vs. changed rows only): a checkpoint only resumes its own.
+    """
+    def __init__(self, source, path, resume=False, variant=''):
+        self.source = source
+        self.signature = json.dumps({**source_signature(path), 'variant': variant}, sort_keys=True)
+        self.start = 0
+        self.position = 0
+
+        entry = ImportCheckpoint.objects.filter(source=source).first()
+        if resume and entry is not None:
+            if entry.signature == self.signature:
+                self.start = entry.rows_committed
+                print(f"[{source}] resuming after row {self.start}")
+            else:
+                print(f"[{source}] file changed since the checkpoint, starting over")
+
+    def skip(self, rows):
+        """ Yields the rows after the committed offset, counting every row. """
+        for row in rows:
+            self.position += 1
+            if self.position > self.start:
+                yield row
+
+    def commit(self):
+        """ Records every row consumed so far; call inside the chunk's transaction. """
+        ImportCheckpoint.objects.update_or_create(
+            source=self.source,
+            defaults={'signature': self.signature, 'rows_committed': self.position},
+        )
+
+    def clear(self):
+        ImportCheckpoint.objects.filter(source=self.source).delete()
+
+
+# ===== Import Wrapper =====
+class IncrementalImport:
+    """
+    Wraps an importer taking (path, row_filter=...) so that:
+    1. an unchanged file is skipped entirely (returns SKIPPED)
+    2. otherwise only new / changed rows reach the importer
+    3. keys missing from the file are passed to delete_func
+    The manifest and row hashes are saved only after the import succeeded.
+
+    Every row is re-imported (but still hashed) with force=True, or when one
+    of the `upstream` sources was imported after this one: rows skipped last
+    time for an unknown sector may be valid now.
+    key_func=None keeps the file-level check only; the importer is then
+    called with the path alone.
+
+    With checkpointed=True the importer also gets checkpoint=Checkpoint(...)
+    (see above); resume=True continues an import that failed halfway.
+    """
+    def __init__(self, source, import_func, key_func=None, delete_func=None, upstream=(), force=False,
+                 checkpointed=False, resume=False):
+        self.source = source
+        self.import_func = import_func
+        self.key_func = key_func
+        self.delete_func = delete_func
+        self.upstream = tuple(upstream)
+        self.force = force
+        self.checkpointed = checkpointed
+        self.resume = resume
+
+    def _upstream_changed(self):
+        entry = SourceFile.objects.filter(source=self.source).first()
+        if entry is None:
+            return False
+        return SourceFile.objects.filter(source__in=self.upstream, imported_at__gt=entry.imported_at).exists()
+
+    def __call__(self, path):
+        with metrics.phase('manifest'):
+            full = self.force or self._upstream_changed()
+            if not full and file_unchanged(self.source, path):
+                return SKIPPED
+
+        if self.key_func is None:
+            self.import_func(path)
+            with metrics.phase('manifest'):
+                record_file(self.source, path)
+            return
+
+        with metrics.phase('manifest'):
+            tracker = RowChangeTracker(self.source, self.key_func, keep_unchanged=full)
+        if self.checkpointed:
+            # Row hashes are only saved on success: until then the filtered stream replays identically
+            checkpoint = Checkpoint(self.source, path, resume=self.resume, variant='full' if full else 'changed')
+            self.import_func(path, row_filter=tracker.filter, checkpoint=checkpoint)
+        else:
+            checkpoint = None
+            self.import_func(path, row_filter=tracker.filter)
+
+        deleted = tracker.deleted_keys()
+        if deleted and self.delete_func:
+            with metrics.phase('delete') as delete:
+                self.delete_func(deleted)
+                delete.written += len(deleted)
+
+        changed = tracker.changed_count
+        with metrics.phase('manifest') as manifest:
+            tracker.save()
+            record_file(self.source, path)
+            if checkpoint:
+                checkpoint.clear()
+            manifest.written += changed
+        print(f"[{self.source}] {changed} new/changed rows, {len(deleted)} deleted")
@@ -0,0 +1,48 @@
+from django.db import models
+
+class SourceFile(models.Model):
+    """
+    Manifest entry of the last successful import of a source file.
+    Used to skip files that haven't changed since.
+    """
+    source = models.CharField(max_length=100, primary_key=True) # e.g. 'houses' / 'ks2:2024'
+    path = models.CharField(max_length=500)
+    size = models.BigIntegerField()
+    mtime = models.FloatField()
+    sha256 = models.CharField(max_length=64)
+    imported_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source}: {self.path} ({self.sha256[:12]})"
+
+class RowFingerprint(models.Model):
+    """
+    Content hash of one source row, keyed on its natural key
+    (unique_id, URN, stop_id, sector...).
+    Row example: houses | 1EAE3DF7-49DD-... | 9f86d081884c7d65...
+    """
+    source = models.CharField(max_length=100)
+    key = models.CharField(max_length=100)
+    digest = models.CharField(max_length=32)
+
+    # Hash seen by the running import, promoted to digest once it succeeded
+    pending = models.CharField(max_length=32, blank=True, default='')
+
+    class Meta:
+        unique_together = ('source', 'key')
+
+    def __str__(self):
+        return f"{self.source} - {self.key}: {self.digest}"
+
+class ImportCheckpoint(models.Model):
+    """
+    Progress of an unfinished chunked import: the rows committed so far and
+    the signature of the file they came from. Deleted once the import succeeds.
+    """
+    source = models.CharField(max_length=100, primary_key=True)
+    signature = models.CharField(max_length=200)
+    rows_committed = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source}: {self.rows_committed} rows"
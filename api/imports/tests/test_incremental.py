@@ -0,0 +1,207 @@
+import os
+import csv
+import tempfile
+from unittest.mock import MagicMock, patch
+from django.test import TestCase
+from api.coordinates.models import Coordinates
+from api.houses import importer as house_importer
+from api.houses.importer import bulk_import_house_sales, delete_house_sales
+from api.houses.models import HouseSaleRecord
+from api.imports.incremental import RowChangeTracker, IncrementalImport, Checkpoint, file_unchanged, record_file
+from api.imports.models import RowFingerprint, ImportCheckpoint
+from api.scheduler import SKIPPED
+
+HOUSE_HEADER = ['unique_id', 'price_paid', 'deed_date', 'postcode', 'property_type', 'new_build',
+                'estate_type', 'saon', 'paon', 'street', 'locality', 'town', 'district', 'county',
+                'transaction_category', 'linked_data_uri']
+
+def house_row(unique_id, price):
+    return [unique_id, price, '1/15/2023', 'RG1 1AA', 'T', 'N', 'F', '', '1', 'HIGH ST',
+            '', 'READING', 'READING', 'BERKSHIRE', 'A', '']
+
+
+class RowChangeTrackerTest(TestCase):
+    def key(self, row):
+        return row['id']
+
+    def test_filters_unchanged_rows_and_finds_deleted(self):
+        tracker = RowChangeTracker('test', self.key)
+        first = [{'id': '1', 'v': 'a'}, {'id': '2', 'v': 'b'}, {'id': '3', 'v': 'c'}]
+        self.assertEqual(list(tracker.filter(first)), first)
+        tracker.save()
+        self.assertEqual(RowFingerprint.objects.filter(source='test').count(), 3)
+
+        tracker = RowChangeTracker('test', self.key)
+        second = [{'id': '1', 'v': 'a'}, {'id': '2', 'v': 'changed'}, {'id': '4', 'v': 'd'}]
+        self.assertEqual([row['id'] for row in tracker.filter(second)], ['2', '4'])
+        self.assertEqual(tracker.deleted_keys(), ['3'])
+
+        tracker.save()
+        self.assertEqual(
+            set(RowFingerprint.objects.filter(source='test').values_list('key', flat=True)),
+            {'1', '2', '4'},
+        )
+
+    def test_keep_unchanged_passes_every_row(self):
+        rows = [{'id': '1', 'v': 'a'}]
+        tracker = RowChangeTracker('test', self.key)
+        list(tracker.filter(rows))
+        tracker.save()
+
+        tracker = RowChangeTracker('test', self.key, keep_unchanged=True)
+        self.assertEqual(list(tracker.filter(rows)), rows)
+        self.assertEqual(tracker.changed_count, 0)
+
+    def test_hashes_are_looked_up_and_written_per_batch(self):
+        rows = [{'id': str(i), 'v': 'a'} for i in range(5)]
+        tracker = RowChangeTracker('test', self.key, batch_size=2)
+        filtered = tracker.filter(rows)
+
+        # The first batch is looked up and its new hashes written before the rest is read
+        with self.assertNumQueries(2):
+            self.assertEqual(next(filtered)['id'], '0')
+        self.assertEqual(list(RowFingerprint.objects.filter(source='test').values_list('digest', flat=True)), ['', ''])
+        self.assertEqual(len(list(filtered)), 4)
+        tracker.save()
+        self.assertFalse(RowFingerprint.objects.filter(source='test', digest='').exists())
+
+    def test_failed_run_keeps_the_previous_hashes(self):
+        tracker = RowChangeTracker('test', self.key)
+        list(tracker.filter([{'id': '1', 'v': 'a'}]))
+        tracker.save()
+
+        # Changed, but the import fails before save()
+        tracker = RowChangeTracker('test', self.key)
+        list(tracker.filter([{'id': '1', 'v': 'b'}, {'id': '2', 'v': 'c'}]))
+
+        # The next run (back to the old content) still sees both rows as they were last imported
+        tracker = RowChangeTracker('test', self.key)
+        self.assertEqual([row['id'] for row in tracker.filter([{'id': '1', 'v': 'a'}, {'id': '2', 'v': 'c'}])], ['2'])
+        tracker.save()
+        self.assertEqual(tracker.deleted_keys(), [])
+
+
+class IncrementalImportTest(TestCase):
+    def setUp(self):
+        Coordinates.objects.create(name="RG1 1", latitude=51.4569, longitude=-0.973118)
+        self.tmp = tempfile.NamedTemporaryFile('w', suffix='.csv', newline='', delete=False)
+        self.tmp.close()
+        self.write_houses([house_row('{A}', '100000'), house_row('{B}', '200000')])
+
+    def tearDown(self):
+        os.remove(self.tmp.name)
+
+    def write_houses(self, rows):
+        with open(self.tmp.name, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(HOUSE_HEADER)
+            writer.writerows(rows)
+
+    def house_import(self, force=False):
+        return IncrementalImport(
+            'houses',
+            lambda path, row_filter: bulk_import_house_sales(path, row_filter=row_filter, update_existing=True),
+            key_func=lambda row: row['unique_id'],
+            delete_func=delete_house_sales,
+            force=force,
+        )
+
+    def test_unchanged_file_is_skipped(self):
+        self.assertIsNone(self.house_import()(self.tmp.name))
+        self.assertTrue(file_unchanged('houses', self.tmp.name))
+        self.assertEqual(self.house_import()(self.tmp.name), SKIPPED)
+
+    def test_changed_rows_are_updated_and_missing_rows_deleted(self):
+        self.house_import()(self.tmp.name)
+        self.write_houses([house_row('{A}', '150000'), house_row('{C}', '300000')])
+
+        self.house_import()(self.tmp.name)
+
+        prices = dict(HouseSaleRecord.objects.values_list('unique_id', 'price_paid'))
+        # Stored without the braces of the file's ids
+        self.assertEqual(prices, {'A': 150000, 'C': 300000})
+
+    def test_upstream_import_forces_full_run(self):
+        record_file('coordinates', self.tmp.name)
+        import_func = MagicMock()
+        wrapper = IncrementalImport('other', import_func, upstream=('coordinates',))
+        wrapper(self.tmp.name)
+
+        # Same file, but the upstream source was imported again since
+        record_file('coordinates', self.tmp.name)
+        self.assertIsNone(wrapper(self.tmp.name))
+        self.assertEqual(import_func.call_count, 2)
+
+
+class CheckpointTest(TestCase):
+    def setUp(self):
+        Coordinates.objects.create(name="RG1 1", latitude=51.4569, longitude=-0.973118)
+        self.tmp = tempfile.NamedTemporaryFile('w', suffix='.csv', newline='', delete=False)
+        writer = csv.writer(self.tmp)
+        writer.writerow(HOUSE_HEADER)
+        writer.writerows(house_row(f'{{{i}}}', str(100000 + i)) for i in range(5))
+        self.tmp.close()
+
+    def tearDown(self):
+        os.remove(self.tmp.name)
+
+    def house_import(self, resume=False):
+        return IncrementalImport(
+            'houses',
+            lambda path, row_filter, checkpoint: bulk_import_house_sales(
+                path, chunk_size=2, row_filter=row_filter, update_existing=True, checkpoint=checkpoint),
+            key_func=lambda row: row['unique_id'],
+            delete_func=delete_house_sales,
+            checkpointed=True,
+            resume=resume,
+        )
+
+    def test_skip_resumes_after_committed_rows(self):
+        checkpoint = Checkpoint('test', self.tmp.name)
+        self.assertEqual(list(checkpoint.skip(['a', 'b'])), ['a', 'b'])
+        checkpoint.commit()
+
+        resumed = Checkpoint('test', self.tmp.name, resume=True)
+        self.assertEqual(list(resumed.skip(['a', 'b', 'c'])), ['c'])
+        # Without resume the file is read from the start
+        self.assertEqual(list(Checkpoint('test', self.tmp.name).skip(['a', 'b'])), ['a', 'b'])
+
+    def test_changed_file_starts_over(self):
+        checkpoint = Checkpoint('test', self.tmp.name)
+        list(checkpoint.skip(['a', 'b']))
+        checkpoint.commit()
+
+        with open(self.tmp.name, 'a', newline='') as f:
+            csv.writer(f).writerow(house_row('{5}', '100005'))
+        self.assertEqual(Checkpoint('test', self.tmp.name, resume=True).start, 0)
+        # A different stream of the same file doesn't resume either
+        self.assertEqual(Checkpoint('test', self.tmp.name, resume=True, variant='full').start, 0)
+
+    def test_failed_import_resumes_after_last_chunk(self):
+        write_chunk = house_importer._write_sale_chunk
+        calls = []
+
+        def failing_chunk(chunk, *args):
+            calls.append(list(chunk))
+            if len(calls) == 2:
+                raise RuntimeError('connection lost')
+            return write_chunk(chunk, *args)
+
+        with patch.object(house_importer, '_write_sale_chunk', side_effect=failing_chunk):
+            with self.assertRaises(RuntimeError):
+                self.house_import()(self.tmp.name)
+        self.assertEqual(HouseSaleRecord.objects.count(), 2)
+        self.assertEqual(ImportCheckpoint.objects.get(source='houses').rows_committed, 2)
+        self.assertFalse(file_unchanged('houses', self.tmp.name))
+
+        calls.clear()
+        with patch.object(house_importer, '_write_sale_chunk', side_effect=lambda chunk, *args: (
+                calls.append(list(chunk)) or write_chunk(chunk, *args))):
+            self.house_import(resume=True)(self.tmp.name)
+        # Only the rows after the committed chunk are written again
+        self.assertEqual(calls, [['2', '3'], ['4']])
+        self.assertEqual(HouseSaleRecord.objects.count(), 5)
+        self.assertFalse(ImportCheckpoint.objects.exists())
+        # Every row is fingerprinted, including the ones committed before the failure
+        self.assertEqual(RowFingerprint.objects.filter(source='houses').count(), 5)
+        self.assertEqual(self.house_import()(self.tmp.name), SKIPPED)
@@ -0,0 +1,40 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+from api.coordinates.summary import refresh_sector_summaries
+from api.houses.importer import apply_house_sales_delta, BULK_CHUNK_SIZE
+from api.metrics import metrics, query_logging_disabled
+from api.utils import source_exists
+
+
+class Command(BaseCommand):
+    help = 'Apply a Land Registry monthly change file (A = add, C = change, D = delete) to the house sales'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file_path', help='Change file (.csv, .gz or .zip), raw headerless or with our header + record_status')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=BULK_CHUNK_SIZE,
+            help='Records applied per transaction',
+        )
+        parser.add_argument('--report', help='Write the JSON metrics report to this path')
+
+    def handle(self, *args, **options):
+        file_path = os.path.abspath(options['file_path'])
+        if not source_exists(file_path):
+            raise CommandError(f"File not found: {file_path}")
+
+        metrics.reset()
+        with query_logging_disabled(), metrics.importer('House Sales Delta') as record:
+            totals = apply_house_sales_delta(file_path, chunk_size=options['chunk_size'])
+            record['status'] = 'ok'
+        with query_logging_disabled(), metrics.importer('Sector Summary') as record:
+            refresh_sector_summaries()
+            record['status'] = 'ok'
+
+        if options.get('report'):
+            metrics.write_json(options['report'])
+        self.stdout.write(self.style.SUCCESS(
+            f"  [OK] {totals['upserted']} upserted, {totals['deleted']} deleted, "
+            f"{totals['orphan_addresses']} orphan addresses removed"
+        ))
@@ -1,19 +1,37 @@
 import os
 import functools
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 # --- Imports ---
 from api.coordinates.importer import run_coordinate_import
-from api.crimes.importer import run_crime_import
-from api.houses.importer import import_house_sales
+from api.coordinates.summary import refresh_sector_summaries
+from api.crimes.importer import run_crime_import, run_street_crime_import, run_monthly_crime_import, clear_sector_crimes
+from api.houses.importer import bulk_import_house_sales, delete_house_sales
 from api.schools.importer import (
-    run_school_base_import,
-    run_ks2_import_wrapper,
-    run_ks4_import_wrapper,
-    run_ks5_import_wrapper,
+    run_school_base_bulk_import,
+    run_ks2_bulk_import,
+    run_ks4_bulk_import,
+    run_ks5_bulk_import,
+    delete_schools,
+    delete_performance,
 )
-from api.transports.importer import run_transport_import
+from api.schools.models import KS2Performance, KS4Performance, KS5Performance
+from api.transports.importer import (
+    run_transport_import,
+    run_gtfs_import,
+    run_naptan_import,
+    delete_transport_stops,
+    delete_naptan_stops,
+)
+from api.imports.incremental import IncrementalImport
+from api.metrics import metrics, query_logging_disabled
+from api.utils import find_source, source_exists
+from api.scheduler import ImportTask, run_task_graph, sqlite_write_queue, OK, SKIPPED, FAILED, BLOCKED
 from core import settings
 
+SUMMARY_TASK = "Sector Summary"
+# Task threads by default: the writes queue on the database anyway, the file parsing overlaps
+DEFAULT_WORKERS = 4
+
 # --- Decorator 1: Global Lifecycle (Start/End Banners) ---
 def log_command_lifecycle(func):
     """
@@ -35,29 +53,66 @@ def log_task(func):
     Handles the repetitive logic for a single import task:
     1. Print 'Importing X...'
     2. Check file existence (Skip if missing)
-    3. Run function
+    3. Run function (Skip if it reports the file unchanged)
     4. Catch errors
+    The run is recorded in the import metrics under the description.
+    Returns the task status (OK / SKIPPED / FAILED) for the scheduler.
     """
     @functools.wraps(func)
     def wrapper(self, description, file_path, import_func):
         self.stdout.write(f"Importing {description}...")
 
-        if not os.path.exists(file_path):
+        if not source_exists(file_path):
             self.stdout.write(self.style.WARNING(f"  [SKIP] File not found: {file_path}"))
-            return
+            return SKIPPED
 
-        try:
-            # Run the actual import function passed as argument
-            import_func(file_path)
-            self.stdout.write(self.style.SUCCESS(f"  [OK] Successfully imported {description}."))
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f"  [FAIL] Error in {description}: {e}"))
+        with metrics.importer(description) as record:
+            try:
+                # Run the actual import function passed as argument
+                if import_func(file_path) == SKIPPED:
+                    self.stdout.write(f"  [SKIP] Unchanged since last import: {description}")
+                    record['status'] = SKIPPED
+                else:
+                    self.stdout.write(self.style.SUCCESS(f"  [OK] Successfully imported {description}."))
+                    record['status'] = OK
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"  [FAIL] Error in {description}: {e}"))
+                record['status'] = FAILED
+        return record['status']
             
     return wrapper
 
 
 class Command(BaseCommand):
-    help = 'Run all importers sequentially'
+    help = 'Run all importers, independent ones in parallel'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help=f'Parallel import workers (default: {DEFAULT_WORKERS}, at most the CPU count; 1 runs the imports one by one)',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Re-import every file and row, even if unchanged since the last import',
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Continue the chunked imports (house sales, NaPTAN) of a failed run after their last committed chunk',
+        )
+        parser.add_argument(
+            '--report',
+            default=None,
+            help='Write a JSON metrics report (rows, time, SQL queries per importer and phase) to this path',
+        )
+        parser.add_argument(
+            '--crime-cache',
+            default=None,
+            help='Folder of the per-month crime counts cache (default: .cache next to the crime data)',
+        )
 
     @log_task
     def run_import(self, description, file_path, import_func):
@@ -68,51 +123,203 @@ class Command(BaseCommand):
         """
         pass 
 
-    @log_command_lifecycle
-    def handle(self, *args, **options):
+    def import_task(self, description, file_path, import_func, depends_on=()):
+        """
+        Wraps one file import as a node of the task graph.
+        A missing file is looked for as its .gz / .zip download, streamed as is.
+        """
+        return ImportTask(
+            description,
+            functools.partial(self.run_import, description, find_source(file_path), import_func),
+            depends_on=depends_on,
+        )
+
+    def build_tasks(self, force=False, resume=False, crime_cache=None):
+        """
+        The import graph: Coordinates is the only real prerequisite,
+        the KS results also need the schools.
+        Every importer is incremental: unchanged files are skipped and
+        only new / changed rows are written (see api.imports.incremental).
+        The large chunked imports are checkpointed: with resume they skip
+        the chunks a failed run already committed.
+        """
         # Define Folders
         data_dir = os.path.join(settings.BASE_DIR, 'data')
         school_dir = os.path.join(data_dir, 'school_data')
-        # --- Geography ---
-        self.run_import(
-            "Coordinates", 
-            os.path.join(data_dir, 'reading_postcode_sectors.csv'), 
-            run_coordinate_import)
-        # --- Crime ---
-        self.run_import(
-            "Crime Stats", 
-            os.path.join(data_dir, 'detailed_crime_stats.csv'), 
-            run_crime_import)
-        # --- Schools ---
-        self.run_import(
-            "School Info", 
-            os.path.join(school_dir, 'school_information.csv'), 
-            lambda path: run_school_base_import(path, year=2024)
-        )
-        self.run_import(
-            "KS2 Results", 
-            os.path.join(school_dir, 'key_stage2.csv'), 
-            lambda path: run_ks2_import_wrapper(path, year=2024)
-        )
-        self.run_import(
-            "KS4 Results", 
-            os.path.join(school_dir, 'key_stage4.csv'), 
-            lambda path: run_ks4_import_wrapper(path, year=2024)
-        )
-        self.run_import(
-            "KS5 Results", 
-            os.path.join(school_dir, 'key_stage5.csv'), 
-            lambda path: run_ks5_import_wrapper(path, year=2024)
-        )
-        # --- Houses sale record ---
-        self.run_import(
-            "House Sale Records", 
-            os.path.join(data_dir, 'reading_house_sale_record.csv'), 
-            import_house_sales
-        )
-        # --- Transport ---
-        self.run_import(
-            "Transport Stops", 
-            os.path.join(data_dir, 'bus_stops_with_routes.csv'), 
-            run_transport_import
-        )
+        gtfs_dir = os.path.join(data_dir, 'raw_data', 'bus_data', 'data')
+        crime_dir = os.path.join(data_dir, 'raw_data', 'crime_data')
+
+        def incremental(source, import_func, key_column=None, delete_func=None, upstream=('coordinates',),
+                        checkpointed=False):
+            return IncrementalImport(
+                source,
+                import_func,
+                key_func=(lambda row: row.get(key_column)) if key_column else None,
+                delete_func=delete_func,
+                upstream=upstream,
+                force=force,
+                checkpointed=checkpointed,
+                resume=resume,
+            )
+
+        def ks_import(source, import_func, model):
+            return incremental(
+                source,
+                lambda path, row_filter: import_func(path, year=2024, row_filter=row_filter),
+                'URN',
+                lambda urns: delete_performance(model, urns, year=2024),
+                upstream=('schools',),
+            )
+
+        # Crimes: straight from the monthly street files (cached per month)
+        # when they are there, otherwise from the pre-aggregated CSV.
+        # The monthly series is appended after the totals (warm per-month cache).
+        monthly_crime_tasks = []
+        if source_exists(find_source(crime_dir)):
+            crime_task = self.import_task(
+                "Crime Stats",
+                crime_dir,
+                functools.partial(run_street_crime_import, cache_dir=crime_cache),
+                depends_on=["Coordinates"])
+            monthly_crime_tasks.append(self.import_task(
+                "Crime Months",
+                crime_dir,
+                functools.partial(run_monthly_crime_import, cache_dir=crime_cache),
+                depends_on=["Crime Stats"]))
+        else:
+            crime_task = self.import_task(
+                "Crime Stats", 
+                os.path.join(data_dir, 'detailed_crime_stats.csv'), 
+                incremental('crimes', run_crime_import, 'postcode_sector', clear_sector_crimes),
+                depends_on=["Coordinates"])
+
+        return [
+            # --- Geography ---
+            self.import_task(
+                "Coordinates", 
+                os.path.join(data_dir, 'reading_postcode_sectors.csv'), 
+                # File-level check only: neighbour links span rows, and deleting a sector would cascade
+                incremental('coordinates', lambda path: run_coordinate_import(path), upstream=())),
+            # --- Crime ---
+            crime_task,
+            *monthly_crime_tasks,
+            # --- Schools ---
+            self.import_task(
+                "School Info", 
+                os.path.join(school_dir, 'school_information.csv'), 
+                incremental(
+                    'schools',
+                    lambda path, row_filter: run_school_base_bulk_import(path, year=2024, row_filter=row_filter),
+                    'URN',
+                    delete_schools),
+                depends_on=["Coordinates"]),
+            self.import_task(
+                "KS2 Results", 
+                os.path.join(school_dir, 'key_stage2.csv'), 
+                ks_import('ks2:2024', run_ks2_bulk_import, KS2Performance),
+                depends_on=["School Info"]),
+            self.import_task(
+                "KS4 Results", 
+                os.path.join(school_dir, 'key_stage4.csv'), 
+                ks_import('ks4:2024', run_ks4_bulk_import, KS4Performance),
+                depends_on=["School Info"]),
+            self.import_task(
+                "KS5 Results", 
+                os.path.join(school_dir, 'key_stage5.csv'), 
+                ks_import('ks5:2024', run_ks5_bulk_import, KS5Performance),
+                depends_on=["School Info"]),
+            # --- Houses sale record ---
+            self.import_task(
+                "House Sale Records", 
+                os.path.join(data_dir, 'reading_house_sale_record.csv'), 
+                incremental(
+                    'houses',
+                    lambda path, row_filter, checkpoint: bulk_import_house_sales(
+                        path, row_filter=row_filter, update_existing=True, checkpoint=checkpoint),
+                    'unique_id',
+                    delete_house_sales,
+                    checkpointed=True),
+                depends_on=["Coordinates"]),
+            # --- Transport ---
+            self.import_task(
+                "Transport Stops", 
+                os.path.join(data_dir, 'bus_stops_with_routes.csv'), 
+                incremental('transport', run_transport_import, 'stop_id', delete_transport_stops),
+                depends_on=["Coordinates"]),
+            # Trip counts (and links, when stop_times.txt is there) straight from the feed
+            self.import_task(
+                "GTFS Frequencies", 
+                gtfs_dir, 
+                run_gtfs_import,
+                depends_on=["Transport Stops"]),
+            # NaPTAN metadata of the stops; stops dropped from the file or no longer active
+            # are removed unless a route calls there, so it runs once the routes are linked
+            self.import_task(
+                "NaPTAN Stops", 
+                os.path.join(data_dir, 'transport.csv'), 
+                incremental('naptan', run_naptan_import, 'ATCOCode', delete_naptan_stops, checkpointed=True),
+                depends_on=["Coordinates", "GTFS Frequencies"]),
+        ]
+
+    def refresh_summaries(self):
+        """
+        Rebuilds the per-sector read model (SectorSummary) from whatever
+        the imports committed. Returns OK / FAILED.
+        """
+        self.stdout.write("Refreshing sector summaries...")
+        with metrics.importer(SUMMARY_TASK) as record:
+            try:
+                refresh_sector_summaries()
+                record['status'] = OK
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"  [FAIL] Error in {SUMMARY_TASK}: {e}"))
+                record['status'] = FAILED
+        return record['status']
+
+    def print_summary(self, tasks):
+        """ Per-task status, wall time and SQL queries. """
+        statuses = {task.name: task.status for task in tasks}
+        importers = metrics.report()['importers']
+
+        self.stdout.write('--- Import Summary ---')
+        for task in tasks:
+            line = f"  {task.name:<20} {task.status:<8} {task.seconds:7.2f}s"
+            if task.name in importers:
+                line += f" {importers[task.name]['queries']:>7} queries"
+            if task.status == BLOCKED:
+                failed_deps = ', '.join(dep for dep in task.depends_on if statuses[dep] in (FAILED, BLOCKED))
+                self.stdout.write(self.style.WARNING(f"{line}  (prerequisite failed: {failed_deps})"))
+            elif task.status == FAILED:
+                self.stdout.write(self.style.ERROR(line))
+            else:
+                self.stdout.write(line)
+
+    @log_command_lifecycle
+    def handle(self, *args, **options):
+        workers = options.get('workers')
+        if workers is None:
+            workers = min(DEFAULT_WORKERS, os.cpu_count() or 1)
+
+        metrics.reset()
+        with query_logging_disabled(), sqlite_write_queue():
+            tasks = run_task_graph(
+                self.build_tasks(
+                    force=options.get('force', False),
+                    resume=options.get('resume', False),
+                    crime_cache=options.get('crime_cache'),
+                ),
+                workers=workers,
+            )
+            summary_status = self.refresh_summaries()
+        self.print_summary(tasks)
+
+        report_path = options.get('report')
+        if report_path:
+            metrics.write_json(report_path)
+            self.stdout.write(f"Metrics report written to {report_path}")
+
+        failed = [task.name for task in tasks if task.status in (FAILED, BLOCKED)]
+        if summary_status == FAILED:
+            failed.append(SUMMARY_TASK)
+        if failed:
+            raise CommandError(f"Import did not complete: {', '.join(failed)}")
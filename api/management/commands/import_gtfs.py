@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.transports.importer import run_gtfs_import
+from api.metrics import metrics, query_logging_disabled
+from api.utils import source_exists, source_member
+
+
+class Command(BaseCommand):
+    help = 'Import a GTFS feed folder (routes, trips, stops, optional stop_times) into the transport models'
+
+    def add_arguments(self, parser):
+        parser.add_argument('folder', help='Feed folder or .zip holding routes.txt, trips.txt, stops.txt (and stop_times.txt)')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Processes scanning stop_times.txt',
+        )
+        parser.add_argument('--report', help='Write the JSON metrics report to this path')
+
+    def handle(self, *args, **options):
+        folder = options['folder']
+        for filename in ('routes.txt', 'trips.txt', 'stops.txt'):
+            if not source_exists(source_member(folder, filename)):
+                raise CommandError(f"File not found: {source_member(folder, filename)}")
+
+        metrics.reset()
+        with query_logging_disabled(), metrics.importer('GTFS Feed') as record:
+            run_gtfs_import(folder, workers=options['workers'])
+            record['status'] = 'ok'
+
+        if options.get('report'):
+            metrics.write_json(options['report'])
+        self.stdout.write(self.style.SUCCESS("  [OK] GTFS feed imported"))
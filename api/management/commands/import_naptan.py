@@ -0,0 +1,39 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+from api.transports.importer import run_naptan_import, NAPTAN_CHUNK_SIZE
+from api.metrics import metrics, query_logging_disabled
+from api.utils import source_exists
+
+
+class Command(BaseCommand):
+    help = 'Import the active stops of a NaPTAN Stops CSV (local extract or the national file)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file_path', help='NaPTAN Stops.csv (.gz, .zip or archive.zip!Stops.csv also work)')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Processes parsing the file (default: one per CPU for large files)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=NAPTAN_CHUNK_SIZE,
+            help='Stops written per transaction',
+        )
+        parser.add_argument('--report', help='Write the JSON metrics report to this path')
+
+    def handle(self, *args, **options):
+        file_path = os.path.abspath(options['file_path'])
+        if not source_exists(file_path):
+            raise CommandError(f"File not found: {file_path}")
+
+        metrics.reset()
+        with query_logging_disabled(), metrics.importer('NaPTAN Stops') as record:
+            written = run_naptan_import(file_path, workers=options['workers'], chunk_size=options['chunk_size'])
+            record['status'] = 'ok'
+
+        if options.get('report'):
+            metrics.write_json(options['report'])
+        self.stdout.write(self.style.SUCCESS(f"  [OK] {written} stops written"))
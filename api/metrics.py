@@ -0,0 +1,169 @@
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+# ===== Query Logging =====
+@contextmanager
+def query_logging_disabled():
+    """
+    With DEBUG = True, Django keeps the last SQL statements of each
+    connection in connection.queries; a long import would fill it for
+    nothing. Query counts come from the metrics below instead.
+    Only the import's connections stop logging: this thread's and the ones
+    opened meanwhile (worker threads); settings.DEBUG is left alone.
+    """
+    def disable(connection, **kwargs):
+        connection.queries_log = deque(maxlen=0)
+
+    previous = connection.queries_log
+    disable(connection)
+    connection_created.connect(disable, weak=False)
+    try:
+        yield
+    finally:
+        connection_created.disconnect(disable)
+        connection.queries_log = previous
+
+
+# ===== Phase Stats =====
+class PhaseStats:
+    """
+    Counters of one phase of one importer. Accumulates over repeated
+    phases (e.g. one 'write' per chunk).
+    """
+    def __init__(self):
+        self.read = 0
+        self.written = 0
+        self.skipped = 0
+        self.seconds = 0.0
+        self.queries = 0
+        self.sql_seconds = 0.0
+
+    def _count_query(self, execute, sql, params, many, context):
+        """ connection.execute_wrapper hook: counts and times every statement. """
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_seconds += time.perf_counter() - start
+
+    def track(self, rows):
+        """
+        Yields the rows of an iterable, counting them as read and timing
+        only the time spent producing them (not the caller's work).
+        """
+        iterator = iter(rows)
+        while True:
+            start = time.perf_counter()
+            try:
+                row = next(iterator)
+            except StopIteration:
+                self.seconds += time.perf_counter() - start
+                return
+            self.seconds += time.perf_counter() - start
+            self.read += 1
+            yield row
+
+    def as_dict(self):
+        rows = self.read or self.written
+        return {
+            'rows_read': self.read,
+            'rows_written': self.written,
+            'rows_skipped': self.skipped,
+            'seconds': round(self.seconds, 4),
+            'rows_per_sec': round(rows / self.seconds, 1) if self.seconds > 0 else None,
+            'queries': self.queries,
+            'sql_seconds': round(self.sql_seconds, 4),
+        }
+
+
+# ===== Collector =====
+class ImportMetrics:
+    """
+    Collects per importer / per phase statistics of an import run.
+    The current importer is per thread (import_all_data runs them in parallel);
+    outside of an importer block, phases are measured but not recorded.
+
+    Usage:
+        with metrics.importer('House Sale Records'):
+            parse = metrics.stats('parse')
+            for row in parse.track(rows):
+                ...
+            with metrics.phase('write') as write:
+                write.written += bulk_write(...)
+        metrics.write_json('import_metrics.json')
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = datetime.now(timezone.utc)
+            self._importers = {}
+
+    @contextmanager
+    def importer(self, name):
+        """
+        Makes `name` the current importer of this thread. Yields its record,
+        whose 'status' the caller may set.
+        """
+        record = {'status': None, 'seconds': 0.0, 'total': PhaseStats(), 'phases': {}}
+        with self._lock:
+            self._importers[name] = record
+
+        previous = getattr(self._local, 'record', None)
+        self._local.record = record
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(record['total']._count_query):
+                yield record
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            self._local.record = previous
+
+    def stats(self, name):
+        """ The (accumulating) stats of phase `name` of the current importer. """
+        record = getattr(self._local, 'record', None)
+        if record is None:
+            return PhaseStats()
+        return record['phases'].setdefault(name, PhaseStats())
+
+    @contextmanager
+    def phase(self, name):
+        """ Times a block and counts its SQL queries into phase `name`. """
+        stats = self.stats(name)
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(stats._count_query):
+                yield stats
+        finally:
+            stats.seconds += time.perf_counter() - start
+
+    def report(self):
+        importers = {}
+        with self._lock:
+            items = list(self._importers.items())
+        for name, record in items:
+            total = record['total']
+            importers[name] = {
+                'status': record['status'],
+                'seconds': round(record['seconds'], 4),
+                'queries': total.queries,
+                'sql_seconds': round(total.sql_seconds, 4),
+                'phases': {phase: stats.as_dict() for phase, stats in record['phases'].items()},
+            }
+        return {'started_at': self.started_at.isoformat(), 'importers': importers}
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+
+metrics = ImportMetrics()
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_busroute_transportstop'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='houseaddress',
+            name='postcode',
+            field=models.CharField(db_index=True, max_length=20),
+        ),
+    ]
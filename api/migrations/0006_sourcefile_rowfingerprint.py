@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-17 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_alter_houseaddress_postcode'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SourceFile',
+            fields=[
+                ('source', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('path', models.CharField(max_length=500)),
+                ('size', models.BigIntegerField()),
+                ('mtime', models.FloatField()),
+                ('sha256', models.CharField(max_length=64)),
+                ('imported_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RowFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=100)),
+                ('key', models.CharField(max_length=100)),
+                ('digest', models.CharField(max_length=32)),
+            ],
+            options={
+                'unique_together': {('source', 'key')},
+            },
+        ),
+    ]
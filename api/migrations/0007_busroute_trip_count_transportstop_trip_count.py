@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-17 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_sourcefile_rowfingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='busroute',
+            name='trip_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='transportstop',
+            name='trip_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-17 15:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_busroute_trip_count_transportstop_trip_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyCrimeCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api.crimecategory')),
+                ('sector', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_crimes', to='api.coordinates')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['month'], name='monthly_crime_month_idx')],
+                'constraints': [models.UniqueConstraint(fields=('sector', 'month', 'category'), name='unique_sector_month_category')],
+            },
+        ),
+    ]
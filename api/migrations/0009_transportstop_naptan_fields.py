@@ -0,0 +1,38 @@
+# Generated by Django 6.0 on 2026-10-17 16:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_monthlycrimecount'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transportstop',
+            name='indicator',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='transportstop',
+            name='bearing',
+            field=models.CharField(blank=True, default='', max_length=2),
+        ),
+        migrations.AddField(
+            model_name='transportstop',
+            name='street',
+            field=models.CharField(blank=True, default='', max_length=200),
+        ),
+        migrations.AddField(
+            model_name='transportstop',
+            name='locality',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='transportstop',
+            name='stop_type',
+            field=models.CharField(blank=True, default='', max_length=3),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 6.0 on 2026-10-17 17:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_transportstop_naptan_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('source', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('signature', models.CharField(max_length=200)),
+                ('rows_committed', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
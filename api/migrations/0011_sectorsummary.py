@@ -0,0 +1,40 @@
+# Generated by Django 6.0 on 2026-10-17 18:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_sector_summaries(apps, schema_editor):
+    # Databases imported before this table existed get their summaries now,
+    # instead of empty ones until the next import
+    if not apps.get_model('api', 'Coordinates').objects.exists():
+        return
+    from api.coordinates.summary import refresh_sector_summaries
+    refresh_sector_summaries()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_importcheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SectorSummary',
+            fields=[
+                ('sector', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='api.coordinates')),
+                ('sale_count', models.IntegerField(default=0)),
+                ('average_price', models.IntegerField(default=0)),
+                ('median_price', models.IntegerField(default=0)),
+                ('bus_stop_count', models.IntegerField(default=0)),
+                ('route_count', models.IntegerField(default=0)),
+                ('school_count', models.IntegerField(default=0)),
+                ('school_names', models.JSONField(default=list)),
+                ('total_crimes', models.IntegerField(default=0)),
+                ('crime_rate', models.FloatField(default=0.0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(fill_sector_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-17 19:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_routeindexversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rowfingerprint',
+            name='pending',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+    ]
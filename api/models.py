@@ -5,4 +5,5 @@ from .houses.models import *
 from .crimes.models import *
 from .schools.models import *
 from .coordinates.models import *
-from .transports.models import *
\ No newline at end of file
+from .transports.models import *
+from .imports.models import *
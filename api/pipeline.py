@@ -0,0 +1,162 @@
+import io
+import os
+import csv
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from api.utils import (
+    read_csv_generator, resolve_csv_path, make_column_projector, split_archive_path, is_compressed, open_source,
+)
+
+# ===== Settings =====
+# Smaller files parse faster in-process than it takes to start the workers
+PARALLEL_MIN_BYTES = 32 * 1024 * 1024
+# Bytes parsed per worker task; bounds the memory of in-flight results
+RANGE_BYTES = 8 * 1024 * 1024
+
+def default_workers(full_path):
+    """ One worker per core for large files (compressed size for archives), in-process otherwise. """
+    if os.path.getsize(split_archive_path(full_path)[0]) < PARALLEL_MIN_BYTES:
+        return 1
+    return os.cpu_count() or 1
+
+
+# ===== Byte Ranges =====
+def split_byte_ranges(full_path, range_bytes=RANGE_BYTES):
+    """
+    Splits the body of a CSV file (after the header line) into
+    [(start, end)] byte ranges that start and end on line boundaries.
+    Returns (header_bytes, ranges).
+    Quoted fields spanning lines aren't supported (none of our sources have them).
+    """
+    with open(full_path, 'rb') as f:
+        header = f.readline()
+        size = os.fstat(f.fileno()).st_size
+
+        ranges = []
+        start = f.tell()
+        while start < size:
+            f.seek(min(start + range_bytes, size))
+            f.readline()  # move on to the end of the current line
+            end = f.tell()
+            ranges.append((start, end))
+            start = end
+
+    return header, ranges
+
+def line_blocks(full_path, block_bytes=RANGE_BYTES):
+    """
+    Yields the header line, then blocks of about block_bytes that end on
+    line boundaries, as bytes. Works on compressed sources too (where byte
+    ranges can't be seeked): the file is decompressed once, as it's read.
+    """
+    with open_source(full_path, binary=True) as f:
+        yield f.readline()
+        while True:
+            block = f.read(block_bytes)
+            if not block:
+                return
+            yield block + f.readline()
+
+def _init_worker():
+    """ Workers are spawned: set Django up so the parsers' modules can be imported. """
+    import django
+    django.setup()
+
+def _parse_range(full_path, start, end, header, columns, parse_row):
+    """ Worker task: reads, projects and parses one byte range. """
+    with open(full_path, 'rb') as f:
+        f.seek(start)
+        block = f.read(end - start)
+    return _parse_block(block, header, columns, parse_row)
+
+def _parse_block(block, header, columns, parse_row):
+    """ Worker task: projects and parses the lines of one block of bytes. """
+    text = block.decode('utf-8')
+    project = make_column_projector(header, columns, strict=False)
+    results = []
+    for values in csv.reader(io.StringIO(text, newline='')):
+        if not values:
+            continue
+        row = dict(zip(columns, project(values)))
+        results.append((row, parse_row(row)))
+    return results
+
+
+# ===== Pipeline =====
+def _parse_in_processes(full_path, columns, parse_row, workers, range_bytes):
+    """
+    Plain files: workers read their own byte ranges.
+    Compressed files: this process decompresses and hands out line blocks.
+    """
+    if is_compressed(full_path):
+        blocks = line_blocks(full_path, range_bytes)
+        header = next(blocks)
+        tasks = ((_parse_block, block) for block in blocks)
+    else:
+        header, ranges = split_byte_ranges(full_path, range_bytes)
+        tasks = ((_parse_range, full_path, start, end) for start, end in ranges)
+    header = next(csv.reader([header.decode('utf-8-sig')]), [])
+
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as pool:
+        # A bounded window of ranges / blocks in flight, drained in file order
+        pending = deque()
+        for task, *args in tasks:
+            pending.append(pool.submit(task, *args, header, columns, parse_row))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def _filter_parsed(pairs, row_filter):
+    """
+    Runs row_filter (which yields a subset of the rows it's given, in order)
+    over the rows of (row, parsed) pairs and keeps the matching pairs.
+    """
+    pending = deque()
+
+    def rows():
+        for pair in pairs:
+            pending.append(pair)
+            yield pair[0]
+
+    for row in row_filter(rows()):
+        pair = pending.popleft()
+        while pair[0] is not row:
+            pair = pending.popleft()
+        yield pair
+
+def parse_rows(filename, columns, parse_row, folder="data", row_filter=None, workers=None, range_bytes=RANGE_BYTES):
+    """
+    Producer side of the import pipeline: yields (row, parse_row(row)) for
+    every row of the file, in file order. `row` is a dict of `columns`.
+
+    With workers > 1, line-aligned byte ranges of the file are parsed by
+    that many worker processes; the caller stays the single writer, draining
+    the results into the database as they come. workers=None picks one
+    worker per core for large files, and stays in-process for small ones.
+
+    .gz files and zip members are streamed the same way (see api.utils.open_source).
+
+    parse_row must be a module-level function (it's sent to the workers)
+    and must not touch the database. Returning None marks a row invalid;
+    it is still yielded so the caller can count it.
+    row_filter (e.g. RowChangeTracker.filter) can drop unchanged rows.
+    """
+    full_path = resolve_csv_path(filename, folder)
+    if workers is None:
+        workers = default_workers(full_path)
+
+    if workers <= 1:
+        rows = read_csv_generator(full_path, columns=columns)
+        if row_filter:
+            rows = row_filter(rows)
+        for row in rows:
+            yield row, parse_row(row)
+        return
+
+    pairs = _parse_in_processes(full_path, list(columns), parse_row, workers, range_bytes)
+    if row_filter:
+        pairs = _filter_parsed(pairs, row_filter)
+    yield from pairs
@@ -0,0 +1,157 @@
+import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from django.db import connections, DEFAULT_DB_ALIAS
+
+# Seconds a SQLite writer waits for the lock during parallel imports
+SQLITE_WRITE_TIMEOUT = 60
+
+# ===== Task Status =====
+PENDING = 'pending'
+OK = 'ok'
+SKIPPED = 'skipped'   # e.g. source file missing, dependents still run
+FAILED = 'failed'
+BLOCKED = 'blocked'   # a prerequisite failed, never started
+
+class ImportTask:
+    """
+    One node of the import graph.
+    func takes no argument and returns a status (OK / SKIPPED / FAILED,
+    None means OK); an exception or any other value counts as FAILED.
+    """
+    def __init__(self, name, func, depends_on=()):
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+
+        # Filled in by run_task_graph
+        self.status = PENDING
+        self.error = None
+        self.seconds = 0.0
+
+    def __repr__(self):
+        return f"<ImportTask {self.name}: {self.status}>"
+
+def _check_graph(tasks):
+    """ Raises ValueError on unknown dependencies or cycles. """
+    by_name = {task.name: task for task in tasks}
+    for task in tasks:
+        for dep in task.depends_on:
+            if dep not in by_name:
+                raise ValueError(f"Task '{task.name}' depends on unknown task '{dep}'")
+
+    # Depth-first search for a back edge
+    state = {}
+    def visit(name, path):
+        if state.get(name) == 'done':
+            return
+        if state.get(name) == 'visiting':
+            raise ValueError(f"Dependency cycle: {' -> '.join(path + [name])}")
+        state[name] = 'visiting'
+        for dep in by_name[name].depends_on:
+            visit(dep, path + [name])
+        state[name] = 'done'
+
+    for task in tasks:
+        visit(task.name, [])
+    return by_name
+
+def _run_task(task, in_worker):
+    start = time.perf_counter()
+    try:
+        status = task.func() or OK
+        # Anything else would leave the dependents pending forever
+        if status not in (OK, SKIPPED, FAILED):
+            raise ValueError(f"Task '{task.name}' returned an unknown status: {status!r}")
+        task.status = status
+    except Exception as e:
+        task.status = FAILED
+        task.error = e
+    finally:
+        task.seconds = time.perf_counter() - start
+        # Django opens one connection per thread: don't leak the worker's
+        if in_worker:
+            connections.close_all()
+    return task
+
+def run_task_graph(tasks, workers=1):
+    """
+    Runs every task once all of its dependencies finished without failing.
+    Independent tasks run in parallel on up to `workers` threads
+    (workers=1 runs everything in the calling thread, in definition order).
+    Dependents of a failed task are marked BLOCKED and never run.
+    Returns the tasks in definition order with status, error and seconds set.
+    """
+    by_name = _check_graph(tasks)
+    pending = list(tasks)
+    running = {}
+
+    def settle():
+        """ Blocks tasks behind a failure, returns the ones ready to start. """
+        ready = []
+        for task in list(pending):
+            dep_status = [by_name[dep].status for dep in task.depends_on]
+            if any(status in (FAILED, BLOCKED) for status in dep_status):
+                task.status = BLOCKED
+                pending.remove(task)
+            elif all(status in (OK, SKIPPED) for status in dep_status):
+                ready.append(task)
+        return ready
+
+    if workers <= 1:
+        while pending:
+            ready = settle()
+            if not ready:
+                continue
+            pending.remove(ready[0])
+            _run_task(ready[0], in_worker=False)
+        return list(tasks)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while pending or running:
+            for task in settle():
+                pending.remove(task)
+                running[pool.submit(_run_task, task, True)] = task
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                running.pop(future)
+
+    return list(tasks)
+
+
+@contextmanager
+def sqlite_write_queue(using=DEFAULT_DB_ALIAS):
+    """
+    Lets parallel tasks share a SQLite database, which allows one writer:
+    transactions start with BEGIN IMMEDIATE and wait up to
+    SQLITE_WRITE_TIMEOUT seconds for the lock, instead of failing with
+    "database is locked" when a read transaction upgrades to a write.
+    The database is switched to WAL so readers don't block the writer
+    (a property of the file: it stays on afterwards).
+    Applies to the connections opened meanwhile, in every thread; other
+    backends are left alone.
+    """
+    db = connections[using]
+    if db.vendor != 'sqlite':
+        yield
+        return
+
+    # Worker threads open their connections from the shared settings dict
+    options = db.settings_dict.setdefault('OPTIONS', {})
+    saved = dict(options)
+    options.update({'transaction_mode': 'IMMEDIATE', 'timeout': SQLITE_WRITE_TIMEOUT})
+    with db.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute(f'PRAGMA busy_timeout = {SQLITE_WRITE_TIMEOUT * 1000}')
+    db.transaction_mode = 'IMMEDIATE'
+    try:
+        yield
+    finally:
+        options.clear()
+        options.update(saved)
+        db.transaction_mode = (saved.get('transaction_mode') or '').upper() or None
+        with db.cursor() as cursor:
+            # sqlite3's default timeout is 5 seconds
+            cursor.execute(f"PRAGMA busy_timeout = {int(saved.get('timeout', 5) * 1000)}")
@@ -1,9 +1,112 @@
 import logging
+from django.db import transaction
+from api.coordinates.cache import sector_cache
 from api.schools.models import School, KS2Performance, KS4Performance, KS5Performance
-from api.utils import read_csv_generator, clean_int, check_csv_match, clean_decimal
+from api.utils import read_csv_generator, clean_int, check_csv_match, clean_decimal, delete_in_batches
+from api.pipeline import parse_rows
+from api.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+# ==========================================
+# Row Parsers (shared by both paths)
+# ==========================================
+
+# Columns each parser reads: the bulk path only projects these out of the (wide) files
+SCHOOL_COLUMNS = ['URN', 'SCHNAME', 'STREET', 'LOCALITY', 'ADDRESS3', 'POSTCODE', 'SCHOOLTYPE', 'GENDER',
+                  'SCHSTATUS', 'ISPRIMARY', 'ISSECONDARY', 'ISPOST16', 'AGELOW', 'AGEHIGH']
+KS2_COLUMNS = ['URN', 'PTRWM_EXP', 'READ_AVERAGE', 'MAT_AVERAGE']
+KS4_COLUMNS = ['URN', 'P8MEA', 'ATT8SCR']
+KS5_COLUMNS = ['URN', 'TALLPPE_ALEV_1618', 'TALLPPE_ACAD_1618', 'TALLPPEGRD_ALEV_1618', 'TALLPPEGRD_ACAD_1618']
+
+def parse_school_row(row):
+    """
+    Maps a school information row to School fields (strict column mapping).
+    """
+    return {
+        'name': row.get('SCHNAME'),
+        
+        # Location
+        'street': row.get('STREET'),
+        'locality': row.get('LOCALITY'),
+        'address3': row.get('ADDRESS3'),
+        'postcode': row.get('POSTCODE'),
+        
+        # Details
+        'school_type': row.get('SCHOOLTYPE'),
+        'gender': row.get('GENDER'),
+        
+        # Status: Check for "Closed"
+        'is_closed': check_csv_match(row.get('SCHSTATUS'), 'Closed'),
+        
+        # Phase Flags: Check for "1"
+        'is_primary': check_csv_match(row.get('ISPRIMARY'), '1'),
+        'is_secondary': check_csv_match(row.get('ISSECONDARY'), '1'),
+        'is_post16': check_csv_match(row.get('ISPOST16'), '1'),
+
+        # Age Range
+        'minimum_age': clean_int(row.get('AGELOW')),
+        'maximum_age': clean_int(row.get('AGEHIGH')),
+    }
+
+def parse_ks2_row(row):
+    """
+    Key Stage 2 Results (Reading, Writing, Maths).
+    Expects columns: PTRWM_EXP, READ_AVERAGE, MAT_AVERAGE
+    """
+    # Uses clean_decimal to handle 'SUPP'/'NE'/'65.5%' automatically
+    return {
+        'pct_meeting_expected': clean_decimal(row.get('PTRWM_EXP')),
+        'reading_score': clean_decimal(row.get('READ_AVERAGE')),
+        'maths_score': clean_decimal(row.get('MAT_AVERAGE')),
+    }
+
+def parse_ks4_row(row):
+    """
+    Key Stage 4 (GCSE) Results.
+    Expects columns: P8MEA (Progress 8), ATT8SCR (Attainment 8)
+    """
+    return {
+        # Progress 8 Score (Can be negative, clean_decimal handles this)
+        'progress_8': clean_decimal(row.get('P8MEA')),
+        
+        # Attainment 8 Score
+        'attainment_8': clean_decimal(row.get('ATT8SCR')),
+    }
+
+def _clean_grade(val):
+    """ Helper specific to Grades (Keep text, remove garbage) """
+    if not val: 
+        return None
+    # Normalize
+    s_val = str(val).strip().upper()
+    # Filter out suppression codes
+    if s_val in ['SUPP', 'NE', 'NP', 'NA', '', 'DNS']:
+        return None
+    # Return original casing stripped (e.g. "B-")
+    return str(val).strip()
+
+def parse_ks5_row(row):
+    """
+    Key Stage 5 (A-Level) Results.
+    Expects columns: 
+    - TALLPPE_ALEV_1618 (Points)
+    - TALLPPEGRD_ALEV_1618 (Grade)
+    """
+    return {
+        # Points (Decimals)
+        'a_level_points': clean_decimal(row.get('TALLPPE_ALEV_1618')),
+        'academic_points': clean_decimal(row.get('TALLPPE_ACAD_1618')),
+        
+        # Grades (Strings)
+        'a_level_grade': _clean_grade(row.get('TALLPPEGRD_ALEV_1618')),
+        'academic_grade': _clean_grade(row.get('TALLPPEGRD_ACAD_1618')),
+    }
+
+# ==========================================
+# Row-by-row Path
+# ==========================================
+
 def process_school_row(row, **kwargs):
     """
     Import basic School data using strict column mapping.
@@ -12,34 +115,7 @@ def process_school_row(row, **kwargs):
     if not urn:
         return
 
-    School.objects.update_or_create(
-        urn=urn,
-        defaults={
-            'name': row.get('SCHNAME'),
-            
-            # Location
-            'street': row.get('STREET'),
-            'locality': row.get('LOCALITY'),
-            'address3': row.get('ADDRESS3'),
-            'postcode': row.get('POSTCODE'),
-            
-            # Details
-            'school_type': row.get('SCHOOLTYPE'),
-            'gender': row.get('GENDER'),
-            
-            # Status: Check for "Closed"
-            'is_closed': check_csv_match(row.get('SCHSTATUS'), 'Closed'),
-            
-            # Phase Flags: Check for "1"
-            'is_primary': check_csv_match(row.get('ISPRIMARY'), '1'),
-            'is_secondary': check_csv_match(row.get('ISSECONDARY'), '1'),
-            'is_post16': check_csv_match(row.get('ISPOST16'), '1'),
-
-            # Age Range
-            'minimum_age': clean_int(row.get('AGELOW')),
-            'maximum_age': clean_int(row.get('AGEHIGH')),
-        }
-    )
+    School.objects.update_or_create(urn=urn, defaults=parse_school_row(row))
 
 def process_ks2_row(row, year=2024):
     """
@@ -55,15 +131,10 @@ def process_ks2_row(row, year=2024):
         return
 
     # Create or Update
-    # Uses clean_decimal to handle 'SUPP'/'NE'/'65.5%' automatically
     KS2Performance.objects.update_or_create(
         school=school,
         academic_year=year,
-        defaults={
-            'pct_meeting_expected': clean_decimal(row.get('PTRWM_EXP')),
-            'reading_score': clean_decimal(row.get('READ_AVERAGE')),
-            'maths_score': clean_decimal(row.get('MAT_AVERAGE')),
-        }
+        defaults=parse_ks2_row(row)
     )
 
 def process_ks4_row(row, year=2024):
@@ -81,13 +152,7 @@ def process_ks4_row(row, year=2024):
     KS4Performance.objects.update_or_create(
         school=school,
         academic_year=year,
-        defaults={
-            # Progress 8 Score (Can be negative, clean_decimal handles this)
-            'progress_8': clean_decimal(row.get('P8MEA')),
-            
-            # Attainment 8 Score
-            'attainment_8': clean_decimal(row.get('ATT8SCR')),
-        }
+        defaults=parse_ks4_row(row)
     )
 
 
@@ -105,30 +170,10 @@ def process_ks5_row(row, year=2024):
     except School.DoesNotExist:
         return
 
-    # Helper specific to Grades (Keep text, remove garbage)
-    def _clean_grade(val):
-        if not val: 
-            return None
-        # Normalize
-        s_val = str(val).strip().upper()
-        # Filter out suppression codes
-        if s_val in ['SUPP', 'NE', 'NP', 'NA', '', 'DNS']:
-            return None
-        # Return original casing stripped (e.g. "B-")
-        return str(val).strip()
-
     KS5Performance.objects.update_or_create(
         school=school,
         academic_year=year,
-        defaults={
-            # Points (Decimals)
-            'a_level_points': clean_decimal(row.get('TALLPPE_ALEV_1618')),
-            'academic_points': clean_decimal(row.get('TALLPPE_ACAD_1618')),
-            
-            # Grades (Strings)
-            'a_level_grade': _clean_grade(row.get('TALLPPEGRD_ALEV_1618')),
-            'academic_grade': _clean_grade(row.get('TALLPPEGRD_ACAD_1618')),
-        }
+        defaults=parse_ks5_row(row)
     )
 
 def _run_generic_import(file_path, row_processor_func, **kwargs):
@@ -156,4 +201,103 @@ def run_ks4_import_wrapper(file_path, year=2024):
     _run_generic_import(file_path, process_ks4_row, year=year)
 
 def run_ks5_import_wrapper(file_path, year=2024):
-    _run_generic_import(file_path, process_ks5_row, year=year)
\ No newline at end of file
+    _run_generic_import(file_path, process_ks5_row, year=year)
+
+# ==========================================
+# Bulk Path (URN-indexed, one upsert per file)
+# ==========================================
+
+def _build_urn_map():
+    """ Maps every school URN to its primary key, loaded once per run. """
+    return dict(School.objects.values_list('urn', 'id'))
+
+def _update_fields(model, key_fields):
+    """ Every concrete column except the primary key and the upsert key. """
+    return [
+        field.name for field in model._meta.concrete_fields
+        if not field.primary_key and field.name not in key_fields
+    ]
+
+def _run_bulk_performance_import(file_path, model, row_parser, columns, year, row_filter=None, workers=None):
+    """
+    Collects every result row of the file and upserts them in one go
+    on (school, academic_year). Unknown URNs are skipped.
+    Rows are parsed by `workers` processes (see api.pipeline.parse_rows).
+    """
+    urn_map = _build_urn_map()
+
+    # Keyed by school: a repeated URN overwrites, as update_or_create would
+    records = {}
+    parse = metrics.stats('parse')
+    rows = parse_rows(file_path, columns, row_parser, folder="", row_filter=row_filter, workers=workers)
+    for row, data in parse.track(rows):
+        school_id = urn_map.get(row.get('URN'))
+        if school_id is None:
+            parse.skipped += 1
+            continue
+        records[school_id] = model(school_id=school_id, academic_year=year, **data)
+
+    with transaction.atomic(), metrics.phase('write') as write:
+        model.objects.bulk_create(
+            list(records.values()),
+            update_conflicts=True,
+            unique_fields=['school', 'academic_year'],
+            update_fields=_update_fields(model, ('school', 'academic_year')),
+        )
+        write.written += len(records)
+
+    logger.info(f"Processed {parse.read} rows from {file_path}, {len(records)} results saved")
+
+def run_school_base_bulk_import(file_path, year=2024, row_filter=None, workers=None):
+    """
+    Upserts every school of the file in one go on URN.
+    Sectors are resolved in one call instead of one query per save().
+    """
+    schools = {}
+    parse = metrics.stats('parse')
+    rows = parse_rows(file_path, SCHOOL_COLUMNS, parse_school_row, folder="", row_filter=row_filter, workers=workers)
+    for row, data in parse.track(rows):
+        urn = row.get('URN')
+        if urn:
+            schools[urn] = data
+        else:
+            parse.skipped += 1
+
+    sectors = sector_cache.resolve_many(data['postcode'] for data in schools.values())
+
+    objs = []
+    for urn, data in schools.items():
+        sector_name = sectors.get(data['postcode'])
+        if sector_name is None:
+            logger.warning(f"Skipping school {urn}: no sector for postcode '{data['postcode']}'")
+            parse.skipped += 1
+            continue
+        objs.append(School(urn=urn, postcode_sector_id=sector_name, **data))
+
+    with transaction.atomic(), metrics.phase('write') as write:
+        School.objects.bulk_create(
+            objs,
+            update_conflicts=True,
+            unique_fields=['urn'],
+            update_fields=_update_fields(School, ('urn',)),
+        )
+        write.written += len(objs)
+
+    logger.info(f"Processed {len(schools)} schools from {file_path}, {len(objs)} saved")
+
+def run_ks2_bulk_import(file_path, year=2024, row_filter=None, workers=None):
+    _run_bulk_performance_import(file_path, KS2Performance, parse_ks2_row, KS2_COLUMNS, year, row_filter, workers)
+
+def run_ks4_bulk_import(file_path, year=2024, row_filter=None, workers=None):
+    _run_bulk_performance_import(file_path, KS4Performance, parse_ks4_row, KS4_COLUMNS, year, row_filter, workers)
+
+def run_ks5_bulk_import(file_path, year=2024, row_filter=None, workers=None):
+    _run_bulk_performance_import(file_path, KS5Performance, parse_ks5_row, KS5_COLUMNS, year, row_filter, workers)
+
+def delete_schools(urns):
+    """ Removes schools that disappeared from the source file (results cascade). """
+    return delete_in_batches(School.objects.all(), 'urn', urns)
+
+def delete_performance(model, urns, year=2024):
+    """ Removes one year's results of schools missing from a KS file. """
+    return delete_in_batches(model.objects.filter(academic_year=year), 'school__urn', urns)
@@ -1,3 +1,6 @@
+import os
+import csv
+import tempfile
 from django.test import TestCase
 from unittest.mock import patch
 from api.coordinates.models import Coordinates
@@ -9,7 +12,10 @@ from api.schools.importer import (
     process_ks5_row,
     run_school_base_import,
     run_ks2_import_wrapper,
-    run_ks4_import_wrapper
+    run_ks4_import_wrapper,
+    run_school_base_bulk_import,
+    run_ks2_bulk_import,
+    run_ks5_bulk_import,
 )
 
 class SchoolImporterRowTest(TestCase):
@@ -388,3 +394,76 @@ class ImporterWrapperParameterTest(TestCase):
         
         # Assert it was passed down
         mock_process.assert_called_once_with({'URN': '1'}, year=2025)
+
+class BulkImporterTest(TestCase):
+    def setUp(self):
+        Coordinates.objects.create(name='RG1 1')
+        Coordinates.objects.create(name='RG6 1')
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_csv(self, name, headers, rows):
+        path = os.path.join(self.tmp_dir.name, name)
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(headers)
+            writer.writerows(rows)
+        return path
+
+    def test_school_base_bulk_import(self):
+        """
+        Upserts schools on URN and links sectors without a save() per row.
+        Schools in unknown sectors are skipped.
+        """
+        School.objects.create(urn='100001', name='Old Name', postcode='RG1 1AA')
+        path = self.write_csv('schools.csv', ['URN', 'SCHNAME', 'POSTCODE', 'SCHSTATUS', 'ISPRIMARY', 'AGELOW', 'AGEHIGH'], [
+            ['100001', 'New Name', 'RG1 1AA', 'Open', '1', '4', '11'],
+            ['109776', 'Alfred Sutton Primary School', 'RG6 1JR', 'Closed', '1', '3', '11'],
+            ['999999', 'Far Away School', 'ZZ99 9ZZ', 'Open', '0', '', ''],
+        ])
+
+        run_school_base_bulk_import(path)
+
+        self.assertEqual(School.objects.count(), 2)
+        updated = School.objects.get(urn='100001')
+        self.assertEqual(updated.name, 'New Name')
+        self.assertEqual(updated.maximum_age, 11)
+        created = School.objects.get(urn='109776')
+        self.assertEqual(created.postcode_sector_id, 'RG6 1')
+        self.assertTrue(created.is_closed)
+
+    def test_ks2_bulk_import_upserts_on_school_and_year(self):
+        school = School.objects.create(urn='100100', name='Test Primary', postcode='RG1 1AA')
+        KS2Performance.objects.create(school=school, academic_year=2024, reading_score=100)
+        path = self.write_csv('ks2.csv', ['URN', 'PTRWM_EXP', 'READ_AVERAGE', 'MAT_AVERAGE'], [
+            ['100100', '65.5%', '110', 'SUPP'],
+            ['999999', '100', '100', '100'],  # Unknown URN: skipped
+        ])
+
+        run_ks2_bulk_import(path, year=2024)
+
+        self.assertEqual(KS2Performance.objects.count(), 1)
+        result = KS2Performance.objects.get(school=school)
+        self.assertEqual(float(result.reading_score), 110.0)
+        self.assertEqual(float(result.pct_meeting_expected), 65.5)
+        self.assertIsNone(result.maths_score)
+
+    def test_ks5_bulk_import_runs_constant_queries(self):
+        """ URN map + one upsert, whatever the number of rows """
+        for urn in ('100300', '100301', '100302'):
+            School.objects.create(urn=urn, name=f'College {urn}', postcode='RG1 1AA')
+        path = self.write_csv('ks5.csv', ['URN', 'TALLPPE_ALEV_1618', 'TALLPPEGRD_ALEV_1618'], [
+            ['100300', '35.50', 'B-'],
+            ['100301', 'SUPP', 'SUPP'],
+            ['100302', '40.00', 'A'],
+        ])
+
+        # URN map, savepoint, bulk upsert, release savepoint
+        with self.assertNumQueries(4):
+            run_ks5_bulk_import(path, year=2023)
+
+        self.assertEqual(KS5Performance.objects.filter(academic_year=2023).count(), 3)
+        self.assertEqual(KS5Performance.objects.get(school__urn='100300').a_level_grade, 'B-')
+        self.assertIsNone(KS5Performance.objects.get(school__urn='100301').a_level_grade)
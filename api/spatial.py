@@ -0,0 +1,180 @@
+import math
+
+# ===== Geo Utilities =====
+EARTH_RADIUS_M = 6371008.8
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance in metres between two (lat, lon) points in degrees.
+    """
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+# ===== Spatial Index =====
+class GridIndex:
+    """
+    Uniform lat/lon grid over a set of points with great-circle distances.
+    Supports nearest, k-nearest and radius queries.
+
+    Points are (key, lat, lon) tuples; points without coordinates are ignored.
+    Doesn't handle the +/-180 meridian wrap (fine for UK data).
+
+    Example:
+        index = GridIndex([('RG1 1', 51.4569, -0.9731), ('RG1 2', 51.45, -0.96)])
+        index.nearest(51.455, -0.97)      -> ('RG1 1', 190.3)
+        index.k_nearest(51.455, -0.97, 2) -> [('RG1 1', 190.3), ('RG1 2', 740.1)]
+    """
+    def __init__(self, points, cell_deg=None):
+        self._points = [
+            (key, float(lat), float(lon))
+            for key, lat, lon in points
+            if lat is not None and lon is not None
+        ]
+        self._cells = {}
+
+        if not self._points:
+            self._cell_deg = cell_deg or 1.0
+            self._min_cos = 1.0
+            return
+
+        lats = [lat for _, lat, _ in self._points]
+        lons = [lon for _, _, lon in self._points]
+
+        # Default cell size: about one point per cell on average
+        if cell_deg is None:
+            area = max(max(lats) - min(lats), 1e-3) * max(max(lons) - min(lons), 1e-3)
+            cell_deg = max(math.sqrt(area / len(self._points)), 1e-4)
+        self._cell_deg = cell_deg
+
+        # Lowest cos(latitude) of the data set, used for the distance lower bound
+        self._min_cos = math.cos(math.radians(max(abs(lat) for lat in lats)))
+
+        for point in self._points:
+            self._cells.setdefault(self._cell(point[1], point[2]), []).append(point)
+
+        rows = [i for i, _ in self._cells]
+        cols = [j for _, j in self._cells]
+        self._bounds = (min(rows), max(rows), min(cols), max(cols))
+
+    def __len__(self):
+        return len(self._points)
+
+    def points(self):
+        """ The indexed [(key, lat, lon)] points. """
+        return list(self._points)
+
+    def _cell(self, lat, lon):
+        return (math.floor(lat / self._cell_deg), math.floor(lon / self._cell_deg))
+
+    def _ring(self, ci, cj, r):
+        """ Yields the points of the cells exactly r cells away from (ci, cj). """
+        cells = self._cells
+        if r == 0:
+            yield from cells.get((ci, cj), ())
+            return
+
+        # Clip the ring to the occupied part of the grid
+        min_i, max_i, min_j, max_j = self._bounds
+        j_from, j_to = max(cj - r, min_j), min(cj + r, max_j)
+        i_from, i_to = max(ci - r + 1, min_i), min(ci + r - 1, max_i)
+
+        for i in (ci - r, ci + r):
+            if min_i <= i <= max_i:
+                for j in range(j_from, j_to + 1):
+                    yield from cells.get((i, j), ())
+        for j in (cj - r, cj + r):
+            if min_j <= j <= max_j:
+                for i in range(i_from, i_to + 1):
+                    yield from cells.get((i, j), ())
+
+    def _ring_range(self, ci, cj):
+        """
+        First and last ring radius that can hold cells:
+        rings closer than the grid's bounding box are empty.
+        """
+        min_i, max_i, min_j, max_j = self._bounds
+        di = max(min_i - ci, ci - max_i, 0)
+        dj = max(min_j - cj, cj - max_j, 0)
+        last = max(abs(ci - min_i), abs(ci - max_i), abs(cj - min_j), abs(cj - max_j))
+        return max(di, dj), last
+
+    def _lower_bound_m(self, r, lat):
+        """
+        Smallest possible distance to a point outside rings 0..r.
+        Such a point is at least r cells away in latitude or in longitude.
+        """
+        if r <= 0:
+            return 0.0
+        delta = math.radians(r * self._cell_deg)
+        lat_bound = EARTH_RADIUS_M * delta
+        cos_lat = min(self._min_cos, math.cos(math.radians(lat)))
+        lon_bound = 2 * EARTH_RADIUS_M * math.asin(min(1.0, cos_lat * math.sin(min(delta, math.pi) / 2)))
+        return min(lat_bound, lon_bound)
+
+    def k_nearest(self, lat, lon, k, max_m=None):
+        """
+        Returns up to k [(key, distance_m)] sorted by distance,
+        only among the points within max_m metres when given.
+        """
+        if k <= 0 or not self._points:
+            return []
+
+        ci, cj = self._cell(lat, lon)
+        first_ring, last_ring = self._ring_range(ci, cj)
+        found = []
+
+        for r in range(first_ring, last_ring + 1):
+            # Everything further out is beyond the cutoff
+            if max_m is not None and self._lower_bound_m(r - 1, lat) > max_m:
+                break
+            for key, p_lat, p_lon in self._ring(ci, cj, r):
+                dist = haversine_m(lat, lon, p_lat, p_lon)
+                if max_m is None or dist <= max_m:
+                    found.append((dist, key))
+
+            # Stop once nothing outside the rings can beat the k-th best
+            if len(found) >= k:
+                found.sort(key=lambda item: item[0])
+                del found[k:]
+                if found[-1][0] <= self._lower_bound_m(r, lat):
+                    break
+
+        found.sort(key=lambda item: item[0])
+        return [(key, dist) for dist, key in found[:k]]
+
+    def nearest(self, lat, lon, max_m=None):
+        """
+        Returns (key, distance_m) of the closest point, or None if the index is empty
+        (or nothing is within max_m metres).
+        """
+        result = self.k_nearest(lat, lon, 1, max_m)
+        return result[0] if result else None
+
+    def within(self, lat, lon, radius_m):
+        """
+        Returns every [(key, distance_m)] within radius_m metres, sorted by distance.
+        """
+        if not self._points:
+            return []
+
+        ci, cj = self._cell(lat, lon)
+        first_ring, last_ring = self._ring_range(ci, cj)
+        found = []
+
+        for r in range(first_ring, last_ring + 1):
+            # Everything further out is beyond the radius
+            if self._lower_bound_m(r - 1, lat) > radius_m:
+                break
+            for key, p_lat, p_lon in self._ring(ci, cj, r):
+                dist = haversine_m(lat, lon, p_lat, p_lon)
+                if dist <= radius_m:
+                    found.append((dist, key))
+
+        found.sort(key=lambda item: item[0])
+        return [(key, dist) for dist, key in found]
@@ -1,9 +1,11 @@
 from unittest.mock import patch
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from api.management.commands.import_all_data import Command
 from django.test import TestCase
 from io import StringIO
 import os
+import tempfile
 from unittest.mock import MagicMock, patch
 from api.management.commands.import_all_data import log_task
 
@@ -72,16 +74,51 @@ class TaskLoggerDecoratorTest(TestCase):
         self.mock_command.stdout.write.assert_any_call("ERROR:   [FAIL] Error in Test Task: Bad Data")
 
 class ImportAllDataTest(TestCase):
+    def setUp(self):
+        # The report and the crime cache go to a temp dir, not the checkout
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.report = os.path.join(self.tmp_dir.name, 'import_metrics.json')
+        self.crime_cache = os.path.join(self.tmp_dir.name, 'crime_cache')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def import_all(self, out):
+        call_command('import_all_data', report=self.report, crime_cache=self.crime_cache, stdout=out)
+
     def test_io_messages(self):
         """
         Test the function havs start and finish message
         also mean can run through without interruption.
         """
         out = StringIO()
-        call_command('import_all_data', stdout=out)
+        self.import_all(out)
         self.assertIn('--- Starting Global Import ---', out.getvalue())
         # if there are any error, it should stop, cannot see finish message
         self.assertIn('--- All Imports Finished ---', out.getvalue())
+        self.assertTrue(os.path.exists(self.report))
+
+    @patch('api.management.commands.import_all_data.run_monthly_crime_import')
+    @patch('api.management.commands.import_all_data.run_street_crime_import')
+    @patch('api.management.commands.import_all_data.run_crime_import')
+    @patch('api.management.commands.import_all_data.run_coordinate_import', side_effect=ValueError("Bad Data"))
+    def test_failed_prerequisite_stops_dependents(self, mock_coordinates, mock_crimes, mock_street_crimes,
+                                                  mock_monthly_crimes):
+        """
+        Coordinates failing must stop every dependent import
+        and surface as a CommandError instead of being swallowed.
+        """
+        out = StringIO()
+        with self.assertRaises(CommandError):
+            self.import_all(out)
+
+        # Whichever crime source is present (aggregated CSV or street files)
+        mock_crimes.assert_not_called()
+        mock_street_crimes.assert_not_called()
+        mock_monthly_crimes.assert_not_called()
+        self.assertIn('[FAIL] Error in Coordinates: Bad Data', out.getvalue())
+        self.assertIn('prerequisite failed: Coordinates', out.getvalue())
+        self.assertIn('--- All Imports Finished ---', out.getvalue())
 
     # [TODO: do i need to add more tests here?]
 
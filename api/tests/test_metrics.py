@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase
+from api.coordinates.models import Coordinates
+from api.metrics import ImportMetrics, query_logging_disabled
+
+class ImportMetricsTest(TestCase):
+    def test_phases_count_rows_and_queries(self):
+        metrics = ImportMetrics()
+
+        with metrics.importer('Coordinates') as record:
+            parse = metrics.stats('parse')
+            names = list(parse.track(['RG1 1', 'RG1 2', '']))
+            parse.skipped += 1
+
+            for _ in range(2):  # repeated phases accumulate
+                with metrics.phase('write') as write:
+                    Coordinates.objects.create(name=names.pop(0))
+                    write.written += 1
+            record['status'] = 'ok'
+
+        report = metrics.report()['importers']['Coordinates']
+        self.assertEqual(report['status'], 'ok')
+        self.assertEqual(report['queries'], 2)
+        self.assertEqual(report['phases']['parse']['rows_read'], 3)
+        self.assertEqual(report['phases']['parse']['rows_skipped'], 1)
+        self.assertEqual(report['phases']['parse']['queries'], 0)
+        self.assertEqual(report['phases']['write']['rows_written'], 2)
+        self.assertEqual(report['phases']['write']['queries'], 2)
+
+    def test_phases_outside_an_importer_are_not_recorded(self):
+        metrics = ImportMetrics()
+        with metrics.phase('write') as write:
+            write.written += 1
+
+        self.assertEqual(metrics.report()['importers'], {})
+
+    def test_query_logging_disabled(self):
+        with self.settings(DEBUG=True):
+            with query_logging_disabled():
+                # Per connection: the global setting is untouched
+                self.assertTrue(settings.DEBUG)
+                Coordinates.objects.count()
+                self.assertEqual(len(connection.queries), 0)
+            Coordinates.objects.count()
+            self.assertEqual(len(connection.queries), 1)
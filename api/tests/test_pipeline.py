@@ -0,0 +1,62 @@
+import os
+import csv
+import gzip
+import shutil
+import tempfile
+from django.test import SimpleTestCase
+from api.pipeline import split_byte_ranges, parse_rows
+from api.schools.importer import parse_ks4_row, KS4_COLUMNS
+
+class PipelineTest(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.NamedTemporaryFile('w', suffix='.csv', newline='', delete=False)
+        writer = csv.writer(self.tmp)
+        writer.writerow(['URN', 'SCHNAME', 'P8MEA', 'ATT8SCR'])
+        for i in range(200):
+            writer.writerow([str(100000 + i), f'School {i}', '0.5' if i % 2 else 'SUPP', f'{40 + i % 10}.1'])
+        self.tmp.close()
+
+    def tearDown(self):
+        os.remove(self.tmp.name)
+
+    def test_byte_ranges_cover_the_body_on_line_boundaries(self):
+        header, ranges = split_byte_ranges(self.tmp.name, range_bytes=100)
+
+        with open(self.tmp.name, 'rb') as f:
+            data = f.read()
+        self.assertEqual(header, data.split(b'\n')[0] + b'\n')
+        self.assertEqual(ranges[0][0], len(header))
+        self.assertEqual(ranges[-1][1], len(data))
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, start)
+            self.assertEqual(data[end - 1:end], b'\n')
+
+    def test_workers_match_in_process_results(self):
+        """ same rows, same order, whatever the number of workers """
+        expected = list(parse_rows(self.tmp.name, KS4_COLUMNS, parse_ks4_row, workers=1))
+        result = list(parse_rows(self.tmp.name, KS4_COLUMNS, parse_ks4_row, workers=2, range_bytes=500))
+
+        self.assertEqual(len(expected), 200)
+        self.assertEqual(result, expected)
+        self.assertIsNone(result[0][1]['progress_8'])
+
+    def test_row_filter_keeps_pairs_aligned(self):
+        keep_odd = lambda rows: (row for row in rows if int(row['URN']) % 2)
+        result = list(parse_rows(self.tmp.name, KS4_COLUMNS, parse_ks4_row, row_filter=keep_odd,
+                                 workers=2, range_bytes=500))
+
+        self.assertEqual(len(result), 100)
+        for row, parsed in result:
+            self.assertTrue(int(row['URN']) % 2)
+            self.assertIsNotNone(parsed['progress_8'])
+
+    def test_gzip_file_parsed_in_blocks(self):
+        """ compressed files can't be split into byte ranges: blocks are read here and sent to the workers """
+        gz_path = self.tmp.name + '.gz'
+        with open(self.tmp.name, 'rb') as src, gzip.open(gz_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        self.addCleanup(os.remove, gz_path)
+
+        expected = list(parse_rows(self.tmp.name, KS4_COLUMNS, parse_ks4_row, workers=1))
+        self.assertEqual(list(parse_rows(gz_path, KS4_COLUMNS, parse_ks4_row, workers=1)), expected)
+        self.assertEqual(list(parse_rows(gz_path, KS4_COLUMNS, parse_ks4_row, workers=2, range_bytes=500)), expected)
@@ -0,0 +1,84 @@
+import threading
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from api.scheduler import ImportTask, run_task_graph, sqlite_write_queue, OK, SKIPPED, FAILED, BLOCKED
+
+class TaskGraphTest(SimpleTestCase):
+    def setUp(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def task(self, name, depends_on=(), result=OK, error=None):
+        def func():
+            with self.lock:
+                self.calls.append(name)
+            if error:
+                raise error
+            return result
+        return ImportTask(name, func, depends_on=depends_on)
+
+    def test_dependencies_run_first(self):
+        tasks = [
+            self.task("KS2", depends_on=["Schools"]),
+            self.task("Schools", depends_on=["Coordinates"]),
+            self.task("Coordinates"),
+        ]
+        run_task_graph(tasks)
+
+        self.assertEqual(self.calls, ["Coordinates", "Schools", "KS2"])
+        self.assertTrue(all(task.status == OK for task in tasks))
+
+    def test_failure_blocks_dependents_only(self):
+        tasks = [
+            self.task("Coordinates"),
+            self.task("Schools", depends_on=["Coordinates"], error=ValueError("bad row")),
+            self.task("KS2", depends_on=["Schools"]),
+            self.task("Crimes", depends_on=["Coordinates"]),
+        ]
+        run_task_graph(tasks)
+
+        statuses = {task.name: task.status for task in tasks}
+        self.assertEqual(statuses, {"Coordinates": OK, "Schools": FAILED, "KS2": BLOCKED, "Crimes": OK})
+        self.assertNotIn("KS2", self.calls)
+        self.assertIsInstance(tasks[1].error, ValueError)
+
+    def test_skipped_task_does_not_block(self):
+        tasks = [self.task("Schools", result=SKIPPED), self.task("KS2", depends_on=["Schools"])]
+        run_task_graph(tasks)
+
+        self.assertEqual(tasks[1].status, OK)
+
+    def test_unknown_status_counts_as_failed(self):
+        for workers in (1, 2):
+            tasks = [self.task("Schools", result='done'), self.task("KS2", depends_on=["Schools"])]
+            run_task_graph(tasks, workers=workers)
+
+            self.assertEqual([task.status for task in tasks], [FAILED, BLOCKED])
+            self.assertIn("unknown status", str(tasks[0].error))
+
+    def test_independent_tasks_run_in_parallel(self):
+        """ Both tasks must be running at the same time to pass the barrier """
+        barrier = threading.Barrier(2, timeout=5)
+        tasks = [
+            ImportTask("Crimes", lambda: barrier.wait() and OK),
+            ImportTask("Houses", lambda: barrier.wait() and OK),
+        ]
+        run_task_graph(tasks, workers=2)
+
+        self.assertEqual([task.status for task in tasks], [OK, OK])
+
+    def test_rejects_cycles_and_unknown_dependencies(self):
+        with self.assertRaises(ValueError):
+            run_task_graph([self.task("A", depends_on=["B"]), self.task("B", depends_on=["A"])])
+        with self.assertRaises(ValueError):
+            run_task_graph([self.task("A", depends_on=["Missing"])])
+
+
+class SqliteWriteQueueTest(TestCase):
+    def test_immediate_transactions_only_inside(self):
+        self.assertIsNone(connection.settings_dict['OPTIONS'].get('transaction_mode'))
+        with sqlite_write_queue():
+            self.assertEqual(connection.settings_dict['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+            self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+        self.assertIsNone(connection.settings_dict['OPTIONS'].get('transaction_mode'))
+        self.assertIsNone(connection.transaction_mode)
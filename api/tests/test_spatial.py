@@ -0,0 +1,56 @@
+import random
+from django.test import SimpleTestCase
+from api.spatial import GridIndex, haversine_m
+
+class HaversineTest(SimpleTestCase):
+    def test_known_distance(self):
+        """ Reading station -> London Paddington is roughly 56 km as the crow flies """
+        dist = haversine_m(51.4588, -0.9719, 51.5154, -0.1755)
+        self.assertAlmostEqual(dist / 1000, 55.7, delta=1)
+
+    def test_same_point_is_zero(self):
+        self.assertEqual(haversine_m(51.45, -0.97, 51.45, -0.97), 0)
+
+class GridIndexTest(SimpleTestCase):
+    def setUp(self):
+        rng = random.Random(42)
+        self.points = [(f"P{i}", rng.uniform(51.3, 51.6), rng.uniform(-1.2, -0.7)) for i in range(500)]
+        self.index = GridIndex(self.points + [('NO COORDS', None, None)])
+        self.queries = [(rng.uniform(51.0, 51.9), rng.uniform(-1.5, -0.4)) for _ in range(50)]
+
+    def brute_force(self, lat, lon):
+        return sorted((haversine_m(lat, lon, p_lat, p_lon), key) for key, p_lat, p_lon in self.points)
+
+    def test_points_without_coordinates_are_ignored(self):
+        self.assertEqual(len(self.index), 500)
+
+    def test_nearest_matches_brute_force(self):
+        for lat, lon in self.queries:
+            expected = self.brute_force(lat, lon)[0]
+            key, dist = self.index.nearest(lat, lon)
+            self.assertEqual(key, expected[1])
+            self.assertAlmostEqual(dist, expected[0])
+
+    def test_k_nearest_matches_brute_force(self):
+        for lat, lon in self.queries:
+            expected = [key for _, key in self.brute_force(lat, lon)[:5]]
+            self.assertEqual([key for key, _ in self.index.k_nearest(lat, lon, 5)], expected)
+
+    def test_within_matches_brute_force(self):
+        for lat, lon in self.queries:
+            expected = [key for dist, key in self.brute_force(lat, lon) if dist <= 3000]
+            self.assertEqual([key for key, _ in self.index.within(lat, lon, 3000)], expected)
+
+    def test_nearest_within_a_cutoff(self):
+        for lat, lon in self.queries:
+            dist, key = self.brute_force(lat, lon)[0]
+            self.assertEqual(self.index.nearest(lat, lon, max_m=dist + 1), (key, dist))
+            self.assertIsNone(self.index.nearest(lat, lon, max_m=dist - 1))
+        # Far away from every point
+        self.assertIsNone(self.index.nearest(10.0, 40.0, max_m=5000))
+
+    def test_empty_index(self):
+        index = GridIndex([])
+        self.assertIsNone(index.nearest(51.45, -0.97))
+        self.assertEqual(index.k_nearest(51.45, -0.97, 3), [])
+        self.assertEqual(index.within(51.45, -0.97, 500), [])
@@ -1,9 +1,12 @@
 import os
 import csv
+import gzip
+import zipfile
 import tempfile
 from django.test import TestCase, SimpleTestCase
 from django.conf import settings
-from api.utils import check_csv_match, read_csv_generator, extract_sector_from_postcode, clean_decimal, clean_int
+from api.utils import check_csv_match, read_csv_generator, read_csv_columns, extract_sector_from_postcode, clean_decimal, clean_int
+from api.utils import find_source, list_sources, source_exists
 
 class CsvUtilsTest(TestCase):
     def setUp(self):
@@ -41,6 +44,26 @@ class CsvUtilsTest(TestCase):
         with self.assertRaises(FileNotFoundError):
             list(read_csv_generator(wrong_path))
 
+    def test_read_csv_columns_projects_and_strips(self):
+        """ only the requested columns come back, in the requested order """
+        rows = list(read_csv_columns(self.filename, ['Nearby Sectors', 'Postcode']))
+
+        self.assertEqual(rows[0][1], 'RG1 1')
+        self.assertTrue(rows[0][0].startswith('RG1 8'))
+
+    def test_read_csv_columns_missing_column(self):
+        """ missing columns fail loudly unless strict=False """
+        with self.assertRaises(ValueError):
+            list(read_csv_columns(self.filename, ['Postcode', 'Latitude']))
+
+        rows = list(read_csv_columns(self.filename, ['Postcode', 'Latitude'], strict=False))
+        self.assertEqual(rows, [('RG1 1', '')])
+
+    def test_read_csv_generator_with_columns(self):
+        """ dict rows restricted to the projected columns """
+        rows = list(read_csv_generator(self.filename, columns=['Postcode']))
+        self.assertEqual(rows, [{'Postcode': 'RG1 1'}])
+
     def test_check_csv_match(self):
         # 1. Testing Boolean Flags (The '1' case)
         self.assertTrue(check_csv_match('1', '1'))
@@ -106,4 +129,54 @@ class UtilsCleaningTest(TestCase):
         """ Test integer specific wrapper """
         self.assertEqual(clean_int("1,050"), 1050)
         self.assertEqual(clean_int("1050.0"), 1050) # Floats to Ints
-        self.assertIsNone(clean_int("SUPP"))
\ No newline at end of file
+        self.assertIsNone(clean_int("SUPP"))
+
+class ArchiveSourceTest(SimpleTestCase):
+    """ .gz files and zip members are read like plain CSVs, without unpacking """
+    CONTENT = 'URN,SCHNAME\n100001,Alpha\n100002,Beta\n'
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.dir = self.tmp_dir.name
+        with gzip.open(os.path.join(self.dir, 'schools.csv.gz'), 'wt', encoding='utf-8') as f:
+            f.write(self.CONTENT)
+        with zipfile.ZipFile(os.path.join(self.dir, 'feed.zip'), 'w', zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr('2024-01/2024-01-street.csv', self.CONTENT)
+            archive.writestr('2024-02/2024-02-street.csv', self.CONTENT)
+            archive.writestr('readme.txt', 'not data')
+        with zipfile.ZipFile(os.path.join(self.dir, 'single.csv.zip'), 'w', zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr('export_2024.csv', '\ufeff' + self.CONTENT)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def read(self, path):
+        return list(read_csv_columns(path, ['SCHNAME']))
+
+    def test_gzip_and_zip_members(self):
+        expected = [('Alpha',), ('Beta',)]
+        self.assertEqual(self.read(os.path.join(self.dir, 'schools.csv.gz')), expected)
+        self.assertEqual(self.read(os.path.join(self.dir, 'feed.zip!2024-02/2024-02-street.csv')), expected)
+        # A zip holding one file is read as that file (BOM included)
+        self.assertEqual(self.read(os.path.join(self.dir, 'single.csv.zip')), expected)
+        self.assertEqual(next(read_csv_generator(os.path.join(self.dir, 'schools.csv.gz'))), {'URN': '100001', 'SCHNAME': 'Alpha'})
+
+    def test_missing_member(self):
+        path = os.path.join(self.dir, 'feed.zip!nope.csv')
+        self.assertFalse(source_exists(path))
+        with self.assertRaises(FileNotFoundError):
+            self.read(path)
+        with self.assertRaises(ValueError):
+            self.read(os.path.join(self.dir, 'feed.zip'))
+
+    def test_find_and_list_sources(self):
+        self.assertEqual(find_source(os.path.join(self.dir, 'schools.csv')), os.path.join(self.dir, 'schools.csv.gz'))
+        self.assertEqual(find_source(os.path.join(self.dir, 'single.csv')), os.path.join(self.dir, 'single.csv.zip'))
+        self.assertEqual(find_source(os.path.join(self.dir, 'feed')), os.path.join(self.dir, 'feed.zip'))
+        self.assertEqual(find_source(os.path.join(self.dir, 'other.csv')), os.path.join(self.dir, 'other.csv'))
+
+        archive = os.path.join(self.dir, 'feed.zip')
+        self.assertEqual(list_sources(archive, '*/*-street.csv'), [
+            archive + '!2024-01/2024-01-street.csv',
+            archive + '!2024-02/2024-02-street.csv',
+        ])
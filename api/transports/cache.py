@@ -0,0 +1,168 @@
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from django.db import transaction
+from django.db.models import F
+from api.transports.models import TransportStop, BusRoute, RouteIndexVersion
+from api.transports.gtfs import bitset_members
+from api.spatial import GridIndex
+
+class RouteTables(namedtuple('RouteTables', [
+    'version',        # RouteIndexVersion the snapshot was built from
+    'routes',         # route names; a route's id is its position (busiest first)
+    'stop_routes',    # {stop_id: route bitset}, every stop (0 without routes)
+    'sectors',        # sector names served by a route; a sector's id is its position
+    'sector_routes',  # {sector name: route bitset}
+    'route_sectors',  # [sector bitset] per route id
+    'stops',          # GridIndex of the stops (keys are stop_ids)
+])):
+    """
+    One consistent snapshot of the index (readers never see half a rebuild).
+    A request takes one snapshot and runs every lookup on it, so the route
+    ids of its bitsets keep meaning the same routes.
+    """
+    __slots__ = ()
+
+    def routes_at(self, stop_ids):
+        """ Route bitset of every route calling at any of the stops. """
+        mask = 0
+        for stop_id in stop_ids:
+            mask |= self.stop_routes.get(stop_id, 0)
+        return mask
+
+    def sectors_served(self, route_mask):
+        """ {sector name: bitset of its routes among route_mask}, for every sector served by one of them. """
+        sector_mask = 0
+        for route_id in bitset_members(route_mask):
+            sector_mask |= self.route_sectors[route_id]
+        return {
+            self.sectors[i]: self.sector_routes[self.sectors[i]] & route_mask
+            for i in bitset_members(sector_mask)
+        }
+
+    def stops_within(self, lat, lon, radius_m):
+        """ [(stop_id, distance_m)] of every stop within radius_m metres, nearest first. """
+        return self.stops.within(lat, lon, radius_m)
+
+    def route_names(self, route_mask):
+        """ Names of the routes of a bitset, busiest first. """
+        return [self.routes[route_id] for route_id in bitset_members(route_mask)]
+
+class RouteIndex:
+    """
+    Process-wide bitset index of which bus routes serve which sectors,
+    for the commute search. Built from the transport tables (three
+    queries), cleared by the transport importers and by the signals
+    (see api/transports/signals.py) when stops or routes change.
+    Clearing also bumps RouteIndexVersion, and every tables() call reads
+    it (one query): a re-import in another process rebuilds the index here too.
+    The signals bump it once per transaction (clear_on_commit), and not at
+    all inside deferred(), where the importers clear once at the end.
+
+    Routes are numbered by trip count, busiest first: a set of routes is
+    one int, so "which sectors share a route with these stops" is a few
+    ORs / ANDs over the route ids, without touching the database.
+    Also holds the spatial index of the stops, for radius searches.
+
+    Example:
+        tables = route_index.tables()
+        mask = tables.routes_at(['039025000002', '039025000003'])
+        tables.sectors_served(mask)  -> {'RG1 1': 0b101, 'RG4 8': 0b1}
+        tables.route_names(0b101)    -> ['17', '21']
+        tables.stops_within(51.458, -0.971, 500) -> [('039025000002', 41.2), ...]
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tables = None
+        self._local = threading.local()
+
+    def tables(self):
+        """ The current RouteTables, (re)built when missing or older than the stored version. """
+        version = self._version()
+        tables = self._tables
+        if tables is None or tables.version != version:
+            with self._lock:
+                if self._tables is None or self._tables.version != version:
+                    self._tables = self._build(version)
+                tables = self._tables
+        return tables
+
+    @staticmethod
+    def _version():
+        """ The stored RouteIndexVersion (0 before the first change). """
+        return RouteIndexVersion.objects.values_list('version', flat=True).first() or 0
+
+    def _build(self, version):
+        routes = list(BusRoute.objects.order_by('-trip_count', 'name').values_list('name', flat=True))
+        route_bits = {name: 1 << i for i, name in enumerate(routes)}
+
+        stop_rows = TransportStop.objects.values_list('stop_id', 'nearest_sector_id', 'latitude', 'longitude')
+        stop_sectors = {}
+        stop_points = []
+        for stop_id, sector, lat, lon in stop_rows.iterator(chunk_size=10000):
+            stop_sectors[stop_id] = sector
+            stop_points.append((stop_id, lat, lon))
+        stops = GridIndex(stop_points)
+        stop_routes = dict.fromkeys(stop_sectors, 0)
+        links = TransportStop.routes.through.objects.values_list('transportstop_id', 'busroute_id')
+        for stop_id, route in links.iterator(chunk_size=10000):
+            stop_routes[stop_id] |= route_bits[route]
+
+        sector_routes = {}
+        for stop_id, sector in stop_sectors.items():
+            mask = stop_routes[stop_id]
+            if sector and mask:
+                sector_routes[sector] = sector_routes.get(sector, 0) | mask
+
+        sectors = sorted(sector_routes)
+        route_sectors = [0] * len(routes)
+        for i, sector in enumerate(sectors):
+            for route_id in bitset_members(sector_routes[sector]):
+                route_sectors[route_id] |= 1 << i
+
+        return RouteTables(version, routes, stop_routes, sectors, sector_routes, route_sectors, stops)
+
+    def stops_within(self, lat, lon, radius_m):
+        """ [(stop_id, distance_m)] of every stop within radius_m metres, nearest first. """
+        return self.tables().stops_within(lat, lon, radius_m)
+
+    def clear(self):
+        """ Drops the index here and, through RouteIndexVersion, in every other process. """
+        if not RouteIndexVersion.objects.update(version=F('version') + 1):
+            RouteIndexVersion.objects.create(version=1)
+        with self._lock:
+            self._tables = None
+
+    def clear_on_commit(self):
+        """
+        Drops the index here now, and clear()s it once the current transaction
+        commits (right away outside of one): a transaction saving many stops
+        bumps the version once. Does nothing inside deferred().
+        """
+        if getattr(self._local, 'deferred', 0):
+            return
+        with self._lock:
+            self._tables = None
+        # Already queued by this transaction (a rolled back savepoint drops its callbacks)
+        if any(entry[1] == self.clear for entry in transaction.get_connection().run_on_commit):
+            return
+        transaction.on_commit(self.clear)
+
+    @contextmanager
+    def deferred(self):
+        """
+        For the bulk importers (also usable as a decorator): the signals
+        leave the index alone inside, it's cleared once on the way out,
+        after a failure too (the chunks already committed changed it).
+        """
+        self._local.deferred = getattr(self._local, 'deferred', 0) + 1
+        try:
+            yield
+        finally:
+            self._local.deferred -= 1
+            if not self._local.deferred:
+                self.clear()
+
+
+# Shared by the commute search; cleared by the transport importers
+route_index = RouteIndex()
@@ -0,0 +1,223 @@
+"""
+Streaming GTFS reader.
+
+Memory stays proportional to the number of stops and routes, not to
+stop_times (100M+ rows for a national feed):
+- route names, stops and trips are interned to dense integers
+- trip -> route is two sorted arrays (64-bit trip hash, route index)
+- stop -> routes is one integer bitset per stop, plus a call counter
+- only the needed columns of each file are read
+- the feed can be a folder or the .zip as downloaded, read member by member
+
+No database access here, so scripts can use it without Django settings.
+"""
+import io
+import os
+import csv
+import hashlib
+import multiprocessing
+from array import array
+from collections import Counter
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from api.utils import read_csv_columns, make_column_projector, source_member, is_compressed
+from api.pipeline import split_byte_ranges, line_blocks
+
+STOP_TIMES_RANGE_BYTES = 64 * 1024 * 1024
+
+# ===== Interning =====
+class Interner:
+    """ Maps string ids to dense ints 0, 1, 2... in first-seen order. """
+    def __init__(self):
+        self.index = {}
+        self.names = []
+
+    def __call__(self, name):
+        idx = self.index.get(name)
+        if idx is None:
+            idx = self.index[name] = len(self.names)
+            self.names.append(name)
+        return idx
+
+    def __len__(self):
+        return len(self.names)
+
+
+def _trip_hash(trip_id):
+    return int.from_bytes(hashlib.blake2b(trip_id.encode('utf-8'), digest_size=8).digest(), 'little')
+
+class TripRouteMap:
+    """
+    trip_id -> route index in about 12 bytes per trip: the 64-bit hashes of
+    the trip ids, sorted, and the matching route indices.
+    """
+    def __init__(self, pairs):
+        hashes = array('Q')
+        routes = array('I')
+        for trip_id, route in pairs:
+            hashes.append(_trip_hash(trip_id))
+            routes.append(route)
+
+        order = sorted(range(len(hashes)), key=hashes.__getitem__)
+        self.hashes = array('Q', (hashes[i] for i in order))
+        self.routes = array('I', (routes[i] for i in order))
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def get(self, trip_id):
+        key = _trip_hash(trip_id)
+        i = bisect_left(self.hashes, key)
+        if i < len(self.hashes) and self.hashes[i] == key:
+            return self.routes[i]
+        return None
+
+    def trip_counts(self):
+        """ {route index: number of trips} """
+        return dict(Counter(self.routes))
+
+
+# ===== Small Files =====
+def read_gtfs(folder, filename, columns):
+    """ Yields tuples of the requested columns of one GTFS file (folder may be the feed's .zip). """
+    return read_csv_columns(os.path.abspath(source_member(folder, filename)), columns, strict=False)
+
+def load_routes(folder):
+    """
+    Returns (route names Interner, {route_id: name index}).
+    Routes are grouped by short name, as shown to passengers ("17").
+    """
+    names = Interner()
+    route_of = {}
+    for route_id, short_name in read_gtfs(folder, 'routes.txt', ['route_id', 'route_short_name']):
+        if route_id:
+            route_of[route_id] = names(short_name or 'Unknown')
+    return names, route_of
+
+def load_trip_routes(folder, route_of):
+    """ TripRouteMap of every trip whose route is known. """
+    return TripRouteMap(
+        (trip_id, route_of[route_id])
+        for trip_id, route_id in read_gtfs(folder, 'trips.txt', ['trip_id', 'route_id'])
+        if trip_id and route_id in route_of
+    )
+
+def load_stops(folder):
+    """
+    Returns (stops Interner, [(name, lat, lon)]) indexed like the interner.
+    """
+    stops = Interner()
+    details = []
+    columns = ['stop_id', 'stop_name', 'stop_lat', 'stop_lon']
+    for stop_id, name, lat, lon in read_gtfs(folder, 'stops.txt', columns):
+        if stop_id and stop_id not in stops.index:
+            stops(stop_id)
+            details.append((name, lat, lon))
+    return stops, details
+
+
+# ===== stop_times Scan =====
+# Set once per worker process by _init_scan_worker
+_scan_state = {}
+
+def _init_scan_worker(trip_routes, stop_index):
+    _scan_state['trip_routes'] = trip_routes
+    _scan_state['stop_index'] = stop_index
+
+def _scan_rows(rows, trip_routes, stop_index):
+    """
+    Returns ({stop index: route bitset}, {stop index: calls}) for
+    (trip_id, stop_id) rows; a call is one trip of a known route stopping.
+    stop_times is grouped by trip, so the route is looked up once per trip.
+    """
+    masks = {}
+    calls = {}
+    current_trip = None
+    bit = 0
+    for trip_id, stop_id in rows:
+        if trip_id != current_trip:
+            current_trip = trip_id
+            route = trip_routes.get(trip_id)
+            bit = 0 if route is None else 1 << route
+        if not bit:
+            continue
+
+        stop = stop_index.get(stop_id)
+        if stop is None:
+            continue
+        calls[stop] = calls.get(stop, 0) + 1
+        mask = masks.get(stop, 0)
+        if not mask & bit:
+            masks[stop] = mask | bit
+    return masks, calls
+
+def _scan_range(path, start, end, header):
+    """ Worker task: scans one line-aligned byte range of stop_times.txt. """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        block = f.read(end - start)
+    return _scan_block(block, header)
+
+def _scan_block(block, header):
+    """ Worker task: scans the lines of one block of stop_times.txt bytes. """
+    text = block.decode('utf-8')
+    project = make_column_projector(header, ['trip_id', 'stop_id'], strict=False)
+    rows = (project(values) for values in csv.reader(io.StringIO(text, newline='')) if values)
+    return _scan_rows(rows, _scan_state['trip_routes'], _scan_state['stop_index'])
+
+def _merge_scan(masks, calls, result):
+    range_masks, range_calls = result
+    for stop, mask in range_masks.items():
+        masks[stop] = masks.get(stop, 0) | mask
+    for stop, count in range_calls.items():
+        calls[stop] = calls.get(stop, 0) + count
+
+def scan_stop_times(path, trip_routes, stops, workers=1, range_bytes=STOP_TIMES_RANGE_BYTES):
+    """
+    Streams stop_times.txt into ({stop index: route bitset}, {stop index: calls}).
+    With workers > 1, byte ranges of the file (line blocks read by this
+    process for a zip member) are scanned in that many processes; their
+    bitsets are OR-ed and their counts summed.
+    """
+    if workers <= 1:
+        rows = read_csv_columns(os.path.abspath(path), ['trip_id', 'stop_id'], strict=False)
+        return _scan_rows(rows, trip_routes, stops.index)
+
+    if is_compressed(path):
+        blocks = line_blocks(path, range_bytes)
+        header = next(blocks)
+        tasks = ((_scan_block, block) for block in blocks)
+    else:
+        header, ranges = split_byte_ranges(path, range_bytes)
+        tasks = ((_scan_range, path, start, end) for start, end in ranges)
+    header = next(csv.reader([header.decode('utf-8-sig')]), [])
+
+    masks = {}
+    calls = {}
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_scan_worker,
+        initargs=(trip_routes, stops.index),
+    ) as pool:
+        # A bounded window in flight: blocks of a zip member are held in memory until scanned
+        pending = set()
+        for task, *args in tasks:
+            pending.add(pool.submit(task, *args, header))
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    _merge_scan(masks, calls, future.result())
+        for future in as_completed(pending):
+            _merge_scan(masks, calls, future.result())
+    return masks, calls
+
+def bitset_members(mask):
+    """ 0b1011 -> [0, 1, 3] """
+    members = []
+    while mask:
+        low = mask & -mask
+        members.append(low.bit_length() - 1)
+        mask ^= low
+    return members
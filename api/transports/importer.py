@@ -1,67 +1,254 @@
-import sys
+from django.db import transaction
 from api.transports.models import TransportStop, BusRoute
-from api.coordinates.models import Coordinates
-from api.utils import read_csv_generator, clean_decimal
+from api.coordinates.cache import sector_cache
+from api.transports.cache import route_index
+from api.utils import clean_decimal, delete_in_batches, source_member, source_exists
+from api.pipeline import parse_rows
+from api.metrics import metrics
+from api.transports import gtfs
+
+# Columns refreshed when a stop already exists
+STOP_UPDATE_FIELDS = ['name', 'latitude', 'longitude', 'nearest_sector']
+# Columns read by _extract_stop_data / _parse_route_names
+STOP_COLUMNS = ['stop_id', 'stop_name', 'latitude', 'longitude', 'routes']
+
+# NaPTAN (data/transport.csv): the columns read by _parse_naptan_row, out of 40+
+NAPTAN_COLUMNS = [
+    'ATCOCode', 'CommonName', 'Indicator', 'Bearing', 'Street', 'LocalityName',
+    'StopType', 'Longitude', 'Latitude', 'Status',
+]
+# Existing stops get the NaPTAN metadata and their sector: name and position stay with the GTFS feed
+NAPTAN_UPDATE_FIELDS = ['indicator', 'bearing', 'street', 'locality', 'stop_type', 'nearest_sector']
+NAPTAN_CHUNK_SIZE = 5000
+# Stops further than this from every sector centre get no nearest_sector (national file)
+NAPTAN_SECTOR_RADIUS_M = 5000
 
 # ==========================================
 # Main Entry Point
 # ==========================================
+# The importers and deletes run inside route_index.deferred(): the route
+# index is cleared once when they return, not by the signals of every row.
 
-def run_transport_import(file_path):
+@route_index.deferred()
+def run_transport_import(file_path, row_filter=None, workers=None):
     """
     Imports transport data from a full file path.
-    Wrapper handles 'Starting'/'Finished' messages.
+    Stops and routes are upserted in bulk, then the stop <-> route
+    links are synced with one set-based diff.
+    Rows are parsed by `workers` processes (see api.pipeline.parse_rows).
+    row_filter (e.g. RowChangeTracker.filter) can drop unchanged rows.
     """
     # 1. Prepare Caches
-    sectors_cache = _get_sector_cache()
-    existing_routes_cache = _get_existing_routes_cache()
+    sector_index = sector_cache.index()
     
-    if not sectors_cache:
+    if not len(sector_index):
         print("Warning: No sectors found. Transport stops will not be linked to neighborhoods.")
 
-    count = 0
+    stops = {}
+    stop_routes = {}
     
     # 2. Iterate
     # We pass folder="" because file_path is already a full absolute path from import_all_data
-    for row in read_csv_generator(file_path, folder=""):
+    rows = parse_rows(file_path, STOP_COLUMNS, _parse_stop_row, folder="", row_filter=row_filter, workers=workers)
+
+    parse = metrics.stats('parse')
+    for row, stop_data in parse.track(rows):
         
-        # 3. Process Data
-        stop_data = _extract_stop_data(row)
+        # 3. Process Data (parsed by _parse_stop_row)
         if not stop_data: 
+            parse.skipped += 1
             continue
 
         # 4. Geometry Logic
         nearest_sector_id = _find_nearest_sector(
             stop_data['lat'], 
             stop_data['lon'], 
-            sectors_cache
+            sector_index
         )
 
-        # 5. DB Save (Stop)
-        stop_obj = _save_transport_stop(stop_data, nearest_sector_id)
+        stops[stop_data['stop_id']] = TransportStop(
+            stop_id=stop_data['stop_id'],
+            name=stop_data['name'],
+            latitude=stop_data['lat'],
+            longitude=stop_data['lon'],
+            nearest_sector_id=nearest_sector_id,
+        )
+        stop_routes[stop_data['stop_id']] = stop_data['routes']
 
-        # 6. DB Save (Routes M2M)
-        _link_routes_to_stop(stop_obj, row.get('routes'), existing_routes_cache)
-        
-        count += 1
-        
-        # Progress Printer (Every 200 steps)
-        if count % 200 == 0:
-            print(f"Processed {count} stops...")
+    # 5. DB Save (Stops, Routes, then the M2M links)
+    with transaction.atomic():
+        with metrics.phase('write') as write:
+            _bulk_upsert_stops(stops.values())
+            _bulk_create_routes(stop_routes)
+            write.written += len(stops)
+        with metrics.phase('link') as link:
+            added, removed = _sync_stop_routes(stop_routes)
+            link.written += added + removed
 
-    print(f"Import completed. Total stops processed: {count}")
+    print(f"Import completed. Total stops processed: {len(stops)}; route links +{added} / -{removed}")
 
-# ==========================================
-# Sub-Routines
-# ==========================================
+@route_index.deferred()
+def run_gtfs_import(folder, workers=1):
+    """
+    Imports a GTFS feed (folder, or the .zip as downloaded) straight into
+    the models, without the bus_stops_with_routes.csv step:
+    - routes.txt + trips.txt -> BusRoute, with its trip count
+    - stops.txt -> TransportStop
+    - stop_times.txt (optional) -> stop <-> route links and the stop's
+      trip count (service frequency)
+    Without stop_times.txt, the existing links and stop counts are kept.
+    stop_times.txt is scanned by `workers` processes (see gtfs.scan_stop_times).
+    """
+    sector_index = sector_cache.index()
+
+    if not len(sector_index):
+        print("Warning: No sectors found. Transport stops will not be linked to neighborhoods.")
+
+    # 1. Routes and their trips
+    with metrics.phase('parse') as parse:
+        route_names, route_of = gtfs.load_routes(folder)
+        trip_routes = gtfs.load_trip_routes(folder, route_of)
+        trip_counts = trip_routes.trip_counts()
+        routes = [
+            BusRoute(name=name, trip_count=trip_counts.get(idx, 0))
+            for idx, name in enumerate(route_names.names)
+        ]
+
+        # 2. Stops, then which routes call there and how often
+        stop_index, details = gtfs.load_stops(folder)
+        parse.read += len(trip_routes) + len(details)
+
+        stop_times_path = source_member(folder, 'stop_times.txt')
+        has_stop_times = source_exists(stop_times_path)
+        masks, calls = {}, {}
+        if has_stop_times:
+            masks, calls = gtfs.scan_stop_times(stop_times_path, trip_routes, stop_index, workers=workers)
+
+        stops = []
+        stop_routes = {}
+        for idx, (name, lat, lon) in enumerate(details):
+            lat = clean_decimal(lat)
+            lon = clean_decimal(lon)
+            if lat is None or lon is None:
+                parse.skipped += 1
+                continue
+
+            stop_id = stop_index.names[idx]
+            stops.append(TransportStop(
+                stop_id=stop_id,
+                name=name,
+                latitude=lat,
+                longitude=lon,
+                nearest_sector_id=_find_nearest_sector(lat, lon, sector_index),
+                trip_count=calls.get(idx, 0),
+            ))
+            stop_routes[stop_id] = {route_names.names[r] for r in gtfs.bitset_members(masks.get(idx, 0))}
 
-def _get_sector_cache():
-    return list(Coordinates.objects.values_list('name', 'latitude', 'longitude'))
+    # 3. DB Save (Routes, Stops, then the M2M links)
+    added = removed = 0
+    with transaction.atomic():
+        with metrics.phase('write') as write:
+            BusRoute.objects.bulk_create(
+                routes,
+                update_conflicts=True,
+                unique_fields=['name'],
+                update_fields=['trip_count'],
+            )
+            update_fields = STOP_UPDATE_FIELDS + ['trip_count'] if has_stop_times else STOP_UPDATE_FIELDS
+            TransportStop.objects.bulk_create(
+                stops,
+                update_conflicts=True,
+                unique_fields=['stop_id'],
+                update_fields=update_fields,
+            )
+            write.written += len(routes) + len(stops)
+        if has_stop_times:
+            with metrics.phase('link') as link:
+                added, removed = _sync_stop_routes(stop_routes)
+                link.written += added + removed
 
+    print(
+        f"GTFS import completed. {len(routes)} routes, {len(trip_routes)} trips, {len(stops)} stops; "
+        f"route links +{added} / -{removed}"
+    )
+
+@route_index.deferred()
+def run_naptan_import(file_path, row_filter=None, workers=None, chunk_size=NAPTAN_CHUNK_SIZE, checkpoint=None):
+    """
+    Imports the active stops of a NaPTAN Stops CSV (data/transport.csv, or the
+    ~400k-row national file). Only NAPTAN_COLUMNS are read and parsed by
+    `workers` processes (see api.pipeline.parse_rows); stops are upserted
+    in chunks of chunk_size, one transaction each.
+    New stops are created whole, existing ones (e.g. from GTFS) only get
+    NAPTAN_UPDATE_FIELDS; routes and trip counts are left alone.
+    Stops whose row is no longer active are removed with their chunk,
+    unless a route still calls there (see delete_naptan_stops).
+    row_filter (e.g. RowChangeTracker.filter) can drop unchanged rows.
+    checkpoint (api.imports.incremental.Checkpoint) skips the rows committed
+    by a failed run and records the offset with every chunk.
+    Returns the number of stops written.
+    """
+    sector_index = sector_cache.index()
+
+    if not len(sector_index):
+        print("Warning: No sectors found. Transport stops will not be linked to neighborhoods.")
+
+    written = 0
+    skipped = 0
+    removed = 0
+    chunk = {}
+    inactive = []
+
+    def flush():
+        nonlocal written, removed
+        with transaction.atomic(), metrics.phase('write') as write:
+            TransportStop.objects.bulk_create(
+                list(chunk.values()),
+                update_conflicts=True,
+                unique_fields=['stop_id'],
+                update_fields=NAPTAN_UPDATE_FIELDS,
+            )
+            removed += _delete_unrouted_stops(inactive)
+            if checkpoint:
+                checkpoint.commit()
+            write.written += len(chunk)
+        written += len(chunk)
+        chunk.clear()
+        inactive.clear()
+
+    rows = parse_rows(file_path, NAPTAN_COLUMNS, _parse_naptan_row, folder="", row_filter=row_filter, workers=workers)
+    if checkpoint:
+        rows = checkpoint.skip(rows)
 
-def _get_existing_routes_cache():
-    return set(BusRoute.objects.values_list('name', flat=True))
+    parse = metrics.stats('parse')
+    for row, stop_data in parse.track(rows):
+        # Inactive, or without a position
+        if not stop_data:
+            skipped += 1
+            parse.skipped += 1
+            # An active stop missing its coordinates is kept as it is
+            if row.get('ATCOCode') and (row.get('Status') or '').lower() != 'active':
+                inactive.append(row['ATCOCode'])
+            continue
+
+        chunk[stop_data['stop_id']] = TransportStop(
+            nearest_sector_id=_find_nearest_sector(
+                stop_data['latitude'], stop_data['longitude'], sector_index, NAPTAN_SECTOR_RADIUS_M),
+            **stop_data,
+        )
+
+        if len(chunk) >= chunk_size:
+            flush()
+
+    if chunk or inactive:
+        flush()
 
+    print(f"NaPTAN import completed. Active stops written: {written}, skipped: {skipped}, removed: {removed}")
+    return written
+
+# ==========================================
+# Sub-Routines
+# ==========================================
 
 def _extract_stop_data(row):
     lat = clean_decimal(row.get('latitude'))
@@ -80,50 +267,109 @@ def _extract_stop_data(row):
     }
 
 
-def _find_nearest_sector(lat, lon, sectors_cache):
-    closest = None
-    min_dist = float('inf')
-    
-    for name, s_lat, s_lon in sectors_cache:
-        if s_lat is None or s_lon is None: 
-            continue
-        
-        dist = (s_lat - lat)**2 + (s_lon - lon)**2
-        
-        if dist < min_dist:
-            min_dist = dist
-            closest = name
-            
-    return closest
-
-
-def _save_transport_stop(data, sector_id):
-    stop, _ = TransportStop.objects.update_or_create(
-        stop_id=data['stop_id'],
-        defaults={
-            'name': data['name'],
-            'latitude': data['lat'],
-            'longitude': data['lon'],
-            'nearest_sector_id': sector_id
-        }
-    )
-    return stop
+def _parse_stop_row(row):
+    """ Stop fields + route names of a row, None if the stop is unusable. """
+    stop_data = _extract_stop_data(row)
+    if stop_data:
+        stop_data['routes'] = _parse_route_names(row.get('routes'))
+    return stop_data
+
+
+def _parse_naptan_row(row):
+    """ TransportStop fields of an active NaPTAN stop, None if inactive or unusable. """
+    if (row.get('Status') or '').lower() != 'active':
+        return None
+
+    stop_id = row.get('ATCOCode')
+    lat = clean_decimal(row.get('Latitude'))
+    lon = clean_decimal(row.get('Longitude'))
+    if not stop_id or lat is None or lon is None:
+        return None
 
+    return {
+        'stop_id': stop_id,
+        'name': row.get('CommonName') or '',
+        'latitude': lat,
+        'longitude': lon,
+        'indicator': row.get('Indicator') or '',
+        'bearing': row.get('Bearing') or '',
+        'street': row.get('Street') or '',
+        'locality': row.get('LocalityName') or '',
+        'stop_type': row.get('StopType') or '',
+    }
 
-def _link_routes_to_stop(stop_obj, route_string, existing_routes_cache):
+
+def _find_nearest_sector(lat, lon, sector_index, max_m=None):
+    # Grid lookup with great-circle distance instead of scanning every sector
+    result = sector_index.nearest(lat, lon, max_m)
+    return result[0] if result else None
+
+
+def _parse_route_names(route_string):
+    """ "17, 21, 17" -> {"17", "21"} """
     if not route_string:
-        return
+        return set()
+    return {r.strip() for r in route_string.split(',') if r.strip()}
+
+
+def _bulk_upsert_stops(stops):
+    TransportStop.objects.bulk_create(
+        list(stops),
+        update_conflicts=True,
+        unique_fields=['stop_id'],
+        update_fields=STOP_UPDATE_FIELDS,
+    )
 
-    route_names = [r.strip() for r in route_string.split(',') if r.strip()]
-    if not route_names:
-        return
 
+def _bulk_create_routes(stop_routes):
     # Create new routes if needed
-    new_routes = [r for r in route_names if r not in existing_routes_cache]
-    if new_routes:
-        BusRoute.objects.bulk_create([BusRoute(name=r) for r in new_routes], ignore_conflicts=True)
-        existing_routes_cache.update(new_routes)
-    
-    # Link to Stop
-    routes_objs = BusRoute.objects.filter(name__in=route_names)
-    stop_obj.routes.set(routes_objs)
\ No newline at end of file
+    existing_routes = set(BusRoute.objects.values_list('name', flat=True))
+    all_routes = set().union(*stop_routes.values())
+    BusRoute.objects.bulk_create([BusRoute(name=r) for r in all_routes - existing_routes])
+
+
+def _sync_stop_routes(stop_routes, batch_size=900):
+    """
+    Rebuilds the stop -> route through table for the stops in the file:
+    inserts the new (stop, route) pairs and deletes the stale ones.
+    Only the links of those stops are read, batch by batch.
+    Returns (links added, links removed).
+    """
+    Link = TransportStop.routes.through
+
+    wanted = {(stop_id, route) for stop_id, routes in stop_routes.items() for route in routes}
+
+    current = {}
+    stop_ids = list(stop_routes)
+    for i in range(0, len(stop_ids), batch_size):
+        links = Link.objects.filter(transportstop_id__in=stop_ids[i:i + batch_size])
+        for pk, stop_id, route in links.values_list('id', 'transportstop_id', 'busroute_id'):
+            current[(stop_id, route)] = pk
+
+    stale_ids = [pk for pair, pk in current.items() if pair not in wanted]
+    delete_in_batches(Link.objects.all(), 'id', stale_ids)
+
+    new_links = [
+        Link(transportstop_id=stop_id, busroute_id=route)
+        for stop_id, route in wanted - current.keys()
+    ]
+    Link.objects.bulk_create(new_links)
+
+    return len(new_links), len(stale_ids)
+
+
+@route_index.deferred()
+def delete_transport_stops(stop_ids):
+    """ Removes stops that disappeared from the source file (links cascade). """
+    return delete_in_batches(TransportStop.objects.all(), 'stop_id', stop_ids)
+
+
+def _delete_unrouted_stops(stop_ids):
+    # Stops a route calls at stay: the GTFS feed still serves them
+    return delete_in_batches(TransportStop.objects.filter(routes__isnull=True), 'stop_id', stop_ids)
+
+
+@route_index.deferred()
+def delete_naptan_stops(stop_ids):
+    """ Removes stops that left the NaPTAN file, except the ones a bus route still calls at. """
+    return _delete_unrouted_stops(stop_ids)
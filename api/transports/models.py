@@ -7,6 +7,9 @@ class BusRoute(models.Model):
     Represents a Bus Number (e.g., "17", "21").
     """
     name = models.CharField(max_length=20, primary_key=True) 
+
+    # Trips run on this route in the GTFS feed (all its variants)
+    trip_count = models.PositiveIntegerField(default=0)
     
     def __str__(self):
         return f"Bus {self.name}"
@@ -19,6 +22,16 @@ class TransportStop(models.Model):
     name = models.CharField(max_length=200)
     latitude = models.FloatField()
     longitude = models.FloatField()
+
+    # Service frequency: trips calling here in the GTFS feed (from stop_times)
+    trip_count = models.PositiveIntegerField(default=0)
+
+    # NaPTAN metadata (e.g. "opp" / "N" / "Rose Kiln Lane" / "Coley" / "BCT")
+    indicator = models.CharField(max_length=50, blank=True, default='')
+    bearing = models.CharField(max_length=2, blank=True, default='')
+    street = models.CharField(max_length=200, blank=True, default='')
+    locality = models.CharField(max_length=100, blank=True, default='')
+    stop_type = models.CharField(max_length=3, blank=True, default='')
     
     # Links to the bus numbers that stop here
     routes = models.ManyToManyField(BusRoute, related_name='stops', blank=True)
@@ -32,4 +45,16 @@ class TransportStop(models.Model):
     )
 
     def __str__(self):
-        return f"{self.name} ({self.stop_id})"
\ No newline at end of file
+        return f"{self.name} ({self.stop_id})"
+
+class RouteIndexVersion(models.Model):
+    """
+    Single-row counter bumped whenever the stops, the routes or their links
+    change (transport importers, signals). Each process compares it with the
+    version its route index was built from (see api.transports.cache.RouteIndex),
+    so a re-import in another process is picked up on the next lookup.
+    """
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Route index v{self.version}"
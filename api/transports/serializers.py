@@ -1,6 +1,8 @@
 from rest_framework import serializers
-from api.transports.models import TransportStop, BusRoute
+from api.transports.models import TransportStop
 from api.coordinates.models import Coordinates
+from api.transports.gtfs import bitset_members
+from drf_spectacular.utils import extend_schema_field
 
 class TransportStopSerializer(serializers.ModelSerializer):
     """
@@ -15,15 +17,33 @@ class TransportStopSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = TransportStop
-        fields = ['stop_id', 'name', 'latitude', 'longitude', 'routes']
+        fields = ['stop_id', 'name', 'indicator', 'street', 'latitude', 'longitude', 'trip_count', 'routes']
+
+class NearbyStopSerializer(TransportStopSerializer):
+    """
+    A stop of a radius search, with its distance from the searched point
+    (context['distances'] = {stop_id: metres}).
+    Output: { "stop_id": "...", "name": "Station Rd", ..., "distance_m": 41.2 }
+    """
+    distance_m = serializers.SerializerMethodField()
+
+    class Meta(TransportStopSerializer.Meta):
+        fields = TransportStopSerializer.Meta.fields + ['distance_m']
+
+    @extend_schema_field(float)
+    def get_distance_m(self, obj):
+        return round(self.context.get('distances', {}).get(obj.stop_id, 0.0), 1)
 
 class CommuterSectorSerializer(serializers.ModelSerializer):
     """
     Specialized serializer for Search Results.
     Output: Neighborhood info + Average Price + WHICH bus gets you to work.
+    The view passes the connecting routes of each sector as a route
+    bitset in context['connections'], and the route names of the index
+    snapshot the bitsets come from in context['route_names']
+    (see api.transports.cache.RouteTables).
     """
-    # These fields are calculated on the fly
-    average_price = serializers.SerializerMethodField()
+    average_price = serializers.IntegerField(source='sector_summary.average_price', read_only=True)
     connected_routes = serializers.SerializerMethodField()
     commute_summary = serializers.SerializerMethodField()
 
@@ -38,30 +58,22 @@ class CommuterSectorSerializer(serializers.ModelSerializer):
             'commute_summary'
         ]
 
-    def get_average_price(self, obj):
-        # Checks if you added the field to the model (cached), or returns 0
-        return getattr(obj, 'average_price', 0)
+    def _routes(self, obj):
+        """ Names of the routes linking this sector to the user's work, busiest first. """
+        mask = self.context.get('connections', {}).get(obj.name, 0)
+        route_names = self.context.get('route_names', [])
+        return [route_names[route_id] for route_id in bitset_members(mask)]
 
+    @extend_schema_field(serializers.ListField(child=serializers.CharField()))
     def get_connected_routes(self, obj):
         """
         Returns the specific bus routes that connect THIS sector to the User's Work.
-        Logic: Intersection of {Routes in Sector} AND {Routes at Work}
+        Logic: Intersection of {Routes in Sector} AND {Routes at Work}, as bitsets
         """
-        # 1. Get routes available at user's work (passed from View)
-        work_routes = set(self.context.get('work_routes', []))
-        
-        # 2. Get routes available in this sector (Optimization: Prefetch in View recommended)
-        # We access the reverse relationship: sector -> transport_stops -> routes
-        sector_routes = set(
-            BusRoute.objects.filter(stops__nearest_sector=obj).values_list('name', flat=True)
-        )
-        
-        # 3. Find intersection (The buses you can actually take)
-        valid_links = list(work_routes.intersection(sector_routes))
-        return sorted(valid_links)
+        return sorted(self._routes(obj))
 
     def get_commute_summary(self, obj):
-        routes = self.get_connected_routes(obj)
+        routes = self._routes(obj)
         if routes:
             return f"Take Bus {', '.join(routes[:2])} directly to there."
-        return "No direct route found."
\ No newline at end of file
+        return "No direct route found."
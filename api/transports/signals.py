@@ -0,0 +1,22 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from api.transports.models import TransportStop, BusRoute
+from api.transports.cache import route_index
+
+@receiver(post_save, sender=TransportStop)
+@receiver(post_save, sender=BusRoute)
+def clear_route_index_on_save(sender, instance, **kwargs):
+    """ A new or moved stop, or a new route, invalidates the route index. """
+    route_index.clear_on_commit()
+
+@receiver(post_delete, sender=TransportStop)
+@receiver(post_delete, sender=BusRoute)
+def clear_route_index_on_delete(sender, instance, **kwargs):
+    """ A removed stop or route invalidates the route index. """
+    route_index.clear_on_commit()
+
+@receiver(m2m_changed, sender=TransportStop.routes.through)
+def clear_route_index_on_links(sender, instance, action, **kwargs):
+    """ Routes added to / removed from a stop invalidate the route index. """
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        route_index.clear_on_commit()
@@ -0,0 +1,100 @@
+from django.db import transaction
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase
+from api.coordinates.models import Coordinates
+from api.transports.cache import route_index
+from api.transports.models import TransportStop, BusRoute, RouteIndexVersion
+
+
+class RouteIndexTest(TestCase):
+    def setUp(self):
+        route_index.clear()
+        for name in ("RG1 1", "RG2 2", "RG4 8"):
+            Coordinates.objects.create(name=name)
+        self.routes = {
+            name: BusRoute.objects.create(name=name, trip_count=trips)
+            for name, trips in [('17', 300), ('21', 120), ('X4', 10)]
+        }
+        # work stop W (17, 21); RG1 1 on 17; RG2 2 on 21 + X4; RG4 8 on X4 only
+        for stop_id, sector, routes in [('W', "RG1 1", ['17', '21']), ('A', "RG1 1", ['17']),
+                                        ('B', "RG2 2", ['21', 'X4']), ('C', "RG4 8", ['X4'])]:
+            stop = TransportStop.objects.create(
+                stop_id=stop_id, name=stop_id, latitude=51.45, longitude=-0.97, nearest_sector_id=sector)
+            stop.routes.add(*(self.routes[name] for name in routes))
+
+    def test_sectors_served_by_the_stop_routes(self):
+        tables = route_index.tables()
+
+        with self.assertNumQueries(0):
+            mask = tables.routes_at(['W'])
+            served = tables.sectors_served(mask)
+
+        # Busiest first
+        self.assertEqual(tables.route_names(mask), ['17', '21'])
+        self.assertEqual(
+            {sector: tables.route_names(routes) for sector, routes in served.items()},
+            {"RG1 1": ['17', '21'], "RG2 2": ['21']},
+        )
+
+    def test_built_in_three_queries_plus_the_version(self):
+        # the version + routes, stops, links
+        with self.assertNumQueries(4):
+            tables = route_index.tables()
+        # Up to date: only the version is read
+        with self.assertNumQueries(1):
+            self.assertIs(route_index.tables(), tables)
+
+    def test_cleared_when_stops_or_links_change(self):
+        tables = route_index.tables()
+        self.assertNotIn("RG4 8", tables.sectors_served(tables.routes_at(['W'])))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            TransportStop.objects.get(stop_id='C').routes.add(self.routes['17'])
+        tables = route_index.tables()
+        self.assertIn("RG4 8", tables.sectors_served(tables.routes_at(['W'])))
+
+    def test_deferred_clears_once_on_exit(self):
+        version = RouteIndexVersion.objects.get().version
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with route_index.deferred():
+                TransportStop.objects.filter(stop_id__in=['A', 'B']).delete()
+                BusRoute.objects.create(name='99')
+                self.assertEqual(RouteIndexVersion.objects.get().version, version)
+
+        self.assertEqual(callbacks, [])
+        self.assertEqual(RouteIndexVersion.objects.get().version, version + 1)
+        self.assertNotIn('A', route_index.tables().stop_routes)
+
+    def test_rebuilt_when_another_process_changes_the_version(self):
+        route_index.tables()
+        # Another process: raw writes (no signals here), then its importer bumps the version
+        TransportStop.objects.bulk_create([TransportStop(stop_id='D', name='D', latitude=51.0, longitude=-1.0)])
+        TransportStop.routes.through.objects.create(transportstop_id='D', busroute_id='X4')
+        RouteIndexVersion.objects.update(version=F('version') + 1)
+
+        tables = route_index.tables()
+        self.assertEqual(tables.route_names(tables.routes_at(['D'])), ['X4'])
+
+    def test_stops_within_radius(self):
+        TransportStop.objects.create(stop_id='E', name='E', latitude=51.4509, longitude=-0.97)
+
+        # E is about 100 m from the others, all at the same point
+        self.assertEqual(sorted(stop_id for stop_id, _ in route_index.stops_within(51.45, -0.97, 50)), ['A', 'B', 'C', 'W'])
+        nearby = route_index.stops_within(51.4509, -0.97, 150)
+        self.assertEqual(nearby[0], ('E', 0.0))
+        self.assertEqual(len(nearby), 5)
+
+
+class RouteIndexSignalsTest(TransactionTestCase):
+    def test_version_bumped_once_per_transaction(self):
+        route_index.clear()
+        with transaction.atomic():
+            route = BusRoute.objects.create(name='17')
+            for stop_id in ('D', 'E', 'F'):
+                TransportStop.objects.create(stop_id=stop_id, name=stop_id, latitude=51.0, longitude=-1.0)
+            TransportStop.objects.get(stop_id='D').routes.add(route)
+            self.assertEqual(RouteIndexVersion.objects.get().version, 1)
+
+        self.assertEqual(RouteIndexVersion.objects.get().version, 2)
+        tables = route_index.tables()
+        self.assertEqual(tables.route_names(tables.routes_at(['D'])), ['17'])
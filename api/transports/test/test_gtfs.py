@@ -0,0 +1,102 @@
+import os
+import csv
+import shutil
+import zipfile
+import tempfile
+from django.test import SimpleTestCase
+from api.utils import source_member
+from api.transports.gtfs import (
+    Interner, TripRouteMap, load_routes, load_trip_routes, load_stops, scan_stop_times, bitset_members,
+)
+
+def write_csv(path, header, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+class GtfsTest(SimpleTestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        write_csv(os.path.join(self.folder, 'routes.txt'), ['route_id', 'agency_id', 'route_short_name'], [
+            ['RBUS:17', 'RBUS', '17'],
+            ['RBUS:17X', 'RBUS', '17'],   # same number, other variant
+            ['RBUS:21', 'RBUS', '21'],
+        ])
+        write_csv(os.path.join(self.folder, 'trips.txt'), ['route_id', 'service_id', 'trip_id'], [
+            ['RBUS:17', 'S', 'T1'],
+            ['RBUS:17X', 'S', 'T2'],
+            ['RBUS:21', 'S', 'T3'],
+            ['UNKNOWN', 'S', 'T4'],
+        ])
+        write_csv(os.path.join(self.folder, 'stops.txt'), ['stop_id', 'stop_name', 'stop_lat', 'stop_lon'], [
+            ['A', 'Stop A', '51.45', '-0.97'],
+            ['B', 'Stop B', '51.46', '-0.96'],
+            ['C', 'Stop C', '51.47', '-0.95'],
+        ])
+        stop_times = []
+        for trip, stops in [('T1', 'AB'), ('T2', 'BC'), ('T3', 'AC'), ('T4', 'A')] * 30:
+            stop_times.extend([trip, '08:00:00', stop] for stop in stops)
+        write_csv(os.path.join(self.folder, 'stop_times.txt'), ['trip_id', 'arrival_time', 'stop_id'], stop_times)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def scan(self, workers, feed=None, **kwargs):
+        """ Returns ({stop_id: [route names]}, {stop_id: calls}). """
+        feed = feed or self.folder
+        route_names, route_of = load_routes(feed)
+        trip_routes = load_trip_routes(feed, route_of)
+        stops, _ = load_stops(feed)
+        masks, calls = scan_stop_times(source_member(feed, 'stop_times.txt'), trip_routes, stops,
+                                       workers=workers, **kwargs)
+        routes = {
+            stops.names[stop]: sorted(route_names.names[r] for r in bitset_members(mask))
+            for stop, mask in masks.items()
+        }
+        return routes, {stops.names[stop]: count for stop, count in calls.items()}
+
+    def routes_by_stop(self, workers, **kwargs):
+        return self.scan(workers, **kwargs)[0]
+
+    def zip_feed(self):
+        path = os.path.join(self.folder, 'feed.zip')
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for name in ('routes.txt', 'trips.txt', 'stops.txt', 'stop_times.txt'):
+                archive.write(os.path.join(self.folder, name), name)
+        return path
+
+    def test_trip_route_map(self):
+        trips = TripRouteMap([('T1', 0), ('T2', 5), ('T3', 2)])
+        self.assertEqual(len(trips), 3)
+        self.assertEqual(trips.get('T2'), 5)
+        self.assertIsNone(trips.get('T9'))
+        self.assertEqual(TripRouteMap([('T1', 0), ('T2', 5), ('T3', 0)]).trip_counts(), {0: 2, 5: 1})
+
+    def test_interner_and_bitsets(self):
+        names = Interner()
+        self.assertEqual([names('17'), names('21'), names('17')], [0, 1, 0])
+        self.assertEqual(bitset_members(0b1011), [0, 1, 3])
+
+    def test_stop_routes(self):
+        """ route variants collapse on the short name, unknown routes are ignored """
+        self.assertEqual(self.routes_by_stop(workers=1), {'A': ['17', '21'], 'B': ['17'], 'C': ['17', '21']})
+
+    def test_parallel_scan_matches(self):
+        self.assertEqual(
+            self.routes_by_stop(workers=2, range_bytes=200),
+            self.routes_by_stop(workers=1),
+        )
+
+    def test_stop_calls(self):
+        """ one call per trip of a known route stopping, summed across ranges """
+        expected = {'A': 60, 'B': 60, 'C': 60}
+        self.assertEqual(self.scan(workers=1)[1], expected)
+        self.assertEqual(self.scan(workers=2, range_bytes=200)[1], expected)
+
+    def test_zipped_feed_matches_folder(self):
+        """ the downloaded .zip is read member by member, stop_times in blocks with workers """
+        feed = self.zip_feed()
+        expected = self.scan(workers=1)
+        self.assertEqual(self.scan(workers=1, feed=feed), expected)
+        self.assertEqual(self.scan(workers=2, feed=feed, range_bytes=200), expected)
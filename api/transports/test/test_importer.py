@@ -0,0 +1,204 @@
+import os
+import csv
+import tempfile
+from unittest.mock import patch
+from django.test import TestCase
+from api.coordinates.models import Coordinates
+from api.transports.models import TransportStop, BusRoute
+from api.transports.importer import run_transport_import, run_gtfs_import, run_naptan_import, delete_naptan_stops
+
+class TransportImporterTest(TestCase):
+    def setUp(self):
+        Coordinates.objects.create(name="RG1 1", latitude=51.4569, longitude=-0.973118)
+        Coordinates.objects.create(name="RG30 4", latitude=51.4478, longitude=-1.0412)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'stops.csv')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_csv(self, rows):
+        with open(self.path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['stop_id', 'stop_name', 'latitude', 'longitude', 'routes'])
+            writer.writerows(rows)
+
+    @patch('builtins.print')
+    def test_import_creates_stops_routes_and_links(self, mock_print):
+        self.write_csv([
+            ['S1', 'Station Rd', '51.4570', '-0.9730', '17, 21'],
+            ['S2', 'Tilehurst', '51.4480', '-1.0410', '17'],
+            ['S3', 'No Coords', '', '', '17'],  # Skipped
+        ])
+
+        run_transport_import(self.path)
+
+        self.assertEqual(TransportStop.objects.count(), 2)
+        self.assertEqual(set(BusRoute.objects.values_list('name', flat=True)), {'17', '21'})
+
+        s1 = TransportStop.objects.get(stop_id='S1')
+        self.assertEqual(s1.nearest_sector_id, 'RG1 1')
+        self.assertEqual(set(s1.routes.values_list('name', flat=True)), {'17', '21'})
+        self.assertEqual(TransportStop.objects.get(stop_id='S2').nearest_sector_id, 'RG30 4')
+
+    @patch('builtins.print')
+    def test_reimport_syncs_links(self, mock_print):
+        self.write_csv([
+            ['S1', 'Station Rd', '51.4570', '-0.9730', '17, 21'],
+            ['S2', 'Tilehurst', '51.4480', '-1.0410', '17'],
+        ])
+        run_transport_import(self.path)
+
+        # Route 21 no longer stops at S1, route 33 is new, S2 is renamed
+        self.write_csv([
+            ['S1', 'Station Rd', '51.4570', '-0.9730', '17, 33'],
+            ['S2', 'Tilehurst Triangle', '51.4480', '-1.0410', '17'],
+        ])
+        run_transport_import(self.path)
+
+        s1 = TransportStop.objects.get(stop_id='S1')
+        self.assertEqual(set(s1.routes.values_list('name', flat=True)), {'17', '33'})
+        self.assertEqual(TransportStop.objects.get(stop_id='S2').name, 'Tilehurst Triangle')
+        self.assertEqual(TransportStop.routes.through.objects.count(), 3)
+
+
+class GtfsImporterTest(TestCase):
+    def setUp(self):
+        Coordinates.objects.create(name="RG1 1", latitude=51.4569, longitude=-0.973118)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.folder = self.tmp_dir.name
+        self.write('routes.txt', ['route_id', 'route_short_name'], [['R17', '17'], ['R17X', '17'], ['R21', '21']])
+        self.write('trips.txt', ['route_id', 'trip_id'], [['R17', 'T1'], ['R17X', 'T2'], ['R21', 'T3']])
+        self.write('stops.txt', ['stop_id', 'stop_name', 'stop_lat', 'stop_lon'], [
+            ['S1', 'Station Rd', '51.4570', '-0.9730'],
+            ['S2', 'Oxford Rd', '51.4560', '-0.9750'],
+            ['S3', 'No Coords', '', ''],  # Skipped
+        ])
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write(self, filename, header, rows):
+        with open(os.path.join(self.folder, filename), 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+
+    @patch('builtins.print')
+    def test_import_counts_trips_and_links_stops(self, mock_print):
+        self.write('stop_times.txt', ['trip_id', 'stop_id'], [
+            ['T1', 'S1'], ['T1', 'S2'],
+            ['T2', 'S1'],
+            ['T3', 'S1'],
+        ])
+
+        run_gtfs_import(self.folder)
+
+        self.assertEqual(dict(BusRoute.objects.values_list('name', 'trip_count')), {'17': 2, '21': 1})
+        s1 = TransportStop.objects.get(stop_id='S1')
+        self.assertEqual(s1.trip_count, 3)
+        self.assertEqual(s1.nearest_sector_id, 'RG1 1')
+        self.assertEqual(set(s1.routes.values_list('name', flat=True)), {'17', '21'})
+        s2 = TransportStop.objects.get(stop_id='S2')
+        self.assertEqual(s2.trip_count, 1)
+        self.assertEqual(set(s2.routes.values_list('name', flat=True)), {'17'})
+        self.assertFalse(TransportStop.objects.filter(stop_id='S3').exists())
+
+    @patch('builtins.print')
+    def test_without_stop_times_keeps_links(self, mock_print):
+        """ e.g. links from bus_stops_with_routes.csv stay, routes still get their trip counts """
+        route = BusRoute.objects.create(name='21')
+        stop = TransportStop.objects.create(stop_id='S1', name='Old Name', latitude=51.4570, longitude=-0.9730, trip_count=7)
+        stop.routes.add(route)
+
+        run_gtfs_import(self.folder)
+
+        stop.refresh_from_db()
+        self.assertEqual(stop.name, 'Station Rd')
+        self.assertEqual(stop.trip_count, 7)
+        self.assertEqual(list(stop.routes.values_list('name', flat=True)), ['21'])
+        self.assertEqual(BusRoute.objects.get(name='17').trip_count, 2)
+
+
+class NaptanImporterTest(TestCase):
+    HEADER = ['ATCOCode', 'NaptanCode', 'CommonName', 'Landmark', 'Street', 'Indicator', 'Bearing',
+              'LocalityName', 'Longitude', 'Latitude', 'StopType', 'Status']
+
+    def setUp(self):
+        Coordinates.objects.create(name="RG1 1", latitude=51.4569, longitude=-0.973118)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'Stops.csv')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_csv(self, rows):
+        with open(self.path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.HEADER)
+            writer.writerows(rows)
+
+    @patch('builtins.print')
+    def test_imports_active_stops_in_chunks(self, mock_print):
+        self.write_csv([
+            ['039025000002', 'rdgadjd', 'Admirals Court', 'x', 'Rose Kiln Lane', 'Adj', 'N', 'Coley', '-0.97605', '51.44611', 'BCT', 'active'],
+            ['039025000001', 'rdgadja', 'Admirals Court', 'x', 'Rose Kiln Lane', 'Opp', 'S', 'Coley', '-0.9759', '51.44616', 'BCT', 'active'],
+            ['039025000009', 'rdgadjx', 'Closed Stop', 'x', 'Gone Road', '', '', 'Coley', '-0.9759', '51.44616', 'BCT', 'inactive'],
+            ['039025000010', 'rdgadjy', 'No Position', 'x', 'Somewhere', '', '', 'Coley', '', '', 'BCT', 'active'],
+            ['639000001', 'abcdefg', 'Far Away', 'x', 'High St', 'opp', 'E', 'Perth', '-3.43', '56.39', 'BCT', 'active'],
+        ])
+
+        written = run_naptan_import(self.path, chunk_size=2)
+
+        self.assertEqual(written, 3)
+        self.assertEqual(TransportStop.objects.count(), 3)
+        stop = TransportStop.objects.get(stop_id='039025000002')
+        self.assertEqual((stop.name, stop.indicator, stop.bearing, stop.street, stop.locality, stop.stop_type),
+                         ('Admirals Court', 'Adj', 'N', 'Rose Kiln Lane', 'Coley', 'BCT'))
+        self.assertEqual(stop.nearest_sector_id, 'RG1 1')
+        # Outside the sectors' area
+        self.assertIsNone(TransportStop.objects.get(stop_id='639000001').nearest_sector_id)
+
+    @patch('builtins.print')
+    def test_existing_stops_only_get_metadata(self, mock_print):
+        route = BusRoute.objects.create(name='17', trip_count=10)
+        stop = TransportStop.objects.create(stop_id='039025000002', name='Admirals Ct (GTFS)',
+                                            latitude=51.4461, longitude=-0.9760, trip_count=4)
+        stop.routes.add(route)
+        self.write_csv([
+            ['039025000002', 'rdgadjd', 'Admirals Court', 'x', 'Rose Kiln Lane', 'Adj', 'N', 'Coley', '-0.97605', '51.44611', 'BCT', 'active'],
+        ])
+
+        run_naptan_import(self.path)
+
+        stop.refresh_from_db()
+        self.assertEqual((stop.name, stop.trip_count, stop.indicator), ('Admirals Ct (GTFS)', 4, 'Adj'))
+        self.assertEqual(stop.nearest_sector_id, 'RG1 1')
+        self.assertEqual(list(stop.routes.values_list('name', flat=True)), ['17'])
+
+    @patch('builtins.print')
+    def test_stops_leaving_the_active_set_are_removed(self, mock_print):
+        row = ['039025000002', 'rdgadjd', 'Admirals Court', 'x', 'Rose Kiln Lane', 'Adj', 'N', 'Coley', '-0.97605', '51.44611', 'BCT']
+        self.write_csv([[*row, 'active'], ['039025000001', *row[1:], 'active'], ['039025000003', *row[1:], 'active']])
+        run_naptan_import(self.path)
+        # A route still calls at 039025000001
+        TransportStop.objects.get(stop_id='039025000001').routes.add(BusRoute.objects.create(name='17'))
+
+        # 039025000002 and 039025000001 turn inactive, 039025000003 is dropped from the file
+        self.write_csv([[*row, 'inactive'], ['039025000001', *row[1:], 'inactive']])
+        run_naptan_import(self.path, chunk_size=1)
+        delete_naptan_stops(['039025000003'])
+
+        self.assertEqual(list(TransportStop.objects.values_list('stop_id', flat=True)), ['039025000001'])
+
+    @patch('builtins.print')
+    def test_active_stop_without_position_is_kept(self, mock_print):
+        row = ['039025000002', 'rdgadjd', 'Admirals Court', 'x', 'Rose Kiln Lane', 'Adj', 'N', 'Coley', '-0.97605', '51.44611', 'BCT']
+        self.write_csv([[*row, 'active']])
+        run_naptan_import(self.path)
+
+        # Coordinates missing from this release: skipped, but the stop is still active
+        self.write_csv([[*row[:8], '', '', 'BCT', 'active']])
+        self.assertEqual(run_naptan_import(self.path), 0)
+
+        self.assertTrue(TransportStop.objects.filter(stop_id='039025000002').exists())
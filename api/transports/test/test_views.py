@@ -0,0 +1,94 @@
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from api.coordinates.models import Coordinates
+from api.coordinates.summary import refresh_sector_summaries
+from api.transports.cache import route_index
+from api.transports.models import TransportStop, BusRoute
+
+
+class CommuterSearchViewTest(APITestCase):
+    def setUp(self):
+        route_index.clear()
+        for name in ("RG1 1", "RG2 2", "RG4 8"):
+            Coordinates.objects.create(name=name, latitude=51.45, longitude=-0.97)
+        routes = {name: BusRoute.objects.create(name=name, trip_count=trips)
+                  for name, trips in [('17', 300), ('21', 120), ('X4', 10)]}
+        # Work stop near (51.4580, -0.9710); the others are far away
+        for stop_id, lat, sector, names in [('W', 51.4581, "RG1 1", ['21', '17']), ('A', 51.40, "RG1 1", ['17']),
+                                            ('B', 51.50, "RG2 2", ['21', 'X4']), ('C', 51.55, "RG4 8", ['X4'])]:
+            stop = TransportStop.objects.create(
+                stop_id=stop_id, name=stop_id, latitude=lat, longitude=-0.9710, nearest_sector_id=sector)
+            stop.routes.add(*(routes[name] for name in names))
+        refresh_sector_summaries()
+        self.url = reverse('commuter-search')
+
+    def test_sectors_with_direct_routes(self):
+        route_index.tables()  # warm up
+
+        # Stops come from the spatial index: the index version + the matching sectors (with their summary)
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'lat': 51.4580, 'lon': -0.9710})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['search_metadata']['routes_serving_work'], ['17', '21'])
+        results = {row['name']: row for row in response.data['recommended_neighborhoods']}
+        self.assertEqual(list(results), ["RG1 1", "RG2 2"])
+        self.assertEqual(results["RG1 1"]['connected_routes'], ['17', '21'])
+        self.assertEqual(results["RG2 2"]['connected_routes'], ['21'])
+        self.assertEqual(results["RG2 2"]['commute_summary'], "Take Bus 21 directly to there.")
+
+    def test_radius_in_metres(self):
+        # Stop B is about 4.7 km north of the work stop
+        response = self.client.get(self.url, {'lat': 51.4580, 'lon': -0.9710, 'radius': 5000})
+        self.assertEqual(response.data['search_metadata']['nearby_stops_found'], 2)
+        self.assertEqual(response.data['search_metadata']['routes_serving_work'], ['17', '21', 'X4'])
+
+        response = self.client.get(self.url, {'lat': 51.4590, 'lon': -0.9710, 'radius': 50})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.data['message'], "No bus stops found within 50m.")
+
+    def test_no_stops_nearby(self):
+        response = self.client.get(self.url, {'lat': 50.0, 'lon': -3.0})
+        self.assertEqual(response.status_code, 404)
+
+    def test_bad_parameters(self):
+        self.assertEqual(self.client.get(self.url, {'lat': 'x'}).status_code, 400)
+        for radius in ('far', '0', '50000'):
+            response = self.client.get(self.url, {'lat': 51.458, 'lon': -0.971, 'radius': radius})
+            self.assertEqual(response.status_code, 400)
+
+
+class NearbyStopsViewTest(APITestCase):
+    def setUp(self):
+        route_index.clear()
+        route = BusRoute.objects.create(name='17')
+        # About 0 m, 111 m and 556 m north of the point
+        for stop_id, lat in [('far', 51.4630), ('near', 51.4580), ('mid', 51.4590)]:
+            stop = TransportStop.objects.create(stop_id=stop_id, name=stop_id, latitude=lat, longitude=-0.9710)
+            stop.routes.add(route)
+        self.url = reverse('nearby-stops')
+
+    def test_stops_within_radius_nearest_first(self):
+        route_index.tables()  # warm up
+
+        # the index version + the stops + their routes
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, {'lat': 51.4580, 'lon': -0.9710, 'radius': 200})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([stop['stop_id'] for stop in response.data['stops']], ['near', 'mid'])
+        self.assertEqual(response.data['stops'][0]['distance_m'], 0.0)
+        self.assertAlmostEqual(response.data['stops'][1]['distance_m'], 111.2, delta=0.5)
+        self.assertEqual(response.data['stops'][1]['routes'], ['17'])
+
+    def test_default_radius(self):
+        response = self.client.get(self.url, {'lat': 51.4580, 'lon': -0.9710})
+        self.assertEqual(response.data['radius_m'], 500)
+        self.assertEqual(response.data['results_count'], 2)
+
+    def test_rejects_invalid_locations(self):
+        for lat, lon in [('nan', -0.971), (51.458, 'inf'), ('-inf', 'nan'), (91, -0.971), (51.458, 180.5)]:
+            response = self.client.get(self.url, {'lat': lat, 'lon': lon})
+            self.assertEqual(response.status_code, 400, (lat, lon))
+        response = self.client.get(self.url, {'lat': 51.458, 'lon': -0.971, 'radius': 'nan'})
+        self.assertEqual(response.status_code, 400)
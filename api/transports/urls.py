@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import CommuterSearchView
+from .views import CommuterSearchView, NearbyStopsView
 
 urlpatterns = [
     path('commute/', CommuterSearchView.as_view(), name='commuter-search'),
+    path('stops/nearby/', NearbyStopsView.as_view(), name='nearby-stops'),
 ]
\ No newline at end of file
@@ -1,9 +1,46 @@
+import math
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
-from api.transports.models import TransportStop, BusRoute # Note: I used 'transports' (plural) based on your logs
+from api.transports.models import TransportStop # Note: I used 'transports' (plural) based on your logs
+from api.transports.cache import route_index
 from api.coordinates.models import Coordinates
-from .serializers import CommuterSectorSerializer
+from .serializers import CommuterSectorSerializer, NearbyStopSerializer
+
+# Radius of the stop searches, in metres
+DEFAULT_RADIUS_M = 500
+MAX_RADIUS_M = 5000
+
+RADIUS_PARAMETER = OpenApiParameter(
+    name='radius',
+    description=f'Search radius in metres (default {DEFAULT_RADIUS_M}, max {MAX_RADIUS_M})',
+    required=False,
+    type=OpenApiTypes.DOUBLE,
+)
+
+def parse_location(request):
+    """
+    Reads lat, lon and the optional radius (metres) of a stop search.
+    Raises ValueError with the message for the client.
+    """
+    try:
+        lat = float(request.query_params.get('lat'))
+        lon = float(request.query_params.get('lon'))
+    except (TypeError, ValueError):
+        raise ValueError("Please provide 'lat' and 'lon' query parameters")
+    # float() accepts 'nan' and 'inf', which would slip through the range checks
+    if not (math.isfinite(lat) and math.isfinite(lon)):
+        raise ValueError("'lat' and 'lon' must be finite numbers")
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError("'lat' must be between -90 and 90, 'lon' between -180 and 180")
+
+    try:
+        radius = float(request.query_params.get('radius', DEFAULT_RADIUS_M))
+    except ValueError:
+        raise ValueError("'radius' must be a number of metres")
+    if not 0 < radius <= MAX_RADIUS_M:
+        raise ValueError(f"'radius' must be between 0 and {MAX_RADIUS_M} metres")
+    return lat, lon, radius
 
 class CommuterSearchView(APIView):
     """
@@ -16,55 +53,85 @@ class CommuterSearchView(APIView):
         parameters=[
             OpenApiParameter(name='lat', description='Latitude (e.g. 51.458)', required=True, type=OpenApiTypes.DOUBLE),
             OpenApiParameter(name='lon', description='Longitude (e.g. -0.971)', required=True, type=OpenApiTypes.DOUBLE),
+            RADIUS_PARAMETER,
         ],
         responses={200: CommuterSectorSerializer(many=True)}
     )
     def get(self, request):
         try:
-            work_lat = float(request.query_params.get('lat'))
-            work_lon = float(request.query_params.get('lon'))
-        except (TypeError, ValueError):
+            work_lat, work_lon, radius = parse_location(request)
+        except ValueError as e:
             # This is why you saw the 400 error!
-            return Response({"error": "Please provide 'lat' and 'lon' query parameters"}, status=400)
-
-        # ... (Keep your existing logic here) ...
-        # 1. Find Stops
-        lat_offset = 0.0045
-        lon_offset = 0.007
-        
-        work_stops = TransportStop.objects.filter(
-            latitude__range=(work_lat - lat_offset, work_lat + lat_offset),
-            longitude__range=(work_lon - lon_offset, work_lon + lon_offset)
-        )
+            return Response({"error": str(e)}, status=400)
 
-        if not work_stops.exists():
-            return Response({"message": "No bus stops found within 500m.", "work_location": {"lat": work_lat, "lon": work_lon}}, status=404)
+        # One snapshot of the index for the whole request: the route bitsets stay decodable
+        tables = route_index.tables()
 
-        # 2. Identify Routes
-        work_routes = BusRoute.objects.filter(stops__in=work_stops).distinct()
-        work_route_names = list(work_routes.values_list('name', flat=True))
+        # 1. Find Stops (spatial index, exact distance)
+        work_stops = [stop_id for stop_id, _ in tables.stops_within(work_lat, work_lon, radius)]
+
+        if not work_stops:
+            return Response({"message": f"No bus stops found within {radius:g}m.", "work_location": {"lat": work_lat, "lon": work_lon}}, status=404)
+
+        # 2. Identify Routes (bitset of every route calling there)
+        work_routes = tables.routes_at(work_stops)
+        work_route_names = tables.route_names(work_routes)
 
         if not work_route_names:
              return Response({"message": "Stops found, but no active bus routes."}, status=404)
 
-        # 3. Find Neighborhoods
-        target_sectors = Coordinates.objects.filter(
-            transport_stops__routes__in=work_routes
-        ).distinct()
+        # 3. Find Neighborhoods: sectors sharing a route, with the shared routes
+        connections = tables.sectors_served(work_routes)
+        target_sectors = Coordinates.objects.filter(name__in=list(connections)).select_related('summary').order_by('name')
 
         # 4. Serialize
         serializer = CommuterSectorSerializer(
             target_sectors, 
             many=True, 
-            context={'work_routes': work_route_names}
+            context={'connections': connections, 'route_names': tables.routes}
         )
 
         return Response({
             "search_metadata": {
                 "work_location": {"lat": work_lat, "lon": work_lon},
-                "nearby_stops_found": work_stops.count(),
+                "radius_m": radius,
+                "nearby_stops_found": len(work_stops),
                 "routes_serving_work": work_route_names
             },
             "results_count": len(serializer.data),
             "recommended_neighborhoods": serializer.data
-        })
\ No newline at end of file
+        })
+
+
+class NearbyStopsView(APIView):
+    """
+    Bus stops within a radius (metres) of a point, nearest first,
+    from the in-memory spatial index of the stops.
+    """
+    serializer_class = None
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name='lat', description='Latitude (e.g. 51.458)', required=True, type=OpenApiTypes.DOUBLE),
+            OpenApiParameter(name='lon', description='Longitude (e.g. -0.971)', required=True, type=OpenApiTypes.DOUBLE),
+            RADIUS_PARAMETER,
+        ],
+        responses={200: NearbyStopSerializer(many=True)}
+    )
+    def get(self, request):
+        try:
+            lat, lon, radius = parse_location(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        distances = dict(route_index.stops_within(lat, lon, radius))
+        stops = TransportStop.objects.filter(stop_id__in=list(distances)).prefetch_related('routes')
+        stops = sorted(stops, key=lambda stop: distances[stop.stop_id])
+
+        serializer = NearbyStopSerializer(stops, many=True, context={'distances': distances})
+        return Response({
+            "location": {"lat": lat, "lon": lon},
+            "radius_m": radius,
+            "results_count": len(stops),
+            "stops": serializer.data,
+        })
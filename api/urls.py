@@ -14,4 +14,5 @@ router.register(r'schools', SchoolViewSet, basename='school')
 urlpatterns = [
     path('', include(router.urls)),
     path('transports/', include('api.transports.urls')),
+    path('crimes/', include('api.crimes.urls')),
 ]
\ No newline at end of file
@@ -1,20 +1,221 @@
 import csv
+import io
 import os
 import re
+import glob
+import gzip
+import fnmatch
+import zipfile
+import operator
+from contextlib import contextmanager, ExitStack
 from django.conf import settings
-from api.coordinates.models import Coordinates
 from django.core.exceptions import ValidationError
 
+# ===== Source Files (plain, .gz, .zip members) =====
+# 'feed.zip!stops.txt' names one member of a zip archive
+ARCHIVE_MEMBER_SEP = '!'
+
+def split_archive_path(path):
+    """ 'feed.zip!stops.txt' -> ('feed.zip', 'stops.txt'), any other path -> (path, None). """
+    archive, sep, member = path.partition(ARCHIVE_MEMBER_SEP)
+    if sep and archive.lower().endswith('.zip'):
+        return archive, member
+    return path, None
+
+def is_compressed(path):
+    """ True for .gz files, zip archives and their members. """
+    return split_archive_path(path)[0].lower().endswith(('.zip', '.gz'))
+
+def source_member(folder, filename):
+    """ Joins a folder, or a zip archive used as one (a GTFS feed), and a file name. """
+    if folder.lower().endswith('.zip'):
+        return f"{folder}{ARCHIVE_MEMBER_SEP}{filename}"
+    return os.path.join(folder, filename)
+
+def _zip_member_info(archive_file, member):
+    """ ZipInfo of member, or of the only file of the archive when member is None. """
+    if member is not None:
+        return archive_file.getinfo(member)
+    files = [info for info in archive_file.infolist() if not info.is_dir()]
+    if len(files) != 1:
+        raise ValueError(
+            f"{archive_file.filename} holds {len(files)} files: "
+            f"name one as 'archive.zip{ARCHIVE_MEMBER_SEP}member'"
+        )
+    return files[0]
+
+def source_exists(path):
+    """ os.path.exists that also looks inside zip archives. """
+    archive, member = split_archive_path(path)
+    if not os.path.exists(archive):
+        return False
+    if member is None:
+        return True
+    try:
+        with zipfile.ZipFile(archive) as archive_file:
+            archive_file.getinfo(member)
+        return True
+    except (KeyError, zipfile.BadZipFile):
+        return False
+
+def source_signature(path):
+    """
+    Cheap change marker of a source, without reading it:
+    size + mtime of a file, size + CRC of a zip member.
+    """
+    archive, member = split_archive_path(path)
+    if member is not None:
+        with zipfile.ZipFile(archive) as archive_file:
+            info = archive_file.getinfo(member)
+        return {'size': info.file_size, 'crc': info.CRC}
+    stat = os.stat(archive)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def list_sources(folder, pattern):
+    """
+    Sorted paths matching pattern (e.g. '*/*-street.csv') under a folder,
+    or members of a zip archive used as one.
+    """
+    if folder.lower().endswith('.zip') and os.path.isfile(folder):
+        with zipfile.ZipFile(folder) as archive_file:
+            names = [info.filename for info in archive_file.infolist() if not info.is_dir()]
+        return [source_member(folder, name) for name in sorted(fnmatch.filter(names, pattern))]
+    return sorted(glob.glob(os.path.join(folder, pattern)))
+
+def find_source(path):
+    """
+    The path itself if it exists, else its compressed download next to it:
+    path.gz, or path.zip (the member of the same name, or its only file).
+    Folders (e.g. a GTFS feed) can come as folder.zip.
+    Returns path unchanged when none exists.
+    """
+    if os.path.exists(path):
+        return path
+    if os.path.exists(path + '.gz'):
+        return path + '.gz'
+
+    archive = path + '.zip'
+    if os.path.isfile(archive):
+        name = os.path.basename(path)
+        with zipfile.ZipFile(archive) as archive_file:
+            names = set(archive_file.namelist())
+        if name in names:
+            return source_member(archive, name)
+        return archive
+    return path
+
+@contextmanager
+def open_source(path, binary=False):
+    """
+    Opens a plain file, a .gz file or a zip member ('feed.zip!stops.txt', or
+    'data.zip' holding a single file) for reading. Compressed data is
+    decompressed as it's read: nothing is unpacked to disk.
+    Text mode is utf-8-sig with newline='', as the csv module expects.
+    """
+    archive, member = split_archive_path(path)
+    if not is_compressed(path):
+        with open(archive, 'rb') if binary else open(archive, 'r', encoding='utf-8-sig', newline='') as f:
+            yield f
+        return
+
+    with ExitStack() as stack:
+        if archive.lower().endswith('.zip'):
+            archive_file = stack.enter_context(zipfile.ZipFile(archive))
+            raw = stack.enter_context(archive_file.open(_zip_member_info(archive_file, member)))
+        else:
+            raw = stack.enter_context(gzip.open(archive, 'rb'))
+
+        if binary:
+            yield raw
+        else:
+            yield stack.enter_context(io.TextIOWrapper(raw, encoding='utf-8-sig', newline=''))
+
+
 # ===== CSV Utilities =====
-def read_csv_generator(filename, folder="data"):
+def resolve_csv_path(filename, folder):
     """
-    Generator that yields rows from a CSV file one by one.
+    Absolute paths are used as-is (so scripts outside Django can call the
+    readers without settings), others are relative to BASE_DIR/folder.
+    Paths may point into archives (see open_source).
     """
-    full_path = os.path.join(settings.BASE_DIR, folder, filename)
-    if not os.path.exists(full_path):
+    if os.path.isabs(filename):
+        full_path = filename
+    else:
+        full_path = os.path.join(settings.BASE_DIR, folder or '', filename)
+    if not source_exists(full_path):
         raise FileNotFoundError(f"Could not find file at: {full_path}")
+    return full_path
+
+def make_column_projector(header, columns, strict=True, filename=''):
+    """
+    Returns a function turning a csv.reader row into a stripped tuple of
+    `columns`, with the positions resolved from the header once.
+    Missing columns raise ValueError, or read as '' with strict=False.
+    """
+    # Same as DictReader: the last of duplicated headers wins
+    positions = {name.strip(): i for i, name in enumerate(header) if name}
+
+    missing = [name for name in columns if name not in positions]
+    if missing and strict:
+        raise ValueError(f"{filename or 'CSV file'} has no column(s): {', '.join(missing)}")
+
+    # Missing columns point past the header: short rows are padded up to them
+    indices = [positions.get(name, len(header)) for name in columns]
+    width = max(indices, default=-1) + 1
+    strip = str.strip
+    if len(indices) == 1:
+        index = indices[0]
+        pick = lambda row: (strip(row[index]),)
+    else:
+        getter = operator.itemgetter(*indices)
+        pick = lambda row: tuple(map(strip, getter(row)))
+
+    def project(row):
+        if len(row) < width:
+            row += [''] * (width - len(row))
+        return pick(row)
+    return project
+
+def read_csv_columns(filename, columns, folder="data", strict=True, fieldnames=None):
+    """
+    Generator that yields only the requested columns of each row, as a
+    stripped tuple in the order of `columns`.
+    Column positions are resolved from the header once, so unused columns
+    are never stripped nor copied into a dict.
+
+    Missing columns raise ValueError, or read as '' with strict=False.
+    For headerless files, fieldnames names the columns instead of the first row.
+
+    Example:
+        for stop_id, lat, lon in read_csv_columns('stops.txt', ['stop_id', 'stop_lat', 'stop_lon']):
+            ...
+    """
+    full_path = resolve_csv_path(filename, folder)
 
-    with open(full_path, mode='r', encoding='utf-8-sig') as f:
+    with open_source(full_path) as f:
+        reader = csv.reader(f)
+        header = list(fieldnames) if fieldnames else next(reader, [])
+        project = make_column_projector(header, columns, strict, os.path.basename(full_path))
+
+        for row in reader:
+            if row:  # DictReader skips blank lines too
+                yield project(row)
+
+def read_csv_generator(filename, folder="data", columns=None):
+    """
+    Generator that yields rows from a CSV file one by one.
+    With `columns`, each dict only holds those columns (see read_csv_columns),
+    much cheaper on wide files when the caller only reads a few of them.
+    """
+    if columns is not None:
+        columns = list(columns)
+        for values in read_csv_columns(filename, columns, folder, strict=False):
+            yield dict(zip(columns, values))
+        return
+
+    full_path = resolve_csv_path(filename, folder)
+
+    with open_source(full_path) as f:
         reader = csv.DictReader(f)
         for row in reader:
             clean_row = {
@@ -24,6 +225,19 @@ def read_csv_generator(filename, folder="data"):
             }
             yield clean_row
 
+def delete_in_batches(queryset, field, values, batch_size=900):
+    """
+    Deletes the rows of queryset whose `field` is in values,
+    in batches to stay under the database's parameter limit.
+    Returns the number of rows deleted.
+    """
+    values = list(values)
+    deleted = 0
+    for i in range(0, len(values), batch_size):
+        count, _ = queryset.filter(**{f"{field}__in": values[i:i + batch_size]}).delete()
+        deleted += count
+    return deleted
+
 def check_csv_match(value, target_match):
     """
     Checks if a CSV value matches a target string (Case-insensitive, whitespace-safe).
@@ -73,7 +287,10 @@ def extract_sector_from_postcode(postcode):
 def auto_assign_sector(instance):
     """
     Shared logic to link any model (Address, School or more) to a Coordinate Sector.
+    Uses the preloaded sector table, so no extra SELECT per save.
     """
+    from api.coordinates.cache import sector_cache
+
     # Checks if postcode exists
     if not instance.postcode:
         return
@@ -82,12 +299,9 @@ def auto_assign_sector(instance):
     sector_name = extract_sector_from_postcode(instance.postcode)
     
     if sector_name:
-        # Database Lookup
-        sector_obj = Coordinates.objects.filter(name=sector_name).first()
-        
-        # Sets instance.postcode_sector
-        if sector_obj:
-            instance.postcode_sector = sector_obj
+        # Sets instance.postcode_sector (FK by primary key, no database lookup)
+        if sector_cache.resolve(instance.postcode):
+            instance.postcode_sector_id = sector_name
         else:
             # error handling: Raise error if can't map
             raise ValidationError(f"Sector '{sector_name}' not found. Please import Coordinates first.")